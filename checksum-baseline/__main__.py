@@ -6,6 +6,7 @@ from dotenv import load_dotenv
 from lib.helper import asynchronous
 
 from .blocks_io import BlocksIO
+from .subgraph.entries import Block
 
 RESET = "\033[0m"
 BOLD = "\033[1m"
@@ -30,9 +31,9 @@ BOLD = "\033[1m"
 )
 @click.option(
     "--blocksfile",
-    default=Path("blocks.json"),
+    default=Path("blocks.db"),
     type=click.Path(exists=False, file_okay=True, dir_okay=False, path_type=Path),
-    help="A .json file to store the blocks, events and checksums in",
+    help="A SQLite file to store the blocks, events and checksums in. A former .json file is converted",
 )
 @click.option(
     "--folder",
@@ -44,6 +45,12 @@ BOLD = "\033[1m"
 @click.option(
     "--fill", "-f", is_flag=True, help="Fill the missing blocks with empty blocks"
 )
+@click.option(
+    "--workers",
+    default=None,
+    type=int,
+    help="Max number of processes hashing the blocks. Defaults to the number of CPUs",
+)
 @asynchronous
 async def main(
     minblock: int,
@@ -53,47 +60,65 @@ async def main(
     blocksfile: Path,
     no_update: bool,
     fill: bool,
+    workers: int,
 ):
     if not load_dotenv():
         print("No .env file found")
         return
 
-    blocks_io = BlocksIO(blocksfile, folder)
+    if blocksfile.suffix == ".json":
+        jsonfile, blocksfile = blocksfile, blocksfile.with_suffix(".db")
+        blocks_io = BlocksIO(blocksfile, folder, workers)
+        if jsonfile.exists() and blocks_io.last is None:
+            blocks_io.from_json(jsonfile)
+    else:
+        blocks_io = BlocksIO(blocksfile, folder, workers)
 
-    if blocksfile and blocksfile.exists():
-        blocks_io.from_json()
-        minblock = blocks_io.blocks[-1].number
+    if blocks_io.last:
+        minblock = blocks_io.last.number + 1
 
     if not no_update:
-
-
         await blocks_io.from_subgraph_data(minblock, "SUBGRAPH_LOGS_URL")
-        blocks_io.to_json()
+        blocks_io.save()
     else:
         print("Skipping blocks update with onchain data")
 
-    if fill:
-        blocks_io.fill_missing_blocks()
-
-    block_numbers = BlocksIO.block_numbers(blocks_io.blocks)
+    bounds = blocks_io.table.bounds()
+    if bounds is None:
+        print("No blocks stored")
+        return
 
     if endblock:
         block_range = range(startblock, endblock + 1)
     else:
         block_range = range(startblock - 5, startblock + 6)
 
-    intersection = list(set(block_numbers).intersection(block_range))
-    intersection.sort()
+    checksums = blocks_io.fill_missing_blocks() if fill else blocks_io.table
+    start, end = block_range.start, block_range.stop - 1
 
-    print(f"Using events from block {block_numbers[0]} to {block_numbers[-1]}")
-    if not intersection:
-        print(f"No blocks in {block_range} found")
+    # blocks with events are read along, the others are only built when printed
+    event_blocks = blocks_io.store.range(start, end)
+    event_block = next(event_blocks, None)
+
+    print(f"Using events from block {bounds[0]} to {bounds[1]}")
+
+    found = False
+    for number, checksum in checksums.items(start, end):
+        found = True
 
-    for blocknumber in intersection:
-        if blocknumber == startblock:
+        if event_block is not None and event_block.number == number:
+            block, event_block = event_block, next(event_blocks, None)
+        else:
+            block = Block(number)
+            block.checksum = bytearray(checksum)
+
+        if number == startblock:
             print(BOLD, end="")
 
-        print(blocks_io.blocks[block_numbers.index(blocknumber)], end=f"{RESET}\n")
+        print(block, end=f"{RESET}\n")
+
+    if not found:
+        print(f"No blocks in {block_range} found")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+import sqlite3
+from itertools import groupby
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .subgraph.entries import Block, Event
+
+
+class BlockStore:
+    """
+    Append-only storage of the blocks, their events and checksums, in a SQLite file. Blocks are indexed by
+    number, so that a block or a range of blocks is read without loading the rest of the history.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS blocks (
+                number INTEGER PRIMARY KEY,
+                checksum BLOB NOT NULL
+            )"""
+        )
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS events (
+                block_number INTEGER NOT NULL,
+                tx_index INTEGER NOT NULL,
+                log_index INTEGER NOT NULL,
+                id TEXT NOT NULL,
+                evt_name TEXT NOT NULL,
+                tx_hash TEXT NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS events_block ON events (block_number, tx_index, log_index)")
+
+    def append(self, blocks: Iterable[Block]):
+        """
+        Appends blocks, newer than the last stored one, in a single transaction.
+        """
+        blocks = list(blocks)
+        if not blocks:
+            return
+
+        last = self.last()
+        if last is not None and blocks[0].number <= last.number:
+            raise ValueError(f"Block {blocks[0].number} is not newer than the last stored block {last.number}")
+
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany(
+                "INSERT INTO blocks VALUES (?, ?)", [(block.number, bytes(block.checksum)) for block in blocks]
+            )
+            self._db.executemany(
+                "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (e.block_number, e.tx_index, e.log_index, e.id, e.evt_name, e.tx_hash)
+                    for block in blocks
+                    for e in block.events
+                ],
+            )
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _blocks(self, where: str, params: tuple, order: str = "ASC", limit: int = -1) -> list[Block]:
+        rows = self._db.execute(
+            f"SELECT number, checksum FROM blocks WHERE {where} ORDER BY number {order} LIMIT {limit}", params
+        ).fetchall()
+        if not rows:
+            return []
+
+        blocks = {number: Block(number) for number, _ in rows}
+        for number, checksum in rows:
+            blocks[number].checksum = bytearray(checksum)
+
+        low, high = min(blocks), max(blocks)
+        events = self._db.execute(
+            """SELECT id, block_number, log_index, tx_index, evt_name, tx_hash FROM events
+            WHERE block_number BETWEEN ? AND ? ORDER BY block_number, tx_index, log_index""",
+            (low, high),
+        )
+        for number, items in groupby(events, key=lambda row: row[1]):
+            if number in blocks:
+                for item in items:
+                    blocks[number].add_event(Event(*item))
+
+        return sorted(blocks.values())
+
+    def get(self, number: int) -> Optional[Block]:
+        """
+        The block with the given number, if it has events.
+        """
+        blocks = self._blocks("number = ?", (number,))
+        return blocks[0] if blocks else None
+
+    def range(self, start: int, end: int) -> Iterator[Block]:
+        """
+        The blocks between two numbers (both included), in order. Blocks are read by batches.
+        """
+        batch_size = 10_000
+        while True:
+            blocks = self._blocks("number BETWEEN ? AND ?", (start, end), limit=batch_size)
+            yield from blocks
+
+            if len(blocks) < batch_size:
+                return
+            start = blocks[-1].number + 1
+
+    def before(self, number: int) -> Optional[Block]:
+        """
+        The last block strictly before the given number.
+        """
+        blocks = self._blocks("number < ?", (number,), order="DESC", limit=1)
+        return blocks[0] if blocks else None
+
+    def checksums(self, after: Optional[int] = None) -> Iterator[tuple[int, bytes]]:
+        """
+        The (block number, checksum) pairs of the blocks after the given number, in order.
+        """
+        query = "SELECT number, checksum FROM blocks WHERE number > ? ORDER BY number"
+        return self._db.execute(query, (-1 if after is None else after,))
+
+    def bounds(self) -> Optional[tuple[int, int]]:
+        """
+        The numbers of the first and last stored blocks.
+        """
+        row = self._db.execute("SELECT MIN(number), MAX(number) FROM blocks").fetchone()
+        return None if row[0] is None else row
+
+    def last(self) -> Optional[Block]:
+        """
+        The last stored block, which the next blocks are chained to.
+        """
+        row = self._db.execute("SELECT MAX(number) FROM blocks").fetchone()
+        return None if row[0] is None else self.get(row[0])
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
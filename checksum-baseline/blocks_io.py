@@ -2,96 +2,130 @@ import json
 import signal
 import sys
 from pathlib import Path
+from typing import Iterable, Optional
 
-from lib.helper import keccak_256
+from lib.subgraph import ProviderError
 
+from .block_store import BlockStore
+from .checksum_table import ChecksumTable, FilledChecksums
+from .hashing import compute_checksums
 from .events_io import EventsIO
 from .subgraph.entries import Block, Event
 
 
 class BlocksIO:
-    def __init__(self, file: Path, folder: Path):
+    def __init__(self, file: Path, folder: Path, workers: Optional[int] = None):
         self.file = file
         self.temp_folder = folder
-        self.blocks: list[Block] = []
+        self.workers = workers
+        self.store = BlockStore(file)
+        self.table = ChecksumTable(file.with_suffix(".checksums"))
+        self.blocks: list[Block] = []  # blocks parsed by this run, not stored yet
+        self.last: Optional[Block] = self.store.last()
         signal.signal(signal.SIGINT, self.interruption_handler)
 
-    def _parse_data(self, data: dict):
-        # remove duplicates and sort by block_number, tx_index, log_index
-        events = list(set([Event.fromDict(d) for d in data]))
-        events.sort()
+        self._sync_table()
+
+    def _sync_table(self):
+        # the table is written after the store, so it may lack the last blocks of an interrupted run
+        bounds = self.table.bounds()
+        self.table.append(self.store.checksums(None if bounds is None else bounds[1]))
+
+    def _parse_data(self, data: Iterable[dict]):
+        self._parse_events({Event.fromDict(d) for d in data})
+
+    @property
+    def last_checksum(self) -> bytearray:
+        """
+        The checksum the next block is chained to.
+        """
+        return self.last.checksum if self.last else bytearray(32)
+
+    def _parse_events(self, events: set[Event]):
+        """
+        Appends the events to the chain, in O(new events). Blocks already in the chain are complete, so events
+        up to the last one are ignored, and only the newer blocks are hashed, starting from the last checksum.
+        """
+        last_number = self.last.number if self.last else None
+
+        # sort by block_number, tx_index, log_index (duplicates are removed by the set)
+        events = sorted(event for event in events if last_number is None or event.block_number > last_number)
 
         # create blocks out of events
+        new_blocks: list[Block] = []
         for event in events:
-            if len(self.blocks) == 0 or self.blocks[-1].number != event.block_number:
-                self.blocks.append(Block(event.block_number))
-            self.blocks[-1].add_event(event)
+            if len(new_blocks) == 0 or new_blocks[-1].number != event.block_number:
+                new_blocks.append(Block(event.block_number))
+            new_blocks[-1].add_event(event)
 
         # calculate checksums
-        checksums: list[bytearray] = [bytearray(32)]
-        for block in self.blocks:
-            cat_str = b"".join([checksums[-1], block.keccak_256()])
-            block.checksum = keccak_256(cat_str)
-            checksums.append(block.checksum)
+        compute_checksums(new_blocks, self.last_checksum, self.workers)
+
+        self.blocks.extend(new_blocks)
+
+        if new_blocks:
+            self.last = new_blocks[-1]
+            print(f"Added {len(new_blocks)} blocks ({len(events)} events) to the chain")
 
     async def from_subgraph_data(self, minblock: int, url: str):
         # import data, either from local files or from the subgraph API
         events_io = EventsIO(self.temp_folder)
         if self.temp_folder.exists():
-            data = events_io.from_local_files()
+            self._parse_data(events_io.from_local_files())
         else:
             self.temp_folder.mkdir()
-            data = await events_io.from_subgraph(url, minblock)
-
-        self._parse_data(data)
-
-    def fill_missing_blocks(self):
-        temp_block_list: list[Block] = []
-
-        for block in self.blocks:
-            last_block_number = temp_block_list[-1].number if temp_block_list else None
-            if last_block_number and (block.number - last_block_number) > 1:
-                missing_blocks = [
-                    Block(item) for item in range(last_block_number + 1, block.number)
-                ]
-                for item in missing_blocks:
-                    item.checksum = temp_block_list[-1].checksum
-
-                temp_block_list.extend(missing_blocks)
+            try:
+                self._parse_events({Event.fromDict(d) async for d in events_io.from_subgraph(url, minblock)})
+            except ProviderError as err:
+                # the shards stored so far are a contiguous range of blocks, which can be chained already
+                print(f"\nLoading events interrupted: {err}")
+                self._parse_data(events_io.from_local_files())
+
+    def fill_missing_blocks(self) -> FilledChecksums:
+        """
+        The checksums of every block between the first and the last stored blocks, including the blocks without
+        events, which carry the checksum of the previous block. This is a view on the checksum table, empty blocks
+        are not created.
+        """
+        return FilledChecksums(self.table)
+
+    def save(self):
+        """
+        Appends the blocks parsed by this run to the store.
+        """
+        print(f"Saving {len(self.blocks)} blocks to {self.file}")
+        self.store.append(self.blocks)
+        self.table.append((block.number, block.checksum) for block in self.blocks)
+        self.blocks = []
 
-            temp_block_list.append(block)
-
-        self.blocks = temp_block_list
+        self.remove_temp_files()
 
-    def from_json(self):
-        print(f"Loading blocks from {self.file}")
+    def from_json(self, file: Path):
+        """
+        Imports the blocks of a `.json` file, as written by the former versions of this module.
+        """
+        print(f"Importing blocks from {file}")
 
         block_jsons = {}
-        with open(self.file, "r") as f:
+        with open(file, "r") as f:
             block_jsons = json.load(f)
 
+        blocks: list[Block] = []
         for block_number, block_json in block_jsons.items():
             block = Block(int(block_number))
             for event_json in block_json["events"]:
                 block.add_event(Event.fromDict(event_json))
             block.checksum = bytearray.fromhex(block_json["checksum"])
-            self.blocks.append(block)
-
-    def to_json(self):
-        if not self.file:
-            return
-
-        print(f"Saving blocks to {self.file}")
-        block_jsons = {}
-        for block in self.blocks:
-            block_jsons.update(block.json_format())
+            blocks.append(block)
 
-        with open(self.file, "w+") as f:
-            json.dump(block_jsons, f)
-
-        self.remove_temp_files()
+        self.store.append(sorted(blocks))
+        self._sync_table()
+        self.last = self.store.last()
 
     def remove_temp_files(self):
+        if not self.temp_folder.exists():
+            return
+
         for file in self.temp_folder.iterdir():
             file.unlink()
         self.temp_folder.rmdir()
@@ -99,9 +133,5 @@ class BlocksIO:
     def interruption_handler(self, sig, frame):
         print("")
         self._parse_data(EventsIO(self.temp_folder).from_local_files())
-        self.to_json()
+        self.save()
         sys.exit(0)
-
-    @classmethod
-    def block_numbers(cls, blocks: list[Block]):
-        return [block.number for block in blocks]
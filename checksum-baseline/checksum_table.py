@@ -0,0 +1,139 @@
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+RECORD = np.dtype([("number", "<i8"), ("checksum", "V32")])
+
+
+class ChecksumTable:
+    """
+    Checksums of the blocks with events, as fixed-width (block number, checksum) records in a flat binary file.
+    Records are appended in block order and read through a memory map, so that a range of blocks is found with
+    a binary search on the block numbers, without parsing anything.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._records: Optional[np.ndarray] = None
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+
+        # drop a record partially written by an interrupted run
+        size = self.path.stat().st_size
+        if size % RECORD.itemsize:
+            with open(self.path, "r+b") as f:
+                f.truncate(size - size % RECORD.itemsize)
+
+    @property
+    def records(self) -> np.ndarray:
+        if self._records is None:
+            count = self.path.stat().st_size // RECORD.itemsize
+            if count == 0:
+                self._records = np.empty(0, RECORD)
+            else:
+                self._records = np.memmap(self.path, RECORD, mode="r", shape=(count,))
+        return self._records
+
+    @property
+    def numbers(self) -> np.ndarray:
+        return self.records["number"]
+
+    def append(self, checksums: Iterable[tuple[int, bytes]]):
+        """
+        Appends (block number, checksum) pairs, newer than the last stored block.
+        """
+        records = np.array([(number, bytes(checksum)) for number, checksum in checksums], RECORD)
+        if len(records) == 0:
+            return
+
+        if len(self) and records["number"][0] <= self.numbers[-1]:
+            raise ValueError(f"Block {records['number'][0]} is not newer than the last block {self.numbers[-1]}")
+
+        with open(self.path, "ab") as f:
+            f.write(records.tobytes())
+        self._records = None
+
+    def bounds(self) -> Optional[tuple[int, int]]:
+        """
+        The numbers of the first and last blocks.
+        """
+        return (int(self.numbers[0]), int(self.numbers[-1])) if len(self) else None
+
+    def range(self, start: int, end: int) -> np.ndarray:
+        """
+        The records of the blocks between two numbers (both included), as a view on the memory map.
+        """
+        low = np.searchsorted(self.numbers, start, "left")
+        high = np.searchsorted(self.numbers, end, "right")
+        return self.records[low:high]
+
+    def items(self, start: int, end: int, batch_size: int = 10_000) -> Iterator[tuple[int, bytes]]:
+        """
+        The (block number, checksum) pairs of the blocks between two numbers (both included), converted by batches.
+        """
+        records = self.range(start, end)
+        for offset in range(0, len(records), batch_size):
+            yield from records[offset : offset + batch_size].tolist()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+class FilledChecksums:
+    """
+    Virtual view on a `ChecksumTable` including the blocks without events, between the first and the last
+    blocks with events. An empty block has the checksum of the previous block with events, found with a
+    binary search when requested or generated while iterating: empty blocks are never stored nor built in
+    advance, so the memory used only depends on the number of blocks with events.
+    """
+
+    def __init__(self, table: ChecksumTable):
+        self.table = table
+
+    def bounds(self) -> Optional[tuple[int, int]]:
+        return self.table.bounds()
+
+    def items(self, start: int, end: int) -> Iterator[tuple[int, bytes]]:
+        """
+        The (block number, checksum) pairs of every block between two numbers (both included), within the bounds of
+        the table. Pairs are generated one at a time, so that the memory used does not depend on the range.
+        """
+        bounds = self.bounds()
+        if bounds is None:
+            return
+
+        start, end = max(start, bounds[0]), min(end, bounds[1])
+        numbers = self.table.numbers
+        checksums = self.table.records["checksum"]
+
+        # the last block with events at or before the start, whose checksum the next blocks carry
+        idx = int(np.searchsorted(numbers, start, "right")) - 1
+        number = start
+
+        while number <= end:
+            following = int(numbers[idx + 1]) if idx + 1 < len(numbers) else end + 1
+            checksum = checksums[idx].tobytes()
+
+            for item in range(number, min(following, end + 1)):
+                yield item, checksum
+
+            number = following
+            idx += 1
+
+    def __getitem__(self, number: int) -> bytes:
+        bounds = self.bounds()
+        if bounds is None or not bounds[0] <= number <= bounds[1]:
+            raise KeyError(number)
+
+        idx = int(np.searchsorted(self.table.numbers, number, "right")) - 1
+        return self.table.records["checksum"][idx].tobytes()
+
+    def __iter__(self) -> Iterator[tuple[int, bytes]]:
+        bounds = self.bounds()
+        return iter(()) if bounds is None else self.items(*bounds)
+
+    def __len__(self) -> int:
+        bounds = self.bounds()
+        return 0 if bounds is None else bounds[1] - bounds[0] + 1
@@ -1,61 +1,97 @@
 import pickle
 from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+from aiohttp import ClientSession
 
 from lib.helper import progress_bar
+from lib.subgraph import BlockPin, range_boundaries
 
 from .subgraph.providers import EventsProvider, LastBlockProvider
 
+BLOCKS_PER_SHARD: int = 100_000
+
 
 class EventsIO:
     def __init__(self, folder: Path):
         self.folder = folder
 
-    def from_local_files(self):
-        data = []
-        files = list(self.folder.glob("*.pkl"))
+    def shard_files(self) -> list[Path]:
+        """
+        The local files of the shards, from the first one up to the first missing one. Shards cover consecutive
+        block ranges, so that the events after a missing shard cannot be chained yet: they are fetched again on
+        the next run.
+        """
+        indexes = {int(file.stem.removeprefix("part_")) for file in self.folder.glob("part_*.pkl")}
+
+        count = 0
+        while count in indexes:
+            count += 1
+
+        if skipped := len(indexes) - count:
+            print(f"Ignoring {skipped} files in folder `{self.folder}` after the missing part_{count}.pkl")
+
+        return [self.folder.joinpath(f"part_{idx}.pkl") for idx in range(count)]
+
+    def from_local_files(self) -> Iterator[dict]:
+        """
+        Yields the events stored in the local files of a contiguous range of shards, one file loaded at a time.
+        """
+        files = self.shard_files()
         print(
             f"Loading data from {len(files)} files in folder `{self.folder}`")
         for file in files:
             print(f"\rLoading {file.name}", end="")
             with open(file, "rb") as f:
-                data.extend(pickle.load(f))
+                yield from pickle.load(f)
         print("\r" + " " * 100, end="")
         print("\rLoading done!")
-        return data
 
-    async def from_subgraph(self, url: str, minblock: int):
-        results = await LastBlockProvider(url).get()
+    async def from_subgraph(self, url: str, minblock: int) -> AsyncIterator[dict]:
+        """
+        Yields the events from the subgraph, shard by shard in block order. Each shard is also stored in a local
+        file, so that the files always hold a contiguous range of blocks from `minblock`, even if the run is
+        interrupted.
+        """
+        async with LastBlockProvider.create_session() as session:
+            async for event in self._from_subgraph(url, minblock, session):
+                yield event
+
+    async def _from_subgraph(self, url: str, minblock: int, session: ClientSession) -> AsyncIterator[dict]:
+        results = await LastBlockProvider(url, session).get()
         last_block = results[0]
 
         if minblock >= last_block:
             print("No missing data to load from onchain")
-            return []
+            return
         else:
             print(f"Loading data from block {minblock} to {last_block}")
 
-        provider = EventsProvider(url)
-        data, temp_data = [], []
-        idx = 0
-        while idx == 0 or len(temp_data) == 6000:
-            block_number = int(data[-1]["block_number"]
-                               ) if len(data) > 0 else minblock
-            
-            temp_data = await provider.get(block_number=str(block_number))
-
-            with open(self.folder.joinpath(f"part_{idx}.pkl"), "wb") as f:
-                pickle.dump(temp_data, f)
-            
-            data.extend(temp_data)
-
-            progress_bar(
-                block_number,
-                last_block,
-                (block_number - minblock) / (last_block - minblock),
-            )
-
-            idx += 1
-
-        progress_bar(last_block, last_block, 1)
+        # pinned to the last block, so that all shards are consistent and can be cached
+        provider = EventsProvider(url, session, block_pin=BlockPin(last_block))
+        boundaries = [str(block) for block in range_boundaries(minblock, last_block, BLOCKS_PER_SHARD)]
+
+        shard_count = len(boundaries) + 1
+        received = dict[int, list]()  # shards received ahead of a missing one
+        done = 0
+        async for idx, shard_data in provider.aiter_shards(boundaries, block_number=str(minblock)):
+            received[idx] = shard_data
+
+            while done in received:
+                shard_data = received.pop(done)
+                self._save_shard(done, shard_data)
+
+                done += 1
+                progress_bar(done, shard_count, done / shard_count)
+
+                for event in shard_data:
+                    yield event
+
         print("")
 
-        return data
+    def _save_shard(self, idx: int, data: list):
+        # written aside then renamed, so that an interrupted write never leaves a truncated shard
+        file = self.folder.joinpath(f"part_{idx}.pkl")
+        with open(file.with_suffix(".tmp"), "wb") as f:
+            pickle.dump(data, f)
+        file.with_suffix(".tmp").replace(file)
@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+from sha3 import keccak_256
+
+from .subgraph.entries import Block
+
+# below this number of blocks, starting the worker processes costs more than it saves
+PARALLEL_THRESHOLD: int = 50_000
+
+
+def encode_tx_hashes(blocks: list[Block]) -> tuple[bytes, np.ndarray]:
+    """
+    Decodes the transaction hashes of the events of all the blocks once, into a contiguous buffer.
+    :param blocks: The blocks, with their events.
+    :return: The buffer, and the offsets of the blocks in it: the bytes of block `i` are `offsets[i]:offsets[i + 1]`.
+    """
+    tx_hashes = [event.tx_hash for block in blocks for event in block.events]
+
+    # usual case: "0x"-prefixed 32-byte hashes, decoded all at once ("x" is not an hex digit, so only the
+    # prefixes are removed)
+    buffer = None
+    if set(map(len, tx_hashes)) <= {66}:
+        try:
+            buffer = bytes.fromhex("".join(tx_hashes).replace("0x", ""))
+            event_offsets = np.arange(len(tx_hashes) + 1, dtype=np.int64) * 32
+        except ValueError:
+            pass
+
+    if buffer is None:
+        decoded = _decode_each(blocks)
+        buffer = b"".join(decoded)
+        event_offsets = np.zeros(len(decoded) + 1, np.int64)
+        np.cumsum(np.fromiter(map(len, decoded), np.int64, len(decoded)), out=event_offsets[1:])
+
+    block_ends = np.zeros(len(blocks) + 1, np.int64)
+    np.cumsum(np.fromiter((len(block.events) for block in blocks), np.int64, len(blocks)), out=block_ends[1:])
+
+    return buffer, event_offsets[block_ends]
+
+
+def _decode_each(blocks: list[Block]) -> list[bytes]:
+    try:
+        return [bytes.fromhex(event.tx_hash[2:].strip()) for block in blocks for event in block.events]
+    except ValueError:
+        # reports the invalid hash
+        for block in blocks:
+            for event in block.events:
+                event.tx_hash_bytes
+        raise
+
+
+def _hash_slices(buffer: bytes, offsets: list[int]) -> list[bytes]:
+    view = memoryview(buffer)
+    return [keccak_256(view[start:end]).digest() for start, end in zip(offsets, offsets[1:])]
+
+
+def block_hashes(buffer: bytes, offsets: np.ndarray, workers: Optional[int] = None) -> list[bytes]:
+    """
+    Hashes the bytes of each block. Blocks are independent, so that large batches are split among processes.
+    :param buffer: The transaction hashes of all the blocks, as returned by `encode_tx_hashes`.
+    :param offsets: The offsets of the blocks in the buffer.
+    :param workers: Max number of processes. Defaults to the number of CPUs.
+    :return: The hash of each block.
+    """
+    count = len(offsets) - 1
+    workers = min(workers or os.cpu_count() or 1, max(count // PARALLEL_THRESHOLD, 1))
+
+    if workers <= 1:
+        return _hash_slices(buffer, offsets.tolist())
+
+    # a few tasks per process, each with its own slice of the buffer
+    bounds = np.linspace(0, count, workers * 4 + 1, dtype=np.int64).tolist()
+    tasks = [
+        (buffer[offsets[low] : offsets[high]], (offsets[low : high + 1] - offsets[low]).tolist())
+        for low, high in zip(bounds, bounds[1:])
+    ]
+
+    with ProcessPoolExecutor(workers) as executor:
+        results = executor.map(_hash_slices, *zip(*tasks))
+        return [item for result in results for item in result]
+
+
+def chain_checksums(hashes: list[bytes], previous: bytes) -> list[bytes]:
+    """
+    Chains the block hashes: the checksum of a block is the hash of the previous checksum followed by its hash.
+    :param hashes: The hash of each block, in block order.
+    :param previous: The checksum of the block before the first one.
+    """
+    checksums = []
+    for block_hash in hashes:
+        previous = keccak_256(previous + block_hash).digest()
+        checksums.append(previous)
+    return checksums
+
+
+def compute_checksums(blocks: list[Block], previous: bytes, workers: Optional[int] = None):
+    """
+    Sets the checksum of each block, chained to the given checksum of the block before the first one.
+    """
+    buffer, offsets = encode_tx_hashes(blocks)
+    hashes = block_hashes(buffer, offsets, workers)
+
+    for block, checksum in zip(blocks, chain_checksums(hashes, bytes(previous))):
+        block.checksum = bytearray(checksum)
@@ -1,10 +1,11 @@
-from lib.subgraph import GraphQLProvider
+from lib.subgraph import GraphQLProvider, LastBlockProvider, Pagination
 
 
 class EventsProvider(GraphQLProvider):
     query_file = "queries/events.graphql"
     params = ["$block_number: String"]
+    pagination = Pagination.CURSOR
+    shard_key = "block_number"
 
-class LastBlockProvider(GraphQLProvider):
-    query_file = "queries/last_block.graphql"
-    default_key  = ["_meta", "block", "number"]
\ No newline at end of file
+
+__all__ = ["EventsProvider", "LastBlockProvider"]
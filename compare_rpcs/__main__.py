@@ -1,14 +1,29 @@
 import asyncio
 import datetime
 import json
+import multiprocessing
+from contextlib import aclosing
 from pathlib import Path
+from typing import Optional, TextIO
 
 import click
+from prometheus_client import start_http_server
 
-from lib.helper import asynchronous, progress_bar
-from lib.rpc.entries.types.block import Block, get_ranges
-from lib.rpc.query_provider import ETHGetLogsRPCProvider, ProviderError
+from lib.helper import progress_bar
+from lib.rpc.entries.log_batch import LogBatch
+from lib.rpc.entries.types.block import Block
+from lib.rpc.log_store import LogStore
+from lib.rpc.query_provider import (
+    ETHGetLogsBatchRPCProvider,
+    ETHGetLogsRPCProvider,
+    ProviderError,
+    ResultLimitError,
+)
+from lib.rpc.range_scheduler import AdaptiveRangeScheduler
+from lib.rpc.transport import RPCTransport
 
+from .checkpoint import Checkpoint, LeaseLost
+from .comparison import diff_logs
 from .config_parser import load_config_file
 from .rpc_url import RPC_URL_TYPE, RPCUrl
 
@@ -22,16 +37,65 @@ from .rpc_url import RPC_URL_TYPE, RPCUrl
     expose_value=False,  # We don't need to pass it to the function
     help="Path to config file (json, yml/yaml, or ini)",
 )
-@click.option("--rpc1", type=RPC_URL_TYPE, help="RPC URL to connect to")
-@click.option("--rpc2", type=RPC_URL_TYPE, help="RPC URL to connect to")
+@click.option(
+    "--rpc",
+    "rpcs",
+    type=RPC_URL_TYPE,
+    multiple=True,
+    help="RPC URL to compare, as `name=url` or `url`. Repeat for each endpoint, the first one is the reference",
+)
+@click.option("--rpc1", type=RPC_URL_TYPE, help="RPC URL to connect to (same as the first --rpc)")
+@click.option("--rpc2", type=RPC_URL_TYPE, help="RPC URL to connect to (same as the second --rpc)")
 @click.option("--fromBlock", "from_block", type=Block, help="Starting block number")
 @click.option("--toBlock", "to_block", type=Block, help="Ending block number")
-@click.option("--out", "output_file", type=click.Path(), help="Output file path")
+@click.option("--out", "output_file", type=click.Path(), help="Output file path (`.jsonl` is appended)")
 @click.option("--address", "address", type=str, default=None, help="Ethereum address to filter logs")
 @click.option("--topics", "topics", type=str, multiple=True, help="Topics to filter logs")
-@click.option("--block-range", "block_range", type=int, help="Maximum block range for a single query")
-@asynchronous
-async def main(
+@click.option(
+    "--block-range", "block_range", type=int, default=1_000, help="Initial block range for a single query"
+)
+@click.option(
+    "--max-block-range", "max_block_range", type=int, default=100_000, help="Maximum block range for a single query"
+)
+@click.option(
+    "--target-logs", "target_logs", type=int, default=1_000, help="Number of logs per query the block range adapts to"
+)
+@click.option(
+    "--max-connections", "max_connections", type=int, default=10, help="Maximum simultaneous connections per RPC"
+)
+@click.option(
+    "--batch-size", "batch_size", type=int, default=1, help="Maximum JSON-RPC calls per HTTP request (1 disables)"
+)
+@click.option(
+    "--max-in-flight", "max_in_flight", type=int, default=4, help="Maximum number of block ranges fetched at once"
+)
+@click.option(
+    "--metrics-port",
+    "metrics_port",
+    type=int,
+    default=None,
+    help="Port to expose Prometheus metrics on (incremented for each worker)",
+)
+@click.option(
+    "--checkpoint",
+    "checkpoint_file",
+    type=click.Path(),
+    default=None,
+    help="SQLite file recording the progress, to resume an interrupted comparison",
+)
+@click.option(
+    "--store",
+    "store_dir",
+    type=click.Path(),
+    default=None,
+    help="Folder to store the fetched logs in, in a columnar format (one subfolder per RPC)",
+)
+@click.option("--chunk-size", "chunk_size", type=int, default=100_000, help="Blocks per checkpointed chunk")
+@click.option(
+    "--workers", "workers", type=int, default=1, help="Number of worker processes (requires --checkpoint)"
+)
+def main(
+    rpcs: tuple[RPCUrl, ...],
     rpc1: RPCUrl,
     rpc2: RPCUrl,
     from_block: Block,
@@ -40,46 +104,305 @@ async def main(
     address: str,
     topics: list[str],
     block_range: int,
+    max_block_range: int,
+    target_logs: int,
+    max_connections: int,
+    batch_size: int,
+    max_in_flight: int,
+    metrics_port: Optional[int],
+    checkpoint_file: Optional[Path],
+    store_dir: Optional[Path],
+    chunk_size: int,
+    workers: int,
 ):
-    RPCs: dict[str, str] = {rpc.name: rpc.url for rpc in [rpc1, rpc2]}
+    endpoints: list[RPCUrl] = [*[rpc for rpc in [rpc1, rpc2] if rpc is not None], *rpcs]
+    RPCs: dict[str, str] = {rpc.name: rpc.url for rpc in endpoints}
+
+    if len(RPCs) != len(endpoints):
+        raise click.BadParameter("RPC names must be unique", param_hint="--rpc")
+    if len(RPCs) < 2:
+        raise click.BadParameter("At least two RPCs are needed for a comparison", param_hint="--rpc")
+    if workers > 1 and checkpoint_file is None:
+        raise click.BadParameter("Workers share their progress through the checkpoint file", param_hint="--workers")
+
+    options = {
+        "RPCs": RPCs,
+        "from_block": from_block,
+        "to_block": to_block,
+        "output_file": output_file,
+        "address": address,
+        "topics": list(topics),
+        "block_range": block_range,
+        "max_block_range": max_block_range,
+        "target_logs": target_logs,
+        "max_connections": max_connections,
+        "batch_size": batch_size,
+        "max_in_flight": max_in_flight,
+        "metrics_port": metrics_port,
+        "checkpoint_file": checkpoint_file,
+        "store_dir": store_dir,
+        "chunk_size": chunk_size,
+        "workers": workers,
+    }
+
+    if workers == 1:
+        run_worker(0, options)
+        return
+
+    processes = [multiprocessing.Process(target=run_worker, args=(worker, options)) for worker in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+def run_worker(worker: int, options: dict):
+    asyncio.run(run(worker=worker, **options))
+
+
+async def run(
+    RPCs: dict[str, str],
+    from_block: Block,
+    to_block: Block,
+    output_file: Path,
+    address: str,
+    topics: list[str],
+    block_range: int,
+    max_block_range: int,
+    target_logs: int,
+    max_connections: int,
+    batch_size: int,
+    max_in_flight: int,
+    metrics_port: Optional[int],
+    checkpoint_file: Optional[Path],
+    store_dir: Optional[Path],
+    chunk_size: int,
+    workers: int,
+    worker: int,
+):
+    if metrics_port is not None:
+        start_http_server(metrics_port + worker)
+
+    for url in RPCs.values():
+        RPCTransport.for_url(url, limit=max_connections, batch_size=batch_size)
 
+    checkpoint = None
+    if checkpoint_file is not None:
+        scan = describe(RPCs, from_block, to_block, address, topics)
+        checkpoint = Checkpoint(checkpoint_file, scan, from_block.idx, to_block.idx, chunk_size, worker)
+
+    if workers > 1:
+        output_file = Path(f"{output_file}_{worker}")
+
+    stores = None
+    if store_dir is not None:
+        stores = {name: LogStore(Path(store_dir) / name) for name in RPCs}
+
+    try:
+        scheduler = AdaptiveRangeScheduler(block_range, max_range=max_block_range, target_results=target_logs)
+        await compare(
+            RPCs,
+            from_block,
+            to_block,
+            output_file,
+            address,
+            topics,
+            scheduler,
+            max_in_flight,
+            checkpoint,
+            stores,
+            worker == 0,
+        )
+    finally:
+        await RPCTransport.close_all()
+
+
+def describe(RPCs: dict[str, str], from_block: Block, to_block: Block, address: str, topics: list[str]) -> dict:
+    """
+    Identifies a comparison.
+    """
+    return {
+        "url": RPCs,
+        "fromBlock": from_block.idx,
+        "toBlock": to_block.idx,
+        "query": ETHGetLogsRPCProvider.get_query(address=address, topics=[topics]),
+    }
+
+
+def write_record(file: TextIO, record: dict):
+    file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+async def compare(
+    RPCs: dict[str, str],
+    from_block: Block,
+    to_block: Block,
+    output_file: Path,
+    address: str,
+    topics: list[str],
+    scheduler: AdaptiveRangeScheduler,
+    max_in_flight: int = 1,
+    checkpoint: Optional[Checkpoint] = None,
+    stores: Optional[dict[str, LogStore]] = None,
+    progress: bool = True,
+):
+    """
+    Compares the logs returned by several RPCs over a block range, against the ones of the first RPC. Every
+    difference is appended as one JSON record per line to `{output_file}.jsonl`. With a checkpoint, only the
+    chunks of the range not compared yet (nor being compared by another worker) are. With stores, the logs of
+    each RPC are also kept in its `LogStore`.
+    """
     Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+    reference = next(iter(RPCs))
+
+    async def fetch(start: Block, end: Block) -> dict[str, LogBatch | ProviderError]:
+        results = await asyncio.gather(
+            *[
+                ETHGetLogsBatchRPCProvider(url).get(
+                    fromBlock=start.idx, toBlock=end.idx, address=address, topics=[topics]
+                )
+                for url in RPCs.values()
+            ],
+            return_exceptions=True,
+        )
+
+        for result in results:
+            if isinstance(result, ResultLimitError) and end.idx - start.idx + 1 > scheduler.min_range:
+                raise result  # let the scheduler split the range, the endpoint failed otherwise
+            if isinstance(result, BaseException) and not isinstance(result, ProviderError):
+                raise result
+
+        return dict(zip(RPCs.keys(), results))
 
-    for start, end in get_ranges(from_block, to_block, block_range):
-        if to_block != from_block:
-            progress_bar(
-                start.idx, to_block.idx, percentage=(start.idx - from_block.idx) / (to_block.idx - from_block.idx)
-            )
+    def count(results: dict[str, LogBatch | ProviderError]) -> Optional[int]:
+        # failed fetches tell nothing about the density of the logs
+        return max((len(value) for value in results.values() if isinstance(value, LogBatch)), default=None)
 
-        logs = {key: [] for key in RPCs.keys()}
+    async def compare_span(span_start: Block, span_end: Block):
+        failed: Optional[Block] = None  # first block of the window an endpoint failed to return
+        pending: list[dict] = []  # records of the windows compared, written along with the progress
 
-        for name, url in RPCs.items():
+        def commit(block: int):
+            # never record progress ahead of the output
+            for record in pending:
+                write_record(f, record)
+            pending.clear()
+
+            if checkpoint is not None:
+                f.flush()
+                checkpoint.advance(block)
+
+        windows = scheduler.scan(fetch, span_start, span_end, count, max_in_flight)
+        async with aclosing(windows):
+            async for start, end, results in windows:
+                # renewed separately from the progress, which is not recorded while the stores are buffering
+                if checkpoint is not None:
+                    checkpoint.heartbeat()
+
+                records = compare_range(RPCs, reference, start, end, results)
+
+                # with a checkpoint, the rest of the span is left to the next run, so that every endpoint gets every
+                # window once and no record is written twice. Only the errors of the window are written.
+                if checkpoint is not None and any(isinstance(result, ProviderError) for result in results.values()):
+                    for record in records:
+                        if record["type"] == "error":
+                            write_record(f, record)
+                    failed = start
+                    break
+
+                pending.extend(records)
+
+                if stores is not None:
+                    flushed = [
+                        stores[name].append(result, start.idx, end.idx)
+                        for name, result in results.items()
+                        if isinstance(result, LogBatch)
+                    ]
+                    if any(flushed):
+                        for store in stores.values():
+                            store.flush()
+
+                if checkpoint is None or stores is None or not any(store.buffered for store in stores.values()):
+                    commit(end.idx)
+
+                if progress and to_block != from_block:
+                    total = to_block.idx - from_block.idx + 1
+                    done = total - checkpoint.remaining if checkpoint is not None else end.idx - from_block.idx + 1
+                    progress_bar(from_block.idx + done - 1, to_block.idx, percentage=done / total)
+
+        if stores is not None:
+            for store in stores.values():
+                store.flush()
+
+        if failed is None:
+            commit(span_end.idx)
+            return
+
+        print(f"\nStopped comparing blocks {failed.idx} to {span_end.idx}, as an endpoint failed")
+        commit(failed.idx - 1)
+        checkpoint.release()
+
+    with open(Path(f"{output_file}.jsonl"), "a") as f:
+        write_record(
+            f,
+            {
+                "type": "meta",
+                "timestamp": datetime.datetime.now().timestamp(),
+                "reference": reference,
+                **describe(RPCs, from_block, to_block, address, topics),
+            },
+        )
+
+        if checkpoint is None:
+            spans = [(from_block, to_block)]
+        else:
+            spans = ((Block(start), Block(end)) for start, end in checkpoint.claims())
+
+        for span_start, span_end in spans:
             try:
-                logs[name].extend(
-                    await ETHGetLogsRPCProvider(url).get(
-                        fromBlock=start.idx, toBlock=end.idx, address=address, topics=[topics]
-                    )
-                )
-            except ProviderError as e:
-                print(f"Error fetching logs from {name} ({url}): {e}")
+                await compare_span(span_start, span_end)
+            except LeaseLost as err:
+                # the other worker compares (and stores) the chunk again, from its last recorded block
+                print(f"\n{err}, leaving it")
+                if stores is not None:
+                    for store in stores.values():
+                        store.discard()
+
+
+def compare_range(
+    RPCs: dict[str, str],
+    reference: str,
+    start: Block,
+    end: Block,
+    results: dict[str, LogBatch | ProviderError],
+) -> list[dict]:
+    """
+    The differences between the logs of a block range, and the errors met while fetching them, as output records.
+    """
+    bounds = {"fromBlock": start.idx, "toBlock": end.idx}
+    logs: dict[str, LogBatch] = {}
+    records = []
+
+    for name, result in results.items():
+        if isinstance(result, ProviderError):
+            print(f"Error fetching logs from {name} ({RPCs[name]}): {result}")
+            records.append({"type": "error", **bounds, "endpoint": name, "error": str(result)})
+        else:
+            logs[name] = result
+
+    if reference not in logs:
+        return records
 
-        # check if the length of all values are the same
-        logs_lengths: dict[str, int] = {key: len(value) for key, value in logs.items()}
+    differences = 0
+    for diff in diff_logs(logs, reference):
+        records.append({"type": "diff", **bounds, **diff})
+        differences += 1
 
-        if logs_lengths["Erigon"] > logs_lengths["Nethermind"]:
-            print(" Discrepancy found: More logs with Erigon than Nethermind.")
+    if differences:
+        print(f" Discrepancy found: {differences} differing logs between blocks {start.idx} and {end.idx}.")
 
-            with open(Path(f"{output_file}_{start.idx}_{end.idx}.json"), "w") as f:
-                data = {}
-                data["logs"] = {key: [log.as_dict for log in value] for key, value in logs.items()}
-                data["meta"] = {
-                    "timestamp": datetime.datetime.now().timestamp(),
-                    "url": RPCs,
-                    "query": ETHGetLogsRPCProvider.get_query(
-                        fromBlock=start.idx, toBlock=end.idx, address=address, topics=[topics])
-                }
-                f.write(json.dumps(data, indent=4))
+    return records
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
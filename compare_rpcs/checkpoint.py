@@ -0,0 +1,160 @@
+import hashlib
+import json
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+class LeaseLost(Exception):
+    """
+    The claimed chunk was handed to another worker, as this one did not renew its lease in time.
+    """
+
+
+class Checkpoint:
+    """
+    Progress of a comparison, stored in a SQLite file so that it survives crashes and can be shared by several
+    worker processes. The block span is split into chunks, which workers claim one at a time. A claim is a lease:
+    a chunk whose worker stopped reporting progress for `lease` seconds (e.g. a preempted machine) is handed to
+    the next worker asking for one, which resumes it from the last completed block. A worker restarted on the same
+    machine with the same index takes its chunk back right away. A worker whose chunk was handed over is told so
+    the next time it renews its lease or records progress.
+    Comparisons are identified by their endpoints, query and block span, so that unrelated scans can share a file.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        scan: dict,
+        from_block: int,
+        to_block: int,
+        chunk_size: int = 100_000,
+        worker: int = 0,
+        lease: float = 600,
+    ):
+        self.path = Path(path)
+        self.scan = hashlib.sha256(json.dumps(scan, sort_keys=True).encode()).hexdigest()
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{worker}"
+        self.chunk: Optional[int] = None  # start of the claimed chunk
+        self.released: set[int] = set()  # chunks given up by this worker, not claimed again
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS chunks (
+                scan TEXT NOT NULL,
+                start INTEGER NOT NULL,
+                end INTEGER NOT NULL,
+                done INTEGER NOT NULL,
+                owner TEXT,
+                heartbeat REAL,
+                PRIMARY KEY (scan, start)
+            )"""
+        )
+
+        # the first worker splits the span, the others reuse its chunks
+        with self._transaction():
+            if self._db.execute("SELECT 1 FROM chunks WHERE scan = ? LIMIT 1", (self.scan,)).fetchone() is None:
+                self._db.executemany(
+                    "INSERT INTO chunks VALUES (?, ?, ?, ?, NULL, NULL)",
+                    [
+                        (self.scan, start, min(start + chunk_size - 1, to_block), start - 1)
+                        for start in range(from_block, to_block + 1, chunk_size)
+                    ],
+                )
+
+    @contextmanager
+    def _transaction(self):
+        # take the write lock right away, so that concurrent workers never claim the same chunk
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def claim(self) -> Optional[tuple[int, int]]:
+        """
+        Claims the first chunk not completed nor leased by another worker.
+        :return: The blocks of the chunk left to compare, or None if there is none.
+        """
+        now = time.time()
+        released = ", ".join("?" * len(self.released))
+
+        with self._transaction():
+            row = self._db.execute(
+                f"""SELECT start, end, done FROM chunks
+                WHERE scan = ? AND done < end AND (owner IS NULL OR owner = ? OR heartbeat < ?)
+                AND start NOT IN ({released})
+                ORDER BY start LIMIT 1""",
+                (self.scan, self.owner, now - self.lease, *self.released),
+            ).fetchone()
+
+            if row is None:
+                self.chunk = None
+                return None
+
+            start, end, done = row
+            self._db.execute(
+                "UPDATE chunks SET owner = ?, heartbeat = ? WHERE scan = ? AND start = ?",
+                (self.owner, now, self.scan, start),
+            )
+
+        self.chunk = start
+        return done + 1, end
+
+    def claims(self) -> Iterator[tuple[int, int]]:
+        """
+        Claims chunks until the whole span is compared or leased by other workers.
+        """
+        while (span := self.claim()) is not None:
+            yield span
+
+    def _update(self, assignments: str, params: tuple):
+        cursor = self._db.execute(
+            f"UPDATE chunks SET {assignments} WHERE scan = ? AND start = ? AND owner = ?",
+            (*params, self.scan, self.chunk, self.owner),
+        )
+        if cursor.rowcount == 0:
+            chunk, self.chunk = self.chunk, None
+            raise LeaseLost(f"Chunk starting at block {chunk} was handed to another worker")
+
+    def heartbeat(self):
+        """
+        Renews the lease on the claimed chunk, without recording progress.
+        :raises LeaseLost: If the chunk was handed to another worker.
+        """
+        self._update("heartbeat = ?", (time.time(),))
+
+    def advance(self, block: int):
+        """
+        Records that the claimed chunk is compared up to the given block (included), renewing the lease.
+        :raises LeaseLost: If the chunk was handed to another worker, in which case nothing is recorded.
+        """
+        self._update("done = MAX(done, ?), heartbeat = ?", (block, time.time()))
+
+    def release(self):
+        """
+        Gives the claimed chunk up (e.g. an endpoint failed), so that another worker or the next run resumes it from
+        the last completed block. This worker does not claim it again.
+        """
+        self._db.execute(
+            "UPDATE chunks SET owner = NULL, heartbeat = NULL WHERE scan = ? AND start = ? AND owner = ?",
+            (self.scan, self.chunk, self.owner),
+        )
+        self.released.add(self.chunk)
+        self.chunk = None
+
+    @property
+    def remaining(self) -> int:
+        """
+        Number of blocks left to compare, by any worker.
+        """
+        query = "SELECT COALESCE(SUM(end - done), 0) FROM chunks WHERE scan = ?"
+        return self._db.execute(query, (self.scan,)).fetchone()[0]
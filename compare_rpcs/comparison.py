@@ -0,0 +1,44 @@
+from typing import Iterable, Iterator
+
+from lib.rpc.entries.log import Log
+from lib.rpc.entries.log_batch import LogRecord
+
+
+def index_logs(logs: Iterable[Log | LogRecord]) -> dict[tuple[int, int, int], Log | LogRecord]:
+    """
+    Indexes logs by their position in the chain, (block number, transaction index, log index).
+    """
+    return {log.key: log for log in logs}
+
+
+def diff_logs(logs: dict[str, Iterable[Log | LogRecord]], reference: str) -> Iterator[dict]:
+    """
+    Compares the logs returned by every endpoint for the same query against the ones of a reference endpoint,
+    in linear time.
+    :param logs: The logs returned by each endpoint.
+    :param reference: The name of the reference endpoint.
+    :return: A record for each log that another endpoint is missing, has in extra, or has with other values.
+    """
+    expected = index_logs(logs[reference])
+
+    for name, values in logs.items():
+        if name == reference:
+            continue
+
+        found = index_logs(values)
+
+        for key, log in expected.items():
+            other = found.get(key)
+            if other is None:
+                yield {"endpoint": name, "kind": "missing", "key": key, "expected": log.as_dict}
+            elif other.content != log.content:
+                yield {
+                    "endpoint": name,
+                    "kind": "mismatched",
+                    "key": key,
+                    "expected": log.as_dict,
+                    "found": other.as_dict,
+                }
+
+        for key in found.keys() - expected.keys():
+            yield {"endpoint": name, "kind": "extra", "key": key, "found": found[key].as_dict}
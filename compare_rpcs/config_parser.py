@@ -23,8 +23,29 @@ def load_config_file(ctx, param, value):
             entry = cfg[rpc_key]
             ctx.default_map[rpc_key] = RPCUrl(entry["name"], entry["url"])
 
+    # Map the list of rpcs to RPCUrl objects
+    if "rpcs" in cfg:
+        ctx.default_map["rpcs"] = [RPCUrl(entry["name"], entry["url"]) for entry in cfg["rpcs"]]
+
     # Any other flat keys can be mapped here if needed
-    for k in ["from_block", "to_block", "output_file", "address", "topics", "block_range"]:
+    for k in [
+        "from_block",
+        "to_block",
+        "output_file",
+        "address",
+        "topics",
+        "block_range",
+        "max_block_range",
+        "target_logs",
+        "max_connections",
+        "batch_size",
+        "max_in_flight",
+        "metrics_port",
+        "checkpoint_file",
+        "store_dir",
+        "chunk_size",
+        "workers",
+    ]:
         if k in cfg:
             ctx.default_map[k] = cfg[k]
 
@@ -1,3 +1,6 @@
+import re
+from urllib.parse import urlparse
+
 import click
 
 
@@ -17,8 +20,10 @@ class RPCUrlParamType(click.ParamType):
         if isinstance(value, RPCUrl):
             return value  # Already parsed from config
         if isinstance(value, str):
-            # If CLI passes a plain URL, give it a default name
-            return RPCUrl(name="custom", url=value)
+            if match := re.fullmatch(r"([\w.-]+)=(.+)", value):
+                return RPCUrl(name=match.group(1), url=match.group(2))
+            # If CLI passes a plain URL, name it after its host
+            return RPCUrl(name=urlparse(value).netloc or value, url=value)
         self.fail(f"Invalid RPC URL: {value}", param, ctx)
 
 
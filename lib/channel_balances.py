@@ -0,0 +1,83 @@
+from typing import Iterable
+
+import numpy as np
+
+from .hoprd_api.channelstatus import ChannelStatus
+
+
+def group_sum(groups: np.ndarray, values: np.ndarray, size: int) -> list[int]:
+    """
+    Exact per-group sums of integers of any size, such as balances in wei.
+    :param groups: The group index of each value.
+    :param values: The values to sum, as an object array of Python integers.
+    :param size: The number of groups.
+    :return: The sum of each group.
+    """
+    totals = np.zeros(size, dtype=object)
+    np.add.at(totals, groups, values)
+    return totals.tolist()
+
+
+class ChannelBalances:
+    """
+    Per-node totals of the channels of a topology. Channel endpoints are given as node indexes, and balances are
+    grouped per node with NumPy rather than with one dict update per channel. Balances are kept as exact
+    integers (wei), so that the totals do not depend on the order of the channels.
+    """
+
+    def __init__(
+        self,
+        peer_ids: list[str],
+        addresses: list[str],
+        sources: np.ndarray,
+        destinations: np.ndarray,
+        balances: np.ndarray,
+    ):
+        """
+        :param peer_ids: The peer id of each node.
+        :param addresses: The address of each node.
+        :param sources: The index of the source node of each channel.
+        :param destinations: The index of the destination node of each channel.
+        :param balances: The balance of each channel, as an object array of Python integers.
+        """
+        size = len(peer_ids)
+
+        self.peer_ids = peer_ids
+        self.addresses = addresses
+        self.outgoing = group_sum(sources, balances, size)
+        self.incoming = group_sum(destinations, balances, size)
+        self.outgoing_channels = np.bincount(sources, minlength=size)
+        self.incoming_channels = np.bincount(destinations, minlength=size)
+
+    @classmethod
+    def fromChannels(cls, channels: Iterable) -> "ChannelBalances":
+        """
+        Aggregates the open channels among objects exposing `source_peer_id`, `source_address`,
+        `destination_peer_id`, `destination_address`, `balance` and `status` (a `ChannelStatus` or its string
+        value). Nodes are indexed in order of first appearance.
+        """
+        channels = [c for c in channels if c.status is ChannelStatus.Open or c.status == "Open"]
+        count = len(channels)
+
+        # endpoints interleaved, sources at even positions
+        peers = [None] * (2 * count)
+        peers[0::2] = [c.source_peer_id for c in channels]
+        peers[1::2] = [c.destination_peer_id for c in channels]
+
+        # each peer id is mapped to the position of its first appearance, which are then ranked into node indexes
+        first_seen: dict[str, int] = {}
+        positions = np.fromiter(map(first_seen.setdefault, peers, range(2 * count)), np.int64, 2 * count)
+        first, nodes = np.unique(positions, return_inverse=True)
+
+        peer_ids = [peers[pos] for pos in first.tolist()]
+        addresses = [
+            channels[pos // 2].destination_address if pos % 2 else channels[pos // 2].source_address
+            for pos in first.tolist()
+        ]
+
+        balances = np.fromiter((int(c.balance) for c in channels), dtype=object, count=count)
+
+        return cls(peer_ids, addresses, nodes[0::2], nodes[1::2], balances)
+
+    def __len__(self) -> int:
+        return len(self.peer_ids)
@@ -1,3 +1,4 @@
-from .hoprd_api import HoprdAPI
+from .fleet import HoprdFleet
+from .hoprd_api import HoprdAPI, StreamError
 
-__all__ = ["HoprdAPI"]
+__all__ = ["HoprdAPI", "HoprdFleet", "StreamError"]
@@ -0,0 +1,92 @@
+import asyncio
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import aiohttp
+
+from .hoprd_api import HoprdAPI
+from .request_objects import GetChannelsBody
+from .response_objects import Balances, Channels
+
+T = TypeVar("T")
+
+
+class HoprdFleet:
+    """
+    Client for a group of HOPRd nodes, calling all of them concurrently through a shared session. Nodes that fail
+    to answer are reported and left out of the results, so that a single unreachable node does not fail the call.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        token: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_in_flight: Optional[int] = None,
+    ):
+        """
+        :param urls: The API hosts of the nodes.
+        :param token: The API token, shared by all nodes.
+        :param session: Session to send the calls through. Created on first use if not provided.
+        :param max_in_flight: Max number of calls to each node awaiting a response at once.
+        """
+        self.urls = urls
+        self.token = token
+        self.max_in_flight = max_in_flight
+        self._session = session
+        self._owns_session = session is None
+        self._apis: Optional[list[HoprdAPI]] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @property
+    def apis(self) -> list[HoprdAPI]:
+        """
+        The clients of each node, sharing the fleet session. Created on first use.
+        """
+        if self._apis is None:
+            if self._session is None:
+                self._session = HoprdAPI.create_session()
+            self._apis = [HoprdAPI(url, self.token, self._session, self.max_in_flight) for url in self.urls]
+        return self._apis
+
+    async def close(self):
+        """
+        Closes the session, if it was created by the fleet.
+        """
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._apis = None
+
+    async def gather(self, call: Callable[[HoprdAPI], Awaitable[Optional[T]]]) -> dict[str, T]:
+        """
+        Calls every node concurrently.
+        :param call: Coroutine function calling a node, e.g. `lambda api: api.balances()`.
+        :return: The result of each node that answered, by node host.
+        """
+        results = await asyncio.gather(*[call(api) for api in self.apis], return_exceptions=True)
+
+        answers: dict[str, T] = {}
+        for api, result in zip(self.apis, results):
+            if isinstance(result, Exception) or result is None:
+                print(f"No answer from {api.host}{f': {result}' if result is not None else ''}")
+                continue
+            answers[api.host] = result
+
+        return answers
+
+    async def channels(self, params: Optional[GetChannelsBody] = None) -> Channels:
+        """
+        Returns the channels of all nodes, deduplicated by channel id.
+        """
+        return Channels.merge((await self.gather(lambda api: api.channels(params))).values())
+
+    async def balances(self) -> dict[str, Balances]:
+        """
+        Returns the balances of each node, by node host.
+        """
+        return await self.gather(lambda api: api.balances())
@@ -1,10 +1,11 @@
 import asyncio
 import json
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 import aiohttp
 
 from .http_method import HTTPMethod
+from .json_stream import iter_array_items
 from .request_objects import (
     ApiRequestObject,
     FundChannelBody,
@@ -17,6 +18,7 @@ from .request_objects import (
 from .response_objects import (
     Addresses,
     Balances,
+    ChannelRecord,
     Channels,
     Configuration,
     ConnectedPeer,
@@ -30,15 +32,88 @@ from .response_objects import (
 MESSAGE_TAG = 0x1245
 
 
+class StreamError(Exception):
+    """
+    A streamed call failed, or its response was cut: the items yielded so far are incomplete.
+    """
+
+
 class HoprdAPI:
     """
     HOPRd API helper to handle exceptions and logging.
+    Calls go through a connection-pooled session, which can be shared among several instances (e.g. one per node).
+    Use the instance as an async context manager, or call `close`, to release the session.
     """
 
-    def __init__(self, url: str, token: str):
+    connection_limit: int = 100
+    connection_limit_per_host: int = 10
+    keepalive_timeout: float = 30
+
+    def __init__(
+        self,
+        url: str,
+        token: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_in_flight: Optional[int] = None,
+    ):
+        """
+        :param url: The node API host.
+        :param token: The node API token.
+        :param session: Session to send the calls through. Created on first use if not provided.
+        :param max_in_flight: Max number of calls to the node awaiting a response at once. Unbounded if not set.
+        """
         self.host = url
-        self.headers = {"Authorization": f"Bearer {token}"}
+        self.headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
         self.prefix = "/api/v3/"
+        self._session = session
+        self._owns_session = session is None
+        self._semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight is not None else None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @classmethod
+    def create_session(
+        cls,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+    ) -> aiohttp.ClientSession:
+        """
+        Creates a connection-pooled session, that can be shared among several instances.
+        :param limit: Max number of simultaneous connections. Defaults to `connection_limit`.
+        :param limit_per_host: Max number of simultaneous connections to the same node.
+        Defaults to `connection_limit_per_host`.
+        :param keepalive_timeout: Time (in seconds) an idle connection is kept open. Defaults to `keepalive_timeout`.
+        :return: The session. The caller is responsible for closing it.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=cls.connection_limit if limit is None else limit,
+            limit_per_host=cls.connection_limit_per_host if limit_per_host is None else limit_per_host,
+            keepalive_timeout=cls.keepalive_timeout if keepalive_timeout is None else keepalive_timeout,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The session used to call the API. Created on first use if none was provided.
+        """
+        if self._session is None or self._session.closed:
+            self._session = self.create_session()
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """
+        Closes the session, if it was created by the instance.
+        """
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
     @property
     def log_prefix(cls) -> str:
@@ -51,19 +126,17 @@ class HoprdAPI:
         data: ApiRequestObject = None,
     ):
         try:
-            headers = {"Content-Type": "application/json"}
-            async with aiohttp.ClientSession(headers=self.headers) as s:
-                async with getattr(s, method.value)(
-                    url=f"{self.host}{self.prefix}{endpoint}",
-                    json={} if data is None else data.as_dict,
-                    headers=headers,
-                ) as res:
-                    try:
-                        data = await res.json()
-                    except Exception:
-                        data = await res.text()
-
-                    return (res.status // 200) == 1, data
+            async with getattr(self.session, method.value)(
+                url=f"{self.host}{self.prefix}{endpoint}",
+                json={} if data is None else data.as_dict,
+                headers=self.headers,
+            ) as res:
+                try:
+                    data = await res.json()
+                except Exception:
+                    data = await res.text()
+
+                return (res.status // 200) == 1, data
 
         except OSError as e:
             print(f"OSError calling {method.value} {endpoint}: {e}")
@@ -82,10 +155,11 @@ class HoprdAPI:
         timeout: int = 60,
     ) -> tuple[bool, Optional[object]]:
         try:
-            return await asyncio.wait_for(
-                asyncio.create_task(self.__call(method, endpoint, data)),
-                timeout=timeout,
-            )
+            if self._semaphore is None:
+                return await asyncio.wait_for(self.__call(method, endpoint, data), timeout=timeout)
+
+            async with self._semaphore:
+                return await asyncio.wait_for(self.__call(method, endpoint, data), timeout=timeout)
 
         except asyncio.TimeoutError:
             print(f"TimeoutError calling {method} {endpoint}")
@@ -149,6 +223,54 @@ class HoprdAPI:
         )
         return Channels(response) if is_ok else None
 
+    async def stream_channels(
+        self,
+        params: Optional[GetChannelsBody] = None,
+        kinds: tuple[str, ...] = ("all",),
+        timeout: int = 60,
+    ) -> AsyncIterator[ChannelRecord]:
+        """
+        Streams channels, parsing the response while it is received. Meant for the full topology, which can be too
+        large to be loaded and converted at once.
+        :param: params: GetChannelsBody, defaults to the full topology
+        :param: kinds: the lists of channels to stream, among "all", "incoming" and "outgoing"
+        :param: timeout: max time (in seconds) to receive the whole response
+        :return: channels: ChannelRecord, yielded as soon as they are parsed
+        :raises StreamError: if the call fails or the response is cut, so that a partial topology is never taken
+        for the whole one
+        """
+        if params is None:
+            params = GetChannelsBody("true", "false")
+
+        endpoint = f"channels?{params.as_header_string}"
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+
+        try:
+            async with self.session.get(
+                f"{self.host}{self.prefix}{endpoint}", headers=self.headers, timeout=client_timeout
+            ) as res:
+                if res.status // 200 != 1:
+                    print(f"Error calling GET {endpoint}: status {res.status}")
+                    raise StreamError(f"GET {endpoint} returned status {res.status}")
+
+                async for _, channel in iter_array_items(res.content.iter_chunked(64 * 1024), set(kinds)):
+                    yield ChannelRecord.fromDict(channel)
+
+        except asyncio.TimeoutError as e:
+            print(f"TimeoutError calling GET {endpoint}")
+            raise StreamError(f"GET {endpoint} timed out after {timeout}s") from e
+
+        except (OSError, aiohttp.ClientError, ValueError) as e:
+            print(f"Exception calling GET {endpoint}. error is: {e}")
+            raise StreamError(f"GET {endpoint} failed: {e}") from e
+
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
     async def peers(
         self,
         quality: float = 0.5,
@@ -0,0 +1,135 @@
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Iterator
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# characters a number may continue with, in the next chunk
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*")
+
+
+class JSONArrayStream:
+    """
+    Incremental parser for a JSON object whose interesting values are arrays, e.g. `{"all": [...], ...}`.
+    Text is fed chunk by chunk, and the items of the arrays named in `keys` are returned as soon as they are
+    complete. Only one item at a time is ever decoded, so the memory used does not depend on the array sizes.
+    The items of the other arrays are dropped one at a time the same way, other values are parsed whole and dropped.
+    """
+
+    def __init__(self, keys: set[str]):
+        self.keys = keys
+
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._key: str = None
+
+    def _skip_whitespace(self):
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+
+    def _decode(self, final: bool) -> tuple[bool, Any]:
+        """
+        Decodes the value at the current position, if it is complete.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            return False, None
+
+        # a number at the end of the buffer may continue in the next chunk (e.g. `1.` followed by `5`)
+        if (
+            not final
+            and self._buffer[end - 1] in "0123456789"
+            and _NUMBER_TAIL.match(self._buffer, end).end() == len(self._buffer)
+        ):
+            return False, None
+
+        self._pos = end
+        return True, value
+
+    def feed(self, text: str, final: bool = False) -> Iterator[tuple[str, Any]]:
+        """
+        Parses a chunk of text.
+        :param text: The chunk, following the previous ones.
+        :param final: Whether this is the last chunk.
+        :return: The (array name, item) pairs completed by this chunk.
+        """
+        self._buffer = self._buffer[self._pos :] + text
+        self._pos = 0
+
+        while True:
+            self._skip_whitespace()
+            if self._pos == len(self._buffer):
+                break
+
+            char = self._buffer[self._pos]
+
+            if self._state == "start":
+                if char != "{":
+                    raise ValueError(f"Expected a JSON object, got {char!r}")
+                self._pos += 1
+                self._state = "key"
+
+            elif self._state == "key":
+                if char in ",}":
+                    self._pos += 1
+                    self._state = "end" if char == "}" else "key"
+                    continue
+
+                complete, self._key = self._decode(final)
+                if not complete:
+                    break
+                self._state = "colon"
+
+            elif self._state == "colon":
+                if char != ":":
+                    raise ValueError(f"Expected ':', got {char!r}")
+                self._pos += 1
+                self._state = "value"
+
+            elif self._state == "value":
+                if char == "[":
+                    self._pos += 1
+                    self._state = "items"
+                    continue
+
+                complete, _ = self._decode(final)
+                if not complete:
+                    break
+                self._state = "key"
+
+            elif self._state == "items":
+                if char in ",]":
+                    self._pos += 1
+                    self._state = "key" if char == "]" else "items"
+                    continue
+
+                complete, item = self._decode(final)
+                if not complete:
+                    break
+                if self._key in self.keys:
+                    yield self._key, item
+
+            else:
+                raise ValueError(f"Unexpected data after the JSON object: {char!r}")
+
+        if final and self._state != "end":
+            raise ValueError("Incomplete JSON object")
+
+
+async def iter_array_items(chunks: AsyncIterator[bytes], keys: set[str]) -> AsyncIterator[tuple[str, Any]]:
+    """
+    Streams the items of the arrays named in `keys`, from a JSON object received as UTF-8 encoded chunks.
+    """
+    stream = JSONArrayStream(keys)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    async for chunk in chunks:
+        for item in stream.feed(decoder.decode(chunk)):
+            yield item
+
+    for item in stream.feed(decoder.decode(b"", final=True), final=True):
+        yield item
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Callable, Iterable, NamedTuple
 
 from .channelstatus import ChannelStatus
 
@@ -22,23 +22,78 @@ def _convert(value: Any):
 
     return value
 
+def _to_int(value: Any):
+    """
+    Converts a decimal string (e.g. a balance in wei) to an exact integer, without going through a float.
+    """
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return _convert(value)
+
+def _keep(value: Any):
+    return value
+
 def try_to_lower(value: Any):
     if isinstance(value, str):
         return value.lower()
     return value
 
-class ApiResponseObject:
-    def __init__(self, data: dict):
-        for key, value in self.keys.items():
-            v = data
-            for subkey in value.split("/"):
-                v = v.get(subkey, None)
-                if v is None:
-                    continue
+def _get_path(data: dict, path: tuple[str, ...]):
+    for subkey in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(subkey)
+    return data
+
+
+def _compile_init(cls: type) -> Callable:
+    """
+    Generates the `__init__` of a response class, reading each field of `keys` from the JSON object and
+    converting it with the converter declared in `converters` (`_convert` by default). Paths are split and
+    converters resolved once here rather than for every parsed object.
+    """
+    lines = ["def __init__(self, data):", "    get = data.get"]
+    namespace = {"_get_path": _get_path}
+
+    for idx, (attr, path) in enumerate(cls.keys.items()):
+        segments = tuple(path.split("/"))
+        value = f"get({segments[0]!r})" if len(segments) == 1 else f"_get_path(data, {segments!r})"
+        convert = cls.converters.get(attr, _convert)
+
+        if convert is _keep:
+            lines.append(f"    self.{attr} = {value}")
+        else:
+            namespace[f"convert_{idx}"] = convert
+            lines.append(f"    value = {value}")
+            lines.append(f"    self.{attr} = None if value is None else convert_{idx}(value)")
+
+    lines.append("    self.post_init()")
+
+    exec("\n".join(lines), namespace)
+    return namespace["__init__"]
+
+
+class _ApiResponseObjectType(type):
+    """
+    Metaclass of the response classes: declares their fields as `__slots__` and compiles their `__init__`.
+    """
+
+    def __new__(mcs, name: str, bases: tuple, namespace: dict):
+        if "keys" in namespace:
+            inherited = {key for base in bases for key in getattr(base, "keys", {})}
+            namespace.setdefault("__slots__", tuple(key for key in namespace["keys"] if key not in inherited))
+        else:
+            namespace.setdefault("__slots__", ())
 
-            setattr(self, key, _convert(v))
+        cls = super().__new__(mcs, name, bases, namespace)
 
-        self.post_init()
+        if hasattr(cls, "keys"):
+            cls.__init__ = _compile_init(cls)
+        return cls
+
+
+class ApiResponseObject(metaclass=_ApiResponseObjectType):
+    converters: dict[str, Callable] = {}
 
     def post_init(self):
         pass
@@ -52,7 +107,7 @@ class ApiResponseObject:
         return {key: getattr(self, key) for key in self.keys.keys()}
 
     def __str__(self):
-        return str(self.__dict__)
+        return str(self.as_dict)
 
     def __repr__(self):
         return str(self)
@@ -78,17 +133,13 @@ class Balances(ApiResponseObject):
 
 class Infos(ApiResponseObject):
     keys = {"hopr_node_safe": "hoprNodeSafe"}
-
-    def post_init(self):
-        self.hopr_node_safe = try_to_lower(self.hopr_node_safe)
+    converters = {"hopr_node_safe": try_to_lower}
 
 
 class ConnectedPeer(ApiResponseObject):
     keys = {"address": "peerAddress",
             "peer_id": "peerId", "version": "reportedVersion"}
-
-    def post_init(self):
-        self.address = try_to_lower(self.address)
+    converters = {"address": try_to_lower}
 
 
 class Channel(ApiResponseObject):
@@ -101,13 +152,43 @@ class Channel(ApiResponseObject):
         "source_peer_id": "sourcePeerId",
         "status": "status",
     }
+    converters = {
+        "balance": _to_int,
+        "id": _keep,
+        "destination_address": try_to_lower,
+        "destination_peer_id": _keep,
+        "source_address": try_to_lower,
+        "source_peer_id": _keep,
+        "status": ChannelStatus.fromString,
+    }
+
+
+class ChannelRecord(NamedTuple):
+    """
+    Compact, immutable version of `Channel`, used when streaming large channel lists. The balance is kept as an
+    exact integer (wei).
+    """
+
+    balance: int
+    id: str
+    destination_address: str
+    destination_peer_id: str
+    source_address: str
+    source_peer_id: str
+    status: ChannelStatus
+
+    @classmethod
+    def fromDict(cls, data: dict) -> "ChannelRecord":
+        return cls(
+            _to_int(data.get("balance")),
+            data.get("channelId"),
+            try_to_lower(data.get("destinationAddress")),
+            data.get("destinationPeerId"),
+            try_to_lower(data.get("sourceAddress")),
+            data.get("sourcePeerId"),
+            ChannelStatus.fromString(data.get("status")),
+        )
 
-    def post_init(self):
-        self.status = ChannelStatus.fromString(self.status)
-        
-        self.destination_address = try_to_lower(self.destination_address)
-        self.source_address = try_to_lower(self.source_address)
-        
 
 class TicketPrice(ApiResponseObject):
     keys = {"value": "price"}
@@ -141,6 +222,23 @@ class Channels:
         self.incoming = [Channel(channel) for channel in data.get("incoming", [])]
         self.outgoing = [Channel(channel) for channel in data.get("outgoing", [])]
 
+    @classmethod
+    def merge(cls, channels: Iterable["Channels"]) -> "Channels":
+        """
+        Merges the channels returned by several nodes, keeping a single instance of each channel id.
+        """
+        channels = list(channels)
+        merged = cls({})
+
+        for attr in ["all", "incoming", "outgoing"]:
+            unique: dict[str, Channel] = {}
+            for item in channels:
+                for channel in getattr(item, attr):
+                    unique.setdefault(channel.id, channel)
+            setattr(merged, attr, list(unique.values()))
+
+        return merged
+
     def __str__(self):
         return str(self.__dict__)
 
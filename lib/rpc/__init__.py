@@ -1,6 +1,15 @@
+from .batcher import RPCBatcher
 from .query_provider import RPCQueryProvider
+from .range_scheduler import AdaptiveRangeScheduler
+from .retry import CircuitBreaker, RetryPolicy
+from .transport import RPCTransport
 
 __all__ = [
+    "AdaptiveRangeScheduler",
+    "CircuitBreaker",
     "LogsProvider",
+    "RPCBatcher",
     "RPCQueryProvider",
+    "RPCTransport",
+    "RetryPolicy",
 ]
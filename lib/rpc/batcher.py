@@ -0,0 +1,84 @@
+import asyncio
+import itertools
+from typing import Any, Awaitable, Callable
+
+
+class RPCBatcher:
+    """
+    Coalesces JSON-RPC requests into batch payloads (JSON arrays). Requests are given unique ids, and the
+    responses are dispatched back to their callers by id. A batch is sent as soon as it holds `max_size`
+    requests, or `max_delay` seconds after its first request.
+    """
+
+    def __init__(
+        self,
+        post: Callable[[list[dict]], Awaitable[tuple[Any, int]]],
+        max_size: int = 50,
+        max_delay: float = 0.005,
+    ):
+        self.post = post
+        self.max_size = max_size
+        self.max_delay = max_delay
+
+        self._ids = itertools.count(1)
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    async def submit(self, payload: dict) -> tuple[dict, int]:
+        """
+        Queues a JSON-RPC request for the next batch.
+        :param payload: The JSON-RPC request object.
+        :return: The matching JSON-RPC response object, with the original id, and the HTTP status of the batch.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self._pending.append(({**payload, "id": next(self._ids)}, future))
+
+        if len(self._pending) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self.flush)
+
+        response, status = await future
+        return {**response, "id": payload.get("id")}, status
+
+    def flush(self):
+        """
+        Sends the pending requests right away.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+
+        task = asyncio.ensure_future(self._send(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, batch: list[tuple[dict, asyncio.Future]]):
+        try:
+            responses, status = await self.post([request for request, _ in batch])
+        except Exception as err:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(err)
+            return
+
+        # a node rejecting the whole batch answers with a single error object
+        if not isinstance(responses, list):
+            responses = [{**responses, "id": request["id"]} for request, _ in batch]
+
+        by_id = {response.get("id"): response for response in responses if isinstance(response, dict)}
+
+        for request, future in batch:
+            if future.done():  # caller gave up (e.g. timed out)
+                continue
+
+            response = by_id.get(request["id"], {"error": {"message": "No response in batch for this request"}})
+            future.set_result((response, status))
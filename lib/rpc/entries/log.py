@@ -21,3 +21,17 @@ class Log(JsonResponse):
     @property
     def as_dict(self) -> dict:
         return {key: str(getattr(self, key)) for key in [f.name for f in fields(self)]}
+
+    @property
+    def key(self) -> tuple[int, int, int]:
+        """
+        Position of the log in the chain, unique among the logs of a chain.
+        """
+        return self.block_number.idx, self.transaction_index.value, self.log_index.value
+
+    @property
+    def content(self) -> tuple:
+        """
+        Values of the log that must match between nodes, in a hashable form.
+        """
+        return self.address, self.block_hash, self.data, self.removed, tuple(self.topics), self.transaction_hash
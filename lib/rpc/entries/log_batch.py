@@ -0,0 +1,124 @@
+from typing import Iterator
+
+import numpy as np
+
+from .log import Log
+
+
+class LogRecord:
+    """
+    Lightweight view on a raw log, exposing the same values as `Log`. The position of the log is parsed once,
+    the other fields are read from the raw JSON object when accessed.
+    """
+
+    __slots__ = ("raw", "key")
+
+    def __init__(self, raw: dict, key: tuple[int, int, int]):
+        self.raw = raw
+        self.key = key
+
+    @property
+    def address(self) -> str:
+        return self.raw["address"]
+
+    @property
+    def block_hash(self) -> str:
+        return self.raw["blockHash"]
+
+    @property
+    def block_number(self) -> int:
+        return self.key[0]
+
+    @property
+    def data(self) -> str:
+        return self.raw["data"]
+
+    @property
+    def log_index(self) -> int:
+        return self.key[2]
+
+    @property
+    def removed(self) -> bool:
+        return self.raw["removed"]
+
+    @property
+    def topics(self) -> list[str]:
+        return self.raw["topics"]
+
+    @property
+    def transaction_hash(self) -> str:
+        return self.raw["transactionHash"]
+
+    @property
+    def transaction_index(self) -> int:
+        return self.key[1]
+
+    @property
+    def content(self) -> tuple:
+        raw = self.raw
+        return (
+            raw["address"],
+            raw["blockHash"],
+            raw["data"],
+            raw["removed"],
+            tuple(raw["topics"]),
+            raw["transactionHash"],
+        )
+
+    @property
+    def as_dict(self) -> dict:
+        raw = self.raw
+        return {
+            "address": raw["address"],
+            "block_hash": raw["blockHash"],
+            "block_number": hex(self.key[0]),
+            "data": raw["data"],
+            "log_index": hex(self.key[2]),
+            "removed": str(raw["removed"]),
+            "topics": str(raw["topics"]),
+            "transaction_hash": raw["transactionHash"],
+            "transaction_index": hex(self.key[1]),
+        }
+
+
+class LogBatch:
+    """
+    Logs returned by a `eth_getLogs` call, stored column-wise. Block numbers, transaction and log indexes are
+    parsed once into NumPy arrays for vectorized access, while the raw JSON objects are kept as is and only
+    wrapped into `LogRecord` views when iterated over.
+    """
+
+    __slots__ = ("raw", "block_numbers", "transaction_indexes", "log_indexes", "_records")
+
+    def __init__(self, raw: list[dict]):
+        self.raw = raw
+        self.block_numbers = np.fromiter((int(item["blockNumber"], 16) for item in raw), np.int64, len(raw))
+        self.transaction_indexes = np.fromiter((int(item["transactionIndex"], 16) for item in raw), np.int64, len(raw))
+        self.log_indexes = np.fromiter((int(item["logIndex"], 16) for item in raw), np.int64, len(raw))
+        self._records: list[LogRecord] = None
+
+    @property
+    def records(self) -> list[LogRecord]:
+        if self._records is None:
+            keys = zip(self.block_numbers.tolist(), self.transaction_indexes.tolist(), self.log_indexes.tolist())
+            self._records = [LogRecord(raw, key) for raw, key in zip(self.raw, keys)]
+        return self._records
+
+    @property
+    def positions(self) -> np.ndarray:
+        """
+        The (block number, transaction index, log index) of every log, as a (n, 3) array.
+        """
+        return np.column_stack((self.block_numbers, self.transaction_indexes, self.log_indexes))
+
+    def to_logs(self) -> list[Log]:
+        return [Log(item) for item in self.raw]
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        return iter(self.records)
+
+    def __getitem__(self, index: int) -> LogRecord:
+        return self.records[index]
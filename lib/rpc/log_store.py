@@ -0,0 +1,180 @@
+import os
+import shutil
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+
+from .entries.log_batch import LogBatch
+
+MAX_TOPICS: int = 4
+
+
+class LogStore:
+    """
+    Columnar on-disk storage of logs. Logs are appended by block range, buffered, and written as chunks: one
+    folder per chunk, named after its block range, holding one `.npy` file per column. Integer columns are stored
+    as such, addresses and hashes as fixed-width byte rows, and the variable-length `data` as a flat byte array
+    along with offsets. Columns are memory-mapped when read, so that scanning them needs no parsing.
+    """
+
+    columns: tuple[str, ...] = (
+        "block_number",
+        "transaction_index",
+        "log_index",
+        "removed",
+        "address",
+        "block_hash",
+        "transaction_hash",
+        "topics",
+        "topic_count",
+        "data",
+        "data_offsets",
+    )
+
+    def __init__(self, path: Path, buffer_size: int = 100_000):
+        self.path = Path(path)
+        self.buffer_size = buffer_size
+
+        self._buffer: list[dict] = []
+        self._bounds: Optional[tuple[int, int]] = None
+
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    def append(self, batch: LogBatch, start: int, end: int) -> bool:
+        """
+        Appends the logs of a block range. Ranges must be appended in block order.
+        :return: Whether the buffer got written to disk.
+        """
+        self._buffer.extend(batch.raw)
+        self._bounds = (start, end) if self._bounds is None else (self._bounds[0], end)
+
+        if len(self._buffer) < self.buffer_size:
+            return False
+
+        self.flush()
+        return True
+
+    def flush(self):
+        """
+        Writes the buffered logs as a new chunk. The chunk is written to a temporary folder then renamed, so that
+        readers never see it partially written.
+        """
+        if self._bounds is None:
+            return
+
+        buffer, (start, end) = self._buffer, self._bounds
+        self._buffer, self._bounds = [], None
+
+        if not buffer:
+            return
+
+        chunk = self.path / f"{start:012d}-{end:012d}"
+        tmp = self.path / f".{chunk.name}.{os.getpid()}"
+        tmp.mkdir()
+
+        for name, values in encode(LogBatch(buffer)).items():
+            np.save(tmp / f"{name}.npy", values)
+
+        if chunk.exists():  # the range was stored by an interrupted run
+            shutil.rmtree(chunk)
+        tmp.rename(chunk)
+
+    def discard(self):
+        """
+        Drops the buffered logs without writing them, e.g. when their blocks are handed to another writer.
+        """
+        self._buffer, self._bounds = [], None
+
+    def chunks(self) -> list[Path]:
+        """
+        The chunks written so far, in block order.
+        """
+        return sorted(path for path in self.path.iterdir() if path.is_dir() and not path.name.startswith("."))
+
+    def read(self, mmap: bool = True) -> Iterator[dict[str, np.ndarray]]:
+        """
+        Reads the chunks one by one, in block order.
+        :param mmap: Whether to memory-map the columns instead of loading them.
+        :return: The columns of each chunk.
+        """
+        for chunk in self.chunks():
+            yield {name: np.load(chunk / f"{name}.npy", mmap_mode="r" if mmap else None) for name in self.columns}
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        A column over all the chunks. For the `data` column, see `read` and `decode`.
+        """
+        parts = [np.load(chunk / f"{name}.npy", mmap_mode="r") for chunk in self.chunks()]
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    def __len__(self) -> int:
+        return sum(np.load(chunk / "block_number.npy", mmap_mode="r").shape[0] for chunk in self.chunks())
+
+
+def _bytes_column(values: list[str], width: int) -> np.ndarray:
+    content = b"".join(bytes.fromhex(value[2:]) for value in values)
+    return np.frombuffer(content, np.uint8).reshape(len(values), width)
+
+
+def encode(batch: LogBatch) -> dict[str, np.ndarray]:
+    """
+    Converts logs into the columns of a `LogStore`.
+    """
+    raw = batch.raw
+    count = len(raw)
+
+    topics = np.zeros((count, MAX_TOPICS, 32), np.uint8)
+    topic_count = np.fromiter((len(item["topics"]) for item in raw), np.uint8, count)
+    for idx, item in enumerate(raw):
+        if item["topics"]:
+            topics[idx, : len(item["topics"])] = _bytes_column(item["topics"], 32)
+
+    data = [bytes.fromhex(item["data"][2:]) for item in raw]
+    data_offsets = np.zeros(count + 1, np.int64)
+    np.cumsum([len(value) for value in data], out=data_offsets[1:])
+
+    return {
+        "block_number": batch.block_numbers,
+        "transaction_index": batch.transaction_indexes,
+        "log_index": batch.log_indexes,
+        "removed": np.fromiter((item["removed"] for item in raw), np.bool_, count),
+        "address": _bytes_column([item["address"] for item in raw], 20),
+        "block_hash": _bytes_column([item["blockHash"] for item in raw], 32),
+        "transaction_hash": _bytes_column([item["transactionHash"] for item in raw], 32),
+        "topics": topics,
+        "topic_count": topic_count,
+        "data": np.frombuffer(b"".join(data), np.uint8),
+        "data_offsets": data_offsets,
+    }
+
+
+def decode(columns: dict[str, np.ndarray]) -> LogBatch:
+    """
+    Converts the columns of a `LogStore` chunk back into logs, as returned by the node.
+    """
+    offsets = columns["data_offsets"]
+    data = columns["data"]
+    raw = []
+
+    for idx in range(len(columns["block_number"])):
+        topics = columns["topics"][idx, : columns["topic_count"][idx]]
+        raw.append(
+            {
+                "address": "0x" + columns["address"][idx].tobytes().hex(),
+                "blockHash": "0x" + columns["block_hash"][idx].tobytes().hex(),
+                "blockNumber": hex(columns["block_number"][idx]),
+                "data": "0x" + data[offsets[idx] : offsets[idx + 1]].tobytes().hex(),
+                "logIndex": hex(columns["log_index"][idx]),
+                "removed": bool(columns["removed"][idx]),
+                "topics": ["0x" + topic.tobytes().hex() for topic in topics],
+                "transactionHash": "0x" + columns["transaction_hash"][idx].tobytes().hex(),
+                "transactionIndex": hex(columns["transaction_index"][idx]),
+            }
+        )
+
+    return LogBatch(raw)
@@ -0,0 +1,26 @@
+from urllib.parse import urlparse
+
+from prometheus_client import Counter, Gauge
+
+RPC_ATTEMPTS = Counter(
+    "rpc_attempts_total",
+    "JSON-RPC request attempts, by endpoint host and outcome (success, retry, failure, rejected)",
+    ["endpoint", "outcome"],
+)
+RPC_CIRCUIT_STATE = Gauge(
+    "rpc_circuit_state",
+    "State of the circuit breaker of a JSON-RPC endpoint (0: closed, 1: half-open, 2: open)",
+    ["endpoint"],
+)
+RPC_CIRCUIT_OPENED = Counter(
+    "rpc_circuit_opened_total",
+    "Number of times the circuit breaker of a JSON-RPC endpoint opened",
+    ["endpoint"],
+)
+
+
+def endpoint_label(url: str) -> str:
+    """
+    Label identifying an endpoint in metrics. Only the host is kept, as paths and queries often hold API keys.
+    """
+    return urlparse(url).netloc or url
@@ -4,9 +4,11 @@ import sys
 from pathlib import Path
 from typing import Any, Callable, Optional
 
-import aiohttp
-
 from lib.rpc.entries.log import Log
+from lib.rpc.entries.log_batch import LogBatch
+from lib.rpc.metrics import RPC_ATTEMPTS
+from lib.rpc.retry import RetryPolicy
+from lib.rpc.transport import RPCTransport
 
 BLOCK_SIZE: int = 64
 
@@ -17,12 +19,46 @@ class ProviderError(Exception):
     pass
 
 
+class ResultLimitError(ProviderError):
+    """
+    The node refused a query because it matches too many results, or an attempt took too long to be answered.
+    Querying a smaller range may succeed.
+    """
+
+
+class CircuitOpenError(ProviderError):
+    """
+    The endpoint failed too many times in a row, and is not queried until its circuit breaker closes.
+    """
+
+
+# error messages returned by nodes (geth, erigon, nethermind, infura, alchemy...) when a query is too large. They
+# must not match rate limiting ("rate limit exceeded", "too many requests"), which smaller ranges would not help.
+RESULT_LIMIT_MESSAGES: tuple[str, ...] = (
+    "query returned more than",
+    "block range",
+    "range is too large",
+    "range too large",
+    "response size exceeded",
+    "too many logs",
+    "too many results",
+    "max results",
+    "query timeout exceeded",
+)
+
+
 class RPCQueryProvider:
     method: str = ""
     exp_type: Callable = str
+    retry_policy: RetryPolicy = RetryPolicy()
 
-    def __init__(self, url: str):
+    def __init__(
+        self, url: str, transport: Optional[RPCTransport] = None, retry_policy: Optional[RetryPolicy] = None
+    ):
         self.url = url
+        self._transport = transport
+        if retry_policy is not None:
+            self.retry_policy = retry_policy
         self.pwd = Path(sys.modules[self.__class__.__module__].__file__).parent
         self.query = {
             "jsonrpc": "2.0",
@@ -31,6 +67,15 @@ class RPCQueryProvider:
             "id": 1,
         }
 
+    @property
+    def transport(self) -> RPCTransport:
+        """
+        The transport used to reach the endpoint. Defaults to the one shared by all providers for this URL.
+        """
+        if self._transport is None:
+            self._transport = RPCTransport.for_url(self.url)
+        return self._transport
+
     #### PRIVATE METHODS ####
     def _get_query(self, params: Optional[dict]) -> dict:
         if params is not None and params != {}:
@@ -38,28 +83,55 @@ class RPCQueryProvider:
 
         return self.query
 
-    async def _execute(self, params: Optional[dict] = None) -> tuple[dict, dict]:
+    async def _execute(self, params: Optional[dict] = None, timeout: float = 30) -> tuple[dict, int]:
         self._get_query(params)
 
-        while True:
+        policy = self.retry_policy
+        breaker = self.transport.breaker
+        endpoint = breaker.endpoint
+
+        for attempt in range(policy.max_attempts):
+            if not breaker.allow():
+                RPC_ATTEMPTS.labels(endpoint, "rejected").inc()
+                raise CircuitOpenError(f"Circuit open for {endpoint}, skipping request")
+
             try:
-                async with (
-                    aiohttp.ClientSession() as session,
-                    session.post(self.url, json=self.query) as response,
-                ):  
-                    try:
-                        return await response.json(), response.status
-                    except Exception as err:    
-                        logger.error(f"Error parsing response: {str(err)}")
-
-            except TimeoutError as err:
-                logger.error(f"Timeout error : {str(err)}")
-                await asyncio.sleep(0.2)  # Retry after a short delay
+                async with asyncio.timeout(timeout) as deadline:
+                    result, status = await self.transport.request(self.query)
             except Exception as err:
-                logger.error(f"Unknown error {str(err)}")
-                await asyncio.sleep(0.2)  # Retry after a short delay
+                if isinstance(err, TimeoutError) and deadline.expired():
+                    # the query itself is too slow to answer (e.g. too many logs), retrying it as is would not help
+                    breaker.record_failure()
+                    RPC_ATTEMPTS.labels(endpoint, "failure").inc()
+                    raise ResultLimitError(f"Request to {endpoint} timed out after {timeout} seconds") from err
+                if not policy.is_retryable(err):
+                    RPC_ATTEMPTS.labels(endpoint, "failure").inc()
+                    raise ProviderError(f"Error querying {endpoint}: {err}") from err
+                logger.warning(f"Attempt {attempt + 1}/{policy.max_attempts} on {endpoint} failed: {err}")
+            else:
+                if not policy.is_retryable_status(status):
+                    breaker.record_success()
+                    RPC_ATTEMPTS.labels(endpoint, "success").inc()
+                    return result, status
+                logger.warning(f"Attempt {attempt + 1}/{policy.max_attempts} on {endpoint} got status {status}")
+
+            breaker.record_failure()
+
+            if attempt + 1 == policy.max_attempts:
+                RPC_ATTEMPTS.labels(endpoint, "failure").inc()
+                break
+
+            RPC_ATTEMPTS.labels(endpoint, "retry").inc()
+            await asyncio.sleep(policy.delay(attempt))
+
+        raise ProviderError(f"Giving up on {endpoint} after {policy.max_attempts} attempts")
 
     def _convert_result(self, result: dict, status: int) -> Any:
+        if isinstance(result.get("error"), dict):
+            message = result["error"].get("message", "Unknown error")
+            if any(pattern in message.lower() for pattern in RESULT_LIMIT_MESSAGES):
+                raise ResultLimitError(f"Query too large: {message}")
+
         if status != 200:
             raise ProviderError(
                 f"Error fetching data: {result.get('error', 'Unknown error')}")
@@ -78,14 +150,14 @@ class RPCQueryProvider:
     def convert_result(self, result: Any) -> Any:
         return result
 
-    async def get(self, timeout: int = 30, **kwargs: Any) -> Any:
-        try:
-            res = await asyncio.wait_for(self._execute(kwargs), timeout)
-        except asyncio.TimeoutError:
-            logger.error(f"Request to {self.url} timed out after {timeout} seconds")
-            return self._convert_result({}, 504)  # HTTP 504 Gateway Timeout
-        else:
-            return self._convert_result(*res)
+    async def get(self, timeout: float = 30, **kwargs: Any) -> Any:
+        """
+        Sends the query, retrying transient failures.
+        :param timeout: Max time (in seconds) for each attempt. An attempt timing out raises `ResultLimitError`.
+        :param kwargs: The query parameters.
+        :raises ProviderError: If the endpoint fails, or `ResultLimitError` if the query is too large.
+        """
+        return self._convert_result(*await self._execute(kwargs, timeout))
 
     @classmethod
     def get_query(cls, **kwargs: Any) -> dict:
@@ -102,6 +174,15 @@ class ETHGetLogsRPCProvider(RPCQueryProvider):
     def convert_result(self, result: list[dict]) -> list[Log]:
         return [Log(item) for item in result]
 
+class ETHGetLogsBatchRPCProvider(ETHGetLogsRPCProvider):
+    """
+    Same as `ETHGetLogsRPCProvider`, but returns the logs as a columnar `LogBatch`, much cheaper to build and
+    compare for large responses.
+    """
+
+    def convert_result(self, result: list[dict]) -> LogBatch:
+        return LogBatch(result)
+
 class Web3ClientVersionRPCProvider(RPCQueryProvider):
     method: str = "web3_clientVersion"
     exp_type: Callable = str
\ No newline at end of file
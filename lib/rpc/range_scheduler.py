@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from .entries.types.block import Block
+from .query_provider import ResultLimitError
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRangeScheduler:
+    """
+    Splits a block range into windows whose size adapts to the density of the results. The window is halved
+    when the node refuses a query (too many results, timeout) or returns more than `target_results`, and
+    doubled when it returns less than half of it. The smallest window refused by the node is remembered, and not
+    tried again until `ceiling_expiry` windows succeeded since the last refusal, so that the window converges for
+    the endpoint without a transient refusal capping it for good. Use one scheduler per endpoint.
+    Several windows can be fetched at once, in which case the next windows are planned with the current size.
+    """
+
+    def __init__(
+        self,
+        initial_range: int = 1_000,
+        min_range: int = 1,
+        max_range: int = 100_000,
+        target_results: int = 1_000,
+        ceiling_expiry: int = 100,
+    ):
+        self.window = initial_range
+        self.min_range = min_range
+        self.max_range = max_range
+        self.target_results = target_results
+        self.ceiling_expiry = ceiling_expiry
+        self.ceiling: Optional[int] = None  # smallest window refused by the node
+        self._successes = 0  # windows succeeded since the last refusal
+
+    def shrink(self):
+        """
+        Halves the window.
+        """
+        self.window = max(self.window // 2, self.min_range)
+
+    def refuse(self, span: int):
+        """
+        Records that the node refused a window, which is not tried again for a while, and shrinks below it.
+        :param span: The number of blocks in the refused window.
+        """
+        self.ceiling = span if self.ceiling is None else min(self.ceiling, span)
+        self._successes = 0
+        self.window = max(min(self.window, span) // 2, self.min_range)
+
+    def grow(self):
+        """
+        Doubles the window, without reaching the smallest refused window.
+        """
+        limit = self.max_range if self.ceiling is None else min(self.max_range, self.ceiling - 1)
+        self.window = max(min(self.window * 2, limit), self.min_range)
+
+    def update(self, count: int):
+        """
+        Adapts the window to the number of results of a successful query.
+        """
+        self._successes += 1
+        if self.ceiling is not None and self._successes >= self.ceiling_expiry:
+            self.ceiling = None
+
+        if count > self.target_results:
+            self.shrink()
+        elif count < self.target_results // 2:
+            self.grow()
+
+    async def scan(
+        self,
+        fetch: Callable[[Block, Block], Awaitable[Any]],
+        from_block: Block,
+        to_block: Block,
+        count: Callable[[Any], Optional[int]] = len,
+        concurrency: int = 1,
+    ) -> AsyncIterator[tuple[Block, Block, Any]]:
+        """
+        Fetches the whole block range, window by window.
+        :param fetch: Coroutine function fetching the results between two blocks (both included). Raises
+        `ResultLimitError` when the range is too large. A window of `min_range` blocks that is still refused is
+        yielded with the error as its results, and the scan goes on.
+        :param from_block: The first block to fetch.
+        :param to_block: The last block to fetch.
+        :param count: Function giving the number of results returned by `fetch`, or None if unknown (e.g. the
+        fetch failed), in which case the window is kept as is.
+        :param concurrency: Max number of windows fetched at once.
+        :return: The bounds of each window along with its results, in block order.
+        """
+        # windows in block order, with their fetching task once started
+        pending: deque[list] = deque()
+        next_start = from_block.idx
+
+        try:
+            while pending or next_start <= to_block.idx:
+                while len(pending) < concurrency and next_start <= to_block.idx:
+                    end = min(next_start + self.window - 1, to_block.idx)
+                    pending.append([next_start, end, None])
+                    next_start = end + 1
+
+                # windows split ahead of those in flight are started first, as the slots free up
+                running = sum(task is not None for _, _, task in pending)
+                for window in pending:
+                    if running >= concurrency:
+                        break
+                    if window[2] is None:
+                        window[2] = asyncio.ensure_future(fetch(Block(window[0]), Block(window[1])))
+                        running += 1
+
+                start, end, task = pending.popleft()
+
+                try:
+                    result = await task
+                except ResultLimitError as err:
+                    if end - start + 1 <= self.min_range:
+                        logger.warning(f"Range {start}-{end} refused ({err}), it cannot be split further")
+                        yield Block(start), Block(end), err
+                        continue
+                    logger.warning(f"Range {start}-{end} refused ({err}), splitting it")
+                    self.refuse(end - start + 1)
+
+                    for split_end in reversed(range(start + self.window - 1, end, self.window)):
+                        pending.appendleft([split_end + 1, min(split_end + self.window, end), None])
+                    pending.appendleft([start, start + self.window - 1, None])
+                    continue
+
+                yield Block(start), Block(end), result
+
+                if (results := count(result)) is not None:
+                    self.update(results)
+        finally:
+            for _, _, task in pending:
+                if task is not None:
+                    task.cancel()
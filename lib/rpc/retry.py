@@ -0,0 +1,107 @@
+import random
+import time
+from enum import Enum
+from typing import Optional
+
+import aiohttp
+
+from .metrics import RPC_CIRCUIT_OPENED, RPC_CIRCUIT_STATE
+
+# HTTP statuses worth retrying: rate limiting and upstream/gateway failures
+RETRYABLE_STATUSES: frozenset[int] = frozenset({408, 429, 500, 502, 503, 504})
+
+
+class RetryPolicy:
+    """
+    Bounded retries with exponential backoff and jitter. The n-th retry waits a random delay between
+    `(1 - jitter)` and 1 times `min(max_backoff, backoff * 2**n)`.
+    """
+
+    def __init__(self, max_attempts: int = 5, backoff: float = 0.2, max_backoff: float = 10, jitter: float = 0.5):
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+
+    def delay(self, attempt: int) -> float:
+        """
+        Time (in seconds) to wait before the given retry, starting from 0.
+        """
+        cap = min(self.max_backoff, self.backoff * 2**attempt)
+        return cap * (1 - self.jitter * random.random())
+
+    @staticmethod
+    def is_retryable(err: Exception) -> bool:
+        """
+        Whether an error is transient: connection failures, timeouts, and gateway errors or rate limiting
+        answered with a non-JSON body. Other errors (e.g. a malformed answer to a valid request) are permanent.
+        """
+        if isinstance(err, aiohttp.ContentTypeError):
+            return err.status in RETRYABLE_STATUSES
+        return isinstance(err, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, TimeoutError))
+
+    @staticmethod
+    def is_retryable_status(status: int) -> bool:
+        return status in RETRYABLE_STATUSES
+
+
+class CircuitState(Enum):
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitBreaker:
+    """
+    Fails fast on an endpoint that keeps failing. After `failure_threshold` consecutive failures, the circuit
+    opens and requests are rejected for `reset_timeout` seconds. A single trial request is then let through
+    (half-open): its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, endpoint: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.failures = 0
+        self.opened_at: float = 0
+        self.trial_at: Optional[float] = None
+        self._set_state(CircuitState.CLOSED)
+
+    def _set_state(self, state: CircuitState):
+        self.state = state
+        RPC_CIRCUIT_STATE.labels(self.endpoint).set(state.value)
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent to the endpoint. In half-open state, this claims the trial request.
+        """
+        now = time.monotonic()
+
+        if self.state is CircuitState.OPEN:
+            if now - self.opened_at < self.reset_timeout:
+                return False
+            self._set_state(CircuitState.HALF_OPEN)
+
+        if self.state is CircuitState.HALF_OPEN:
+            # a trial that never reported back (e.g. cancelled) is given up after `reset_timeout`
+            if self.trial_at is not None and now - self.trial_at < self.reset_timeout:
+                return False
+            self.trial_at = now
+
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.trial_at = None
+        if self.state is not CircuitState.CLOSED:
+            self._set_state(CircuitState.CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_at = None
+        if self.state is CircuitState.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state is not CircuitState.OPEN:
+                RPC_CIRCUIT_OPENED.labels(self.endpoint).inc()
+            self.opened_at = time.monotonic()
+            self._set_state(CircuitState.OPEN)
@@ -0,0 +1,95 @@
+from typing import Any, Optional
+
+import aiohttp
+
+from .batcher import RPCBatcher
+from .metrics import endpoint_label
+from .retry import CircuitBreaker
+
+
+class RPCTransport:
+    """
+    Connection-pooled HTTP transport to a JSON-RPC endpoint. Transports are shared per endpoint URL, so that
+    every provider instance targeting the same node reuses the same keep-alive connections.
+    With a `batch_size` above 1, concurrent requests are coalesced into JSON-RPC batches. Each transport holds
+    the circuit breaker of its endpoint.
+    """
+
+    connection_limit: int = 10
+    keepalive_timeout: float = 30
+    batch_delay: float = 0.005
+    failure_threshold: int = 5
+    reset_timeout: float = 30
+
+    _transports: dict[str, "RPCTransport"] = {}
+
+    def __init__(
+        self,
+        url: str,
+        limit: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        batch_size: int = 1,
+        batch_delay: Optional[float] = None,
+    ):
+        self.url = url
+        self.limit = self.connection_limit if limit is None else limit
+        self.keepalive = self.keepalive_timeout if keepalive_timeout is None else keepalive_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._batcher: Optional[RPCBatcher] = None
+        self.breaker = CircuitBreaker(endpoint_label(url), self.failure_threshold, self.reset_timeout)
+
+        if batch_size > 1:
+            delay = self.batch_delay if batch_delay is None else batch_delay
+            self._batcher = RPCBatcher(self.post, batch_size, delay)
+
+    @classmethod
+    def for_url(cls, url: str, **kwargs) -> "RPCTransport":
+        """
+        Gets the transport shared for an endpoint, creating it if needed.
+        :param url: The endpoint URL.
+        :param kwargs: The transport options (see `__init__`). Only used on creation.
+        """
+        if url not in cls._transports:
+            cls._transports[url] = cls(url, **kwargs)
+        return cls._transports[url]
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit, limit_per_host=self.limit, keepalive_timeout=self.keepalive
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def post(self, payload: Any) -> tuple[Any, int]:
+        """
+        Posts a JSON-RPC payload.
+        :return: The decoded response and the HTTP status.
+        """
+        async with self.session.post(self.url, json=payload) as response:
+            return await response.json(), response.status
+
+    async def request(self, payload: dict) -> tuple[dict, int]:
+        """
+        Sends a single JSON-RPC request, as part of a batch if batching is enabled.
+        :return: The JSON-RPC response object and the HTTP status.
+        """
+        if self._batcher is None:
+            return await self.post(payload)
+
+        return await self._batcher.submit(payload)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    @classmethod
+    async def close_all(cls):
+        """
+        Closes all the shared transports.
+        """
+        for transport in cls._transports.values():
+            await transport.close()
+        cls._transports.clear()
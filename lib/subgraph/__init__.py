@@ -1,4 +1,18 @@
+from .block_pin import BlockPin
+from .cache import ResponseCache
 from .entry import Entry
-from .providers import GraphQLProvider, ProviderError
+from .pagination import Pagination
+from .providers import GraphQLProvider, LastBlockProvider, ProviderError
+from .shards import hex_boundaries, range_boundaries
 
-__all__ = ["Entry", "GraphQLProvider", "ProviderError"]
+__all__ = [
+    "BlockPin",
+    "Entry",
+    "GraphQLProvider",
+    "LastBlockProvider",
+    "Pagination",
+    "ProviderError",
+    "ResponseCache",
+    "hex_boundaries",
+    "range_boundaries",
+]
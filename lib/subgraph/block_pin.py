@@ -0,0 +1,37 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+
+class BlockPin:
+    """
+    Block that providers pin their queries to (`block: {number: N}`), so that every page of every query sharing
+    the pin reflects the same state, whatever the indexer progress in the meantime.
+    If no number is given, the latest indexed block is resolved once per subgraph, on first use.
+    """
+
+    def __init__(self, number: Optional[int] = None):
+        self.number = number
+        self._blocks: dict[str, int] = {}
+        self._lock = asyncio.Lock()
+
+    async def resolve(self, url: str, fetch: Callable[[], Awaitable[int]]) -> int:
+        """
+        Gets the block to pin queries to the given subgraph to.
+        :param url: The subgraph URL.
+        :param fetch: Coroutine function returning the latest block indexed by the subgraph.
+        """
+        if self.number is not None:
+            return self.number
+
+        async with self._lock:
+            if url not in self._blocks:
+                self._blocks[url] = int(await fetch())
+
+        return self._blocks[url]
+
+    @property
+    def blocks(self) -> dict[str, int]:
+        """
+        The blocks resolved so far, per subgraph URL.
+        """
+        return dict(self._blocks)
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from lib.helper import envvar
+
+
+class ResponseCache:
+    """
+    Persistent cache of subgraph responses, stored in a SQLite file.
+    Entries are keyed by the endpoint, the normalized query text, the variables and the block the query is pinned
+    to (if any). Unpinned entries expire after `ttl` seconds, while pinned ones never do: the data at a given block
+    is immutable. The least recently used entries are evicted once the cache grows over `max_size` bytes.
+    """
+
+    def __init__(self, path: Path, ttl: float = 3600, max_size: int = 512 * 1024**2):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_size = max_size
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path, isolation_level=None)
+        self._db.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                block INTEGER,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )"""
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+        # running total of the sizes, kept up to date by triggers so that eviction does not scan the entries.
+        # Replaced entries go through the delete trigger as well.
+        self._db.execute("PRAGMA recursive_triggers = ON")
+        self._db.execute("CREATE TABLE IF NOT EXISTS _meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._db.execute(
+            """INSERT OR IGNORE INTO _meta
+            VALUES ('size', (SELECT COALESCE(SUM(size), 0) FROM responses))"""
+        )
+        self._db.execute(
+            """CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN
+                UPDATE _meta SET value = value + new.size WHERE key = 'size';
+            END"""
+        )
+        self._db.execute(
+            """CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN
+                UPDATE _meta SET value = value - old.size WHERE key = 'size';
+            END"""
+        )
+        self.purge()
+
+    @classmethod
+    def from_env(cls) -> Optional["ResponseCache"]:
+        """
+        Opens the cache set by the `SUBGRAPH_CACHE` environment variable (path to the SQLite file), if any.
+        `SUBGRAPH_CACHE_TTL` (seconds) and `SUBGRAPH_CACHE_MAX_SIZE` (bytes) optionally override the defaults.
+        """
+        if not (path := os.getenv("SUBGRAPH_CACHE")):
+            return None
+
+        return _open(
+            path,
+            envvar("SUBGRAPH_CACHE_TTL", 3600, float),
+            envvar("SUBGRAPH_CACHE_MAX_SIZE", 512 * 1024**2, int),
+        )
+
+    @staticmethod
+    def key(url: str, query: str, variables: dict, block: Optional[int] = None) -> str:
+        normalized = " ".join(query.split())
+        content = json.dumps([url, normalized, variables, block], sort_keys=True)
+
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def get(self, url: str, query: str, variables: dict, block: Optional[int] = None) -> Optional[dict]:
+        """
+        Gets a cached response.
+        :return: The response, or None if not cached or expired.
+        """
+        key = self.key(url, query, variables, block)
+        row = self._db.execute("SELECT response, created, block FROM responses WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            return None
+
+        response, created, block = row
+        if block is None and created < time.time() - self.ttl:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+
+        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        return json.loads(response)
+
+    def put(self, url: str, query: str, variables: dict, response: dict, block: Optional[int] = None):
+        """
+        Caches a response, evicting the least recently used entries if the cache grows too large.
+        """
+        content = json.dumps(response)
+        now = time.time()
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (self.key(url, query, variables, block), block, content, len(content), now, now),
+        )
+        self._evict()
+
+    def purge(self):
+        """
+        Removes the expired entries.
+        """
+        self._db.execute("DELETE FROM responses WHERE block IS NULL AND created < ?", (time.time() - self.ttl,))
+
+    def clear(self):
+        self._db.execute("DELETE FROM responses")
+
+    @property
+    def size(self) -> int:
+        return self._db.execute("SELECT value FROM _meta WHERE key = 'size'").fetchone()[0]
+
+    def _evict(self):
+        excess = self.size - self.max_size
+        if excess <= 0:
+            return
+
+        # least recently used first, a few entries at a time
+        while excess > 0:
+            rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                break
+
+            for key, size in rows:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                excess -= size
+                if excess <= 0:
+                    break
+
+
+@lru_cache
+def _open(path: str, ttl: float, max_size: int) -> ResponseCache:
+    return ResponseCache(Path(path).expanduser(), ttl, max_size)
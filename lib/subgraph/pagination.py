@@ -0,0 +1,59 @@
+import re
+from enum import Enum, unique
+from typing import Any
+
+from .query import add_filters, replace_arguments, root_arguments
+
+
+@unique
+class Pagination(Enum):
+    """
+    How a provider pages through a collection.
+    - `SKIP`: `first`/`skip` paging. Served in O(skip) by the indexer, and capped at `skip: 5000`.
+    - `CURSOR`: keyset paging on `id` (`where: {id_gt: $last_id}, orderBy: id`). Constant cost per page.
+    """
+
+    SKIP = "skip"
+    CURSOR = "cursor"
+
+    @property
+    def inputs(self) -> list[str]:
+        if self == self.CURSOR:
+            return ["$first: Int!", "$last_id: String!"]
+        return ["$first: Int!", "$skip: Int!"]
+
+    @property
+    def initial_cursor(self) -> Any:
+        return "" if self == self.CURSOR else 0
+
+    def variables(self, cursor: Any) -> dict:
+        if self == self.CURSOR:
+            return {"last_id": cursor}
+        return {"skip": cursor}
+
+    def next_cursor(self, cursor: Any, content: list) -> Any:
+        if self == self.SKIP:
+            return cursor + len(content)
+
+        try:
+            return content[-1]["id"]
+        except (KeyError, TypeError):
+            raise ValueError("Cursor pagination requires the `id` field to be part of the query")
+
+    def rewrite(self, body: str) -> str:
+        """
+        Rewrites the arguments of the root field of a query body to match the pagination mode.
+        Queries are written with `first`/`skip` arguments, which are kept as is in `SKIP` mode.
+        """
+        if self == self.SKIP:
+            return body
+
+        start, end = root_arguments(body)
+        arguments = body[start + 1 : end] if start != end else ""
+        arguments = re.sub(r"\b(skip|orderBy|orderDirection)\s*:\s*\$?\w+\s*,?\s*", "", arguments).rstrip(", \n")
+        arguments = add_filters(arguments, ["id_gt: $last_id"])
+
+        if not re.search(r"\bfirst\s*:", arguments):
+            arguments += ", first: $first"
+
+        return replace_arguments(body, f"{arguments}, orderBy: id, orderDirection: asc")
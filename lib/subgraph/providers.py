@@ -1,11 +1,21 @@
 import asyncio
 import os
+import random
 import sys
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, AsyncIterator, Optional, Union
 
 import aiohttp
 
+from .block_pin import BlockPin
+from .cache import ResponseCache
+from .pagination import Pagination
+from .query import add_root_argument, add_root_filters
+
+
+# default `cache` of the providers: the cache set by the environment (see `ResponseCache.from_env`), if any
+_CACHE_FROM_ENV: Any = object()
+
 
 class ProviderError(Exception):
     pass
@@ -15,15 +25,85 @@ class GraphQLProvider:
     query_file: Optional[str] = None
     params: list[str] = []
     default_key: Optional[str] = None
-
-    def __init__(self, url: str):
+    pagination: Pagination = Pagination.SKIP
+
+    shard_key: Optional[str] = None
+    shard_type: str = "String"
+    hex_ids: bool = False  # whether the ids are hex strings (addresses, hashes), so that they can be sharded
+    max_concurrency: int = 4
+
+    request_timeout: float = 30  # of each attempt, in seconds
+    rate_limit_retries: int = 5  # of rate-limited (429), failed (5xx), dropped or timed out requests
+    rate_limit_backoff: float = 0.5
+
+    connection_limit: int = 10
+    connection_limit_per_host: int = 10
+    keepalive_timeout: float = 30
+
+    def __init__(
+        self,
+        url: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        cache: Optional[ResponseCache] = _CACHE_FROM_ENV,
+        block_pin: Optional[BlockPin] = None,
+    ):
         if env_url := os.getenv(url):
             self.url = env_url
         else:
             self.url = url
         self.pwd = Path(sys.modules[self.__class__.__module__].__file__).parent
+        self._session = session
+        self._owns_session = session is None
+        self.cache = ResponseCache.from_env() if cache is _CACHE_FROM_ENV else cache  # None disables the cache
+        self.block_pin = block_pin
         self._initialize_query(self.query_file, self.params)
 
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    @classmethod
+    def create_session(
+        cls,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+    ) -> aiohttp.ClientSession:
+        """
+        Creates a connection-pooled session, that can be shared among several providers.
+        :param limit: Max number of simultaneous connections. Defaults to `connection_limit`.
+        :param limit_per_host: Max number of simultaneous connections to the same host.
+        Defaults to `connection_limit_per_host`.
+        :param keepalive_timeout: Time (in seconds) an idle connection is kept open. Defaults to `keepalive_timeout`.
+        :return: The session. The caller is responsible for closing it.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=cls.connection_limit if limit is None else limit,
+            limit_per_host=cls.connection_limit_per_host if limit_per_host is None else limit_per_host,
+            keepalive_timeout=cls.keepalive_timeout if keepalive_timeout is None else keepalive_timeout,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        The session used to execute queries. Created on first use if none was provided.
+        """
+        if self._session is None or self._session.closed:
+            self._session = self.create_session()
+            self._owns_session = True
+        return self._session
+
+    async def close(self):
+        """
+        Closes the session, if it was created by the provider.
+        """
+        if self._owns_session and self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
     #### PRIVATE METHODS ####
     def _initialize_query(
         self, query_file: str, extra_inputs: Optional[list[str]] = None
@@ -31,6 +111,7 @@ class GraphQLProvider:
         if extra_inputs is None:
             extra_inputs = []
 
+        self._extra_inputs = extra_inputs
         keys, self._sku_query = self._load_query(query_file, extra_inputs)
 
         if self.default_key is None:
@@ -39,34 +120,130 @@ class GraphQLProvider:
     def _load_query(self, path: Union[str, Path], extra_inputs: list[str] = []) -> tuple[str, str]:
         """
         Loads a graphql query from a file.
+        The query arguments are rewritten to match the provider's pagination mode.
         :param path: Path to the file. The path must be relative to the ct-app folder.
         :return: The query as a string.
         """
-        inputs = ["$first: Int!", "$skip: Int!", *extra_inputs]
+        with open(self.pwd.joinpath(path)) as f:
+            body = f.read()
+
+        self._body = self.pagination.rewrite(body)
+
+        return body.split("(")[0], self._build_query(self._body, extra_inputs)
+
+    def _build_query(self, body: str, extra_inputs: list[str]) -> str:
+        inputs = [*self.pagination.inputs, *extra_inputs]
+
+        if self.block_pin is not None:
+            body = add_root_argument(body, "block: {number: $block}")
+            inputs.append("$block: Int!")
 
         header = "query (" + ",".join(inputs) + ") {"
         footer = "}"
-        with open(self.pwd.joinpath(path)) as f:
-            body = f.read()
 
-        return body.split("(")[0], ("\n".join([header, body, footer]))
+        return "\n".join([header, body, footer])
+
+    def _shard_query(self, lower_bound: bool, upper_bound: bool) -> str:
+        """
+        Builds the query restricted to a shard, i.e. `shard_key` in (`$shard_start`, `$shard_end`].
+        When sharding on `id` with cursor pagination, the lower bound is the initial cursor.
+        """
+        filters, inputs = [], list(self._extra_inputs)
+
+        if lower_bound and not self._lower_bound_is_cursor:
+            filters.append(f"{self.shard_key}_gt: $shard_start")
+            inputs.append(f"$shard_start: {self.shard_type}!")
+        if upper_bound:
+            filters.append(f"{self.shard_key}_lte: $shard_end")
+            inputs.append(f"$shard_end: {self.shard_type}!")
+
+        return self._build_query(add_root_filters(self._body, filters), inputs)
+
+    @property
+    def _lower_bound_is_cursor(self) -> bool:
+        return self.shard_key == "id" and self.pagination == Pagination.CURSOR
+
+    def _resolve_key(self, key: Optional[str]) -> Optional[Union[str, list[str]]]:
+        if key is None:
+            key = self.default_key
+
+        if key is None:
+            print("No key provided for the query, and no default key set. Skipping query...")
+
+        return key
+
+    async def _last_block(self) -> int:
+        """
+        Gets the latest block indexed by the subgraph.
+        """
+        results = await LastBlockProvider(self.url, self.session, self.cache).get()
+        if not results:
+            raise ProviderError(f"Unable to get the latest indexed block from {self.url}")
+
+        return results[0]
+
+    def _retry_delay(self, headers: Optional[dict], attempt: int) -> float:
+        """
+        Delay before retrying a request: the `Retry-After` header if set, exponential backoff with jitter otherwise.
+        """
+        try:
+            return float(headers["Retry-After"])
+        except (KeyError, TypeError, ValueError):
+            return self.rate_limit_backoff * 2**attempt * random.uniform(0.5, 1.5)
+
+    async def _post(self, query: str, variable_values: dict) -> tuple[int, Optional[dict], dict]:
+        """
+        Posts a graphql query once, within `request_timeout`.
+        :return: The status, the decoded content (None if the request should be retried) and the headers.
+        """
+        async with asyncio.timeout(self.request_timeout):
+            async with self.session.post(self.url, json={"query": query, "variables": variable_values}) as response:
+                if response.status == 429 or response.status >= 500:
+                    return response.status, None, response.headers
+
+                if not 200 <= response.status < 300:
+                    text = await response.text()
+                    raise ProviderError(f"Status {response.status} from {self.url}: {text[:200]}")
+
+                try:
+                    content = await response.json(content_type=None)
+                except ValueError as err:
+                    raise ProviderError(f"Invalid JSON response from {self.url}: {err}") from err
+
+                return response.status, content, response.headers
 
     async def _execute(self, query: str, variable_values: dict) -> tuple[dict, Optional[dict]]:
         """
-        Executes a graphql query.
+        Executes a graphql query. Rate-limited, failed (5xx), dropped and timed out requests are retried.
         :param query: The query to execute.
-        :param variable_values: The variables to use in the query (dict)"""
+        :param variable_values: The variables to use in the query (dict)
+        :raises ProviderError: If the request fails, or still fails after `rate_limit_retries` retries.
+        """
 
-        try:
-            async with aiohttp.ClientSession() as session, session.post(
-                self.url, json={"query": query, "variables": variable_values}
-            ) as response:
-                return await response.json(), response.headers
-        except TimeoutError as err:
-            print(f"Timeout error: {err}")
-        except Exception as err:
-            print(f"Unknown error: {err}")
-        return {}, None
+        block = variable_values.get("block") if self.block_pin is not None else None
+
+        if self.cache is not None and (cached := self.cache.get(self.url, query, variable_values, block)) is not None:
+            return cached, None
+
+        for attempt in range(self.rate_limit_retries + 1):
+            headers = None
+            try:
+                status, content, headers = await self._post(query, variable_values)
+            except (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError, TimeoutError) as err:
+                failure = f"{type(err).__name__} {err}".strip()
+            except aiohttp.ClientError as err:
+                raise ProviderError(f"Error querying {self.url}: {err}") from err
+            else:
+                if content is not None:
+                    if self.cache is not None and status == 200 and "errors" not in content:
+                        self.cache.put(self.url, query, variable_values, content, block)
+                    return content, headers
+                failure = f"status {status}"
+
+            if attempt < self.rate_limit_retries:
+                await asyncio.sleep(self._retry_delay(headers, attempt))
+
+        raise ProviderError(f"Giving up on {self.url} after {self.rate_limit_retries + 1} attempts: {failure}")
 
     async def _test_query(self, key: str, **kwargs) -> bool:
         """
@@ -75,58 +252,69 @@ class GraphQLProvider:
         :param kwargs: The variables to use in the query (dict).
         :return: True if the query is successful, False otherwise.
         """
-        kwargs.update({"first": 1, "skip": 0})
+        kwargs.update({"first": 1, **self.pagination.variables(self.pagination.initial_cursor)})
 
         try:
-            response, _ = await asyncio.wait_for(
-                self._execute(self._sku_query, kwargs), timeout=30
-            )
-        except asyncio.TimeoutError:
-            print("Query timeout occurred")
-            return False
+            response, _ = await self._execute(self._sku_query, kwargs)
         except ProviderError as err:
             print(f"ProviderError error: {err}")
             return False
 
         return key in response.get("data", [])
 
-    async def _get(self, keys: list[str], **kwargs) -> list:
+    async def _get_shard(self, keys: list[str], bounds: tuple[Any, Any], **kwargs) -> list:
         """
-        Gets the data from a subgraph query.
-        :param key: The key to look for in the response.
+        Gets the data from a subgraph query, restricted to a shard.
+        :param keys: The key to look for in the response.
+        :param bounds: The (exclusive) lower and (inclusive) upper bounds of the shard. None if unbounded.
         :param kwargs: The variables to use in the query (dict).
-        :return: The data from the query.
+        :return: The data from the shard.
+        """
+        start, end = bounds
+        cursor = self.pagination.initial_cursor
+
+        if start is not None:
+            if self._lower_bound_is_cursor:
+                cursor = start
+            else:
+                kwargs["shard_start"] = start
+        if end is not None:
+            kwargs["shard_end"] = end
+
+        query = self._shard_query(start is not None, end is not None)
+
+        return [item async for page in self._aiter_pages(keys, query, cursor, kwargs) for item in page]
+
+    async def _aiter_pages(self, keys: list[str], query: str, cursor: Any, kwargs: dict) -> AsyncIterator[list]:
+        """
+        Pages through a subgraph query.
+        :param keys: The key to look for in the response.
+        :param query: The query to execute.
+        :param cursor: The initial pagination cursor.
+        :param kwargs: The variables to use in the query (dict).
+        :return: The content of each non-empty page, as soon as it is received.
         """
         page_size = 1000
-        skip = 0
-        data = []
+
+        if self.block_pin is not None:
+            kwargs["block"] = await self.block_pin.resolve(self.url, self._last_block)
 
         if isinstance(keys, str):
             keys = [keys]
 
         keys = ["data"] + keys
 
-
         while True:
-            kwargs.update({"first": page_size, "skip": skip})
+            kwargs.update({"first": page_size, **self.pagination.variables(cursor)})
+
+            response, _ = await self._execute(query, kwargs)
 
-            try:
-                response, headers = await asyncio.wait_for(
-                    self._execute(self._sku_query, kwargs), timeout=30
-                )
-            except asyncio.TimeoutError:
-                raise TimeoutError("Timeout error while fetching data from subgraph.")
-            except ProviderError as err:
-                raise err
-
-            if response is None:
-                break
-            
             if "errors" in response:
-                if "skip" in response["errors"][0]["message"]:
-                    pass
-                else:
-                    raise ProviderError(f"Internal error: {response['errors']}")
+                # The indexer caps `skip`. Results are truncated past this point, which some callers
+                # rely on to page themselves (e.g. by block number). Use cursor pagination otherwise.
+                if self.pagination == Pagination.SKIP and "skip" in response["errors"][0]["message"]:
+                    break
+                raise ProviderError(f"Internal error: {response['errors']}")
 
             content = response
             for key in keys:
@@ -139,15 +327,42 @@ class GraphQLProvider:
                 if not isinstance(content, list):
                     content = [content]
 
-                data.extend(content)
+                if content:
+                    yield content
 
-            skip += page_size
             if len(content) < page_size:
                 break
 
-        return data
+            try:
+                cursor = self.pagination.next_cursor(cursor, content)
+            except ValueError as err:
+                raise ProviderError(err)
 
     #### DEFAULT PUBLIC METHODS ####
+    async def aiter_pages(self, key: Optional[str] = None, **kwargs) -> AsyncIterator[list]:
+        """
+        Pages through a subgraph query. Only one page is held at a time.
+        :param key: The key to look for in the response. If None, the default key is used.
+        :param kwargs: The variables to use in the query (dict).
+        :return: The content of each page, as soon as it is received.
+        """
+        if (key := self._resolve_key(key)) is None:
+            return
+
+        async for page in self._aiter_pages(key, self._sku_query, self.pagination.initial_cursor, kwargs):
+            yield page
+
+    async def aiter_items(self, key: Optional[str] = None, **kwargs) -> AsyncIterator[Any]:
+        """
+        Iterates over the items of a subgraph query, fetching pages as needed.
+        :param key: The key to look for in the response. If None, the default key is used.
+        :param kwargs: The variables to use in the query (dict).
+        :return: The items of the query, one at a time.
+        """
+        async for page in self.aiter_pages(key, **kwargs):
+            for item in page:
+                yield item
+
     async def get(self, key: Optional[str] = None, **kwargs):
         """
         Gets the data from a subgraph query.
@@ -155,15 +370,58 @@ class GraphQLProvider:
         :param kwargs: The variables to use in the query (dict).
         :return: The data from the query.
         """
-        if key is None and self.default_key is not None:
-            key = self.default_key
-        else:
-            print(
-                "No key provided for the query, and no default key set. Skipping query..."
-            )
-            return []
-        
-        return await self._get(key, **kwargs)
+        return [item async for item in self.aiter_items(key, **kwargs)]
+
+    async def aiter_shards(
+        self, boundaries: list, key: Optional[str] = None, concurrency: Optional[int] = None, **kwargs
+    ) -> AsyncIterator[tuple[int, list]]:
+        """
+        Gets the data from a subgraph query, split into shards on `shard_key` that are fetched concurrently.
+        Shards are yielded as soon as they are complete, so not necessarily in order.
+        :param boundaries: The sorted values splitting the collection. `n` boundaries make `n + 1` shards, the
+        i-th one covering `shard_key` in (boundaries[i - 1], boundaries[i]].
+        :param key: The key to look for in the response. If None, the default key is used.
+        :param concurrency: Max number of shards fetched at once. Defaults to `max_concurrency`.
+        :param kwargs: The variables to use in the query (dict).
+        :return: Tuples of shard index and shard data.
+        """
+        if self.shard_key is None:
+            raise ProviderError(f"{self.__class__.__name__} does not define a `shard_key`")
+        if self.shard_key == "id" and not self.hex_ids:
+            raise ProviderError(f"{self.__class__.__name__} ids are not known to be hex, they cannot be sharded")
+
+        if (key := self._resolve_key(key)) is None:
+            return
+
+        semaphore = asyncio.Semaphore(concurrency or self.max_concurrency)
+
+        async def fetch(index: int, bounds: tuple[Any, Any]) -> tuple[int, list]:
+            async with semaphore:
+                return index, await self._get_shard(key, bounds, **kwargs)
+
+        bounds = list(zip([None, *boundaries], [*boundaries, None]))
+        tasks = [asyncio.ensure_future(fetch(idx, bound)) for idx, bound in enumerate(bounds)]
+
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_sharded(
+        self, boundaries: list, key: Optional[str] = None, concurrency: Optional[int] = None, **kwargs
+    ) -> list:
+        """
+        Gets the data from a subgraph query, split into shards on `shard_key` that are fetched concurrently.
+        :param boundaries: The sorted values splitting the collection (see `aiter_shards`).
+        :param key: The key to look for in the response. If None, the default key is used.
+        :param concurrency: Max number of shards fetched at once. Defaults to `max_concurrency`.
+        :param kwargs: The variables to use in the query (dict).
+        :return: The data from the query, shards merged in order.
+        """
+        shards = {idx: data async for idx, data in self.aiter_shards(boundaries, key, concurrency, **kwargs)}
+        return [item for idx in sorted(shards) for item in shards[idx]]
 
     async def test(self, **kwargs):
         """
@@ -177,4 +435,9 @@ class GraphQLProvider:
             )
             return False
 
-        return await self._test_query(self.default_key, **kwargs)
\ No newline at end of file
+        return await self._test_query(self.default_key, **kwargs)
+
+
+class LastBlockProvider(GraphQLProvider):
+    query_file = "queries/last_block.graphql"
+    default_key = ["_meta", "block", "number"]
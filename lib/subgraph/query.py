@@ -0,0 +1,65 @@
+import re
+
+
+def root_arguments(body: str) -> tuple[int, int]:
+    """
+    Locates the arguments of the root field of a query body.
+    :param body: The query body, as written in the .graphql files.
+    :return: The indexes of the opening and closing parenthesis. Both are equal to the position of the selection
+    set if the root field has no arguments.
+    """
+    args_start, selection_start = body.find("("), body.find("{")
+    if args_start == -1 or args_start > selection_start:
+        return selection_start, selection_start
+
+    depth = 0
+    for idx in range(args_start, len(body)):
+        depth += {"(": 1, ")": -1}.get(body[idx], 0)
+        if depth == 0:
+            break
+
+    return args_start, idx
+
+
+def replace_arguments(body: str, arguments: str) -> str:
+    """
+    Replaces the arguments of the root field of a query body.
+    """
+    start, end = root_arguments(body)
+    if start == end:
+        return f"{body[:start].rstrip()}({arguments}) {body[start:]}"
+
+    return f"{body[: start + 1]}{arguments}{body[end:]}"
+
+
+def add_filters(arguments: str, filters: list[str]) -> str:
+    """
+    Adds filters to the `where` argument, creating it if needed.
+    :param arguments: The arguments of a field, without the surrounding parenthesis.
+    :param filters: The filters to add, e.g. `id_gt: $last_id`.
+    """
+    if not filters:
+        return arguments
+
+    if re.search(r"\bwhere\s*:\s*{", arguments):
+        return re.sub(r"\bwhere\s*:\s*{\s*", f"where: {{{', '.join(filters)}, ", arguments, count=1)
+
+    return f"{arguments}, where: {{{', '.join(filters)}}}".lstrip(", ")
+
+
+def add_root_filters(body: str, filters: list[str]) -> str:
+    """
+    Adds filters to the `where` argument of the root field of a query body.
+    """
+    start, end = root_arguments(body)
+    return replace_arguments(body, add_filters(body[start + 1 : end] if start != end else "", filters))
+
+
+def add_root_argument(body: str, argument: str) -> str:
+    """
+    Adds an argument to the root field of a query body, e.g. `block: {number: $block}`.
+    """
+    start, end = root_arguments(body)
+    arguments = body[start + 1 : end] if start != end else ""
+
+    return replace_arguments(body, f"{arguments.rstrip(', ')}, {argument}".lstrip(", "))
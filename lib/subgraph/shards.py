@@ -0,0 +1,19 @@
+def hex_boundaries(digits: int = 1) -> list[str]:
+    """
+    Boundaries splitting a collection with hex ids (e.g. addresses, hashes) by prefix.
+    Boundaries are padded with zeros to whole bytes ("0x10", ..., "0xf0" for one digit), as odd-length hex
+    strings are rejected by the filters on `Bytes` fields.
+    :param digits: Number of hex digits of the prefix. Makes 16**digits shards.
+    :return: The sorted boundaries, to be used with `GraphQLProvider.get_sharded`.
+    """
+    padding = digits % 2
+    return [f"0x{idx:0{digits}x}{'0' * padding}" for idx in range(1, 16**digits)]
+
+
+def range_boundaries(start: int, end: int, step: int) -> list[int]:
+    """
+    Boundaries splitting a collection by an integer key (e.g. block number) into ranges of `step` values.
+    The first shard is unbounded below and the last one unbounded above: use query filters to restrict them.
+    :return: The sorted boundaries, to be used with `GraphQLProvider.get_sharded`.
+    """
+    return list(range(start + step - 1, end, step))
@@ -9,6 +9,7 @@ from dotenv import load_dotenv
 from lib import exporter
 from lib.helper import asynchronous
 from lib.hoprd_api import HoprdAPI
+from lib.subgraph import BlockPin
 from lib.taskmanager import TaskManager
 
 from . import helper
@@ -42,18 +43,18 @@ async def main(address: str, output: str):
         print("No .env file found")
         return
 
-    provider = SafesProvider("SUBGRAPH_SAFES_URL")
+    provider = SafesProvider("SUBGRAPH_SAFES_URL", block_pin=BlockPin())
     api = HoprdAPI(os.environ["NODE_ADDRESS"], os.environ["NODE_KEY"])
 
     # Get all peers channels balances
-    channels = await api.channels()
     with TaskManager("Getting outgoing channels for all detected nodes"):
-        balances = helper.aggregate_peer_balance_in_channels(
-            channels.all
-        )
+        async with api:
+            channels = [channel async for channel in api.stream_channels()]
+        balances = helper.aggregate_peer_balance_in_channels(channels)
 
     with TaskManager("Getting all nodes from subgraph"):
-        all_nodes = await helper.nodes_from_subgraph(provider)
+        async with provider:
+            all_nodes = await helper.nodes_from_subgraph(provider)
 
     safe_addresses = list(
         set((map(lambda x: x.safe_address.lower(), all_nodes))))
@@ -1,3 +1,6 @@
+from lib.channel_balances import ChannelBalances
+from lib.subgraph import hex_boundaries
+
 from .subgraph.entries import Safe
 from .subgraph.providers import SafesProvider
 
@@ -6,35 +9,23 @@ def aggregate_peer_balance_in_channels(channels: list) -> dict[str, dict]:
     """
     Returns a dict containing all unique source_peerId-source_address links.
     """
-    results: dict[str, dict] = {}
-    for c in channels:
-        if not c.status.is_open:
-            continue
-
-        if c.source_peer_id not in results:
-            results[c.source_peer_id] = {
-                "source_node_address": c.source_address,
-                "channels_balance": 0,
-            }
-        if c.destination_peer_id not in results:
-            results[c.destination_peer_id] = {
-                "source_node_address": c.destination_address,
-                "channels_balance": 0,
-            }
+    balances = ChannelBalances.fromChannels(channels)
 
-        results[c.source_peer_id]["channels_balance"] += int(c.balance) / 1e18
-
-    return results
+    return {
+        peer_id: {"source_node_address": address, "channels_balance": outgoing / 1e18}
+        for peer_id, address, outgoing in zip(balances.peer_ids, balances.addresses, balances.outgoing)
+    }
 
 async def nodes_from_subgraph(provider: SafesProvider):
     all_nodes = list[Safe]()
     try:
-        for safe in await provider.get():
-            entries = [
-                Safe.fromSubgraphResult(node)
-                for node in safe["registeredNodesInNetworkRegistry"]
-            ]
-            all_nodes.extend(entries)
+        async for _, shard in provider.aiter_shards(hex_boundaries()):
+            for safe in shard:
+                entries = [
+                    Safe.fromSubgraphResult(node)
+                    for node in safe["registeredNodesInNetworkRegistry"]
+                ]
+                all_nodes.extend(entries)
     except Exception as err:
         raise err
 
@@ -1,5 +1,8 @@
-from lib.subgraph import GraphQLProvider
+from lib.subgraph import GraphQLProvider, Pagination
 
 
 class SafesProvider(GraphQLProvider):
-    query_file = "queries/safes_balance.graphql"
\ No newline at end of file
+    query_file = "queries/safes_balance.graphql"
+    pagination = Pagination.CURSOR
+    shard_key = "id"
+    hex_ids = True
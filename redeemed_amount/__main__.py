@@ -1,13 +1,12 @@
 import asyncio
-import random
 from typing import Any
 
 from dotenv import load_dotenv
 
 from lib.helper import envvar
-from lib.hoprd_api.hoprd_api import HoprdAPI
+from lib.hoprd_api import HoprdFleet
 from lib.hoprd_api.request_objects import GetChannelsBody
-from lib.hoprd_api.response_objects import Channel
+from lib.hoprd_api.response_objects import Channels
 from lib.subgraph.providers import GraphQLProvider
 
 from .subgraph.providers import Fundings
@@ -22,19 +21,32 @@ async def main():
     deployment: str = envvar("DEPLOYMENT")
     environment: str = envvar("ENVIRONMENT", default="prod")
 
-    apis: list[HoprdAPI] = [
-        HoprdAPI(host_format % (deployment, idx, environment), token) for idx in range(1, 6)
-    ]
+    node_count: int = envvar("NODE_COUNT", default=5, type=int)
 
-    channels: list[Channel] = sum([
-        (await api.channels(GetChannelsBody("false", "false"))).outgoing for api in apis
-    ], [])
+    urls: list[str] = [host_format % (deployment, idx, environment) for idx in range(1, node_count + 1)]
 
-    total_channel_stake = sum([channel.balance for channel in channels]) / 1e18
+    async with HoprdFleet(urls, token) as fleet:
+        node_channels, balances = await asyncio.gather(
+            fleet.gather(lambda api: api.channels(GetChannelsBody("false", "false"))),
+            fleet.balances(),
+        )
+
+    if not balances:
+        print("None of the nodes answered, aborting")
+        return
+
+    # the channels of a missing node would be left out of the stake, and the redeemed amount be too high
+    if len(node_channels) < len(urls):
+        print(f"Only {len(node_channels)} of {len(urls)} nodes returned their channels, aborting")
+        return
+
+    channels = Channels.merge(node_channels.values())
+    total_channel_stake = sum([channel.balance for channel in channels.outgoing]) / 1e18
     print(f"{'Total channel stake':30s}: {total_channel_stake:.2f} wxHOPR")
 
-    # Fetching the total amount in CT safe
-    safe_stake = (await random.choice(apis).balances()).safe_hopr / 1e18
+    # Fetching the total amount in CT safe (shared by all nodes)
+    safe_balances = next(iter(balances.values()))
+    safe_stake = safe_balances.safe_hopr / 1e18
     print(f"{'Total safe stake':30s}: {safe_stake:.2f} wxHOPR")
 
     # Fetching the total funds sent to CT safe
@@ -43,7 +55,9 @@ async def main():
         "from": "0xd9a00176cf49dfb9ca3ef61805a2850f45cb1d05",
     }
     funding_provider: GraphQLProvider = Fundings("SUBGRAPH_FUNDINGS_URL")
-    ct_funds: float = sum([float(r["amount"]) for r in await funding_provider.get(**fundings_vars)]) + envvar("FUNDS_CONSTANT", type=int)
+    async with funding_provider:
+        fundings: float = sum([float(r["amount"]) async for r in funding_provider.aiter_items(**fundings_vars)])
+    ct_funds: float = fundings + envvar("FUNDS_CONSTANT", type=int)
 
     print(f"{'Total funds amount':30s}: {ct_funds:.2f} wxHOPR")
 
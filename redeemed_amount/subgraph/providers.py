@@ -1,6 +1,8 @@
+from lib.subgraph import Pagination
 from lib.subgraph.providers import GraphQLProvider
 
 
 class Fundings(GraphQLProvider):
     query_file = "queries/fundings.graphql"
+    pagination = Pagination.CURSOR
     params = ['$from: String = ""', '$to_in: [String!] = [""]']
@@ -0,0 +1,68 @@
+import random
+import time
+
+import click
+
+from lib.hoprd_api.channelstatus import ChannelStatus
+from lib.hoprd_api.response_objects import Channel, _convert, try_to_lower
+
+
+class LegacyChannel:
+    """
+    `Channel` as parsed before the response classes compiled their fields: paths split and values converted
+    through floats for every object.
+    """
+
+    keys = Channel.keys
+
+    def __init__(self, data: dict):
+        for key, value in self.keys.items():
+            v = data
+            for subkey in value.split("/"):
+                v = v.get(subkey, None)
+                if v is None:
+                    continue
+
+            setattr(self, key, _convert(v))
+
+        self.status = ChannelStatus.fromString(self.status)
+        self.destination_address = try_to_lower(self.destination_address)
+        self.source_address = try_to_lower(self.source_address)
+
+
+def payloads(count: int) -> list[dict]:
+    rng = random.Random(0)
+    statuses = [status.value for status in ChannelStatus]
+
+    return [
+        {
+            "balance": str(rng.randrange(10**21)),
+            "channelId": f"0x{rng.getrandbits(256):064x}",
+            "destinationAddress": f"0x{rng.getrandbits(160):040X}",
+            "destinationPeerId": f"12D3KooW{rng.getrandbits(128):032x}",
+            "sourceAddress": f"0x{rng.getrandbits(160):040X}",
+            "sourcePeerId": f"12D3KooW{rng.getrandbits(128):032x}",
+            "status": rng.choice(statuses),
+        }
+        for _ in range(count)
+    ]
+
+
+@click.command()
+@click.option("--channels", "count", default=100_000, type=int, help="Number of channel payloads to parse")
+@click.option("--rounds", default=5, type=int, help="Number of rounds, the best one is reported")
+def main(count: int, rounds: int):
+    data = payloads(count)
+
+    for cls in [LegacyChannel, Channel]:
+        best = float("inf")
+        for _ in range(rounds):
+            start = time.perf_counter()
+            [cls(item) for item in data]
+            best = min(best, time.perf_counter() - start)
+
+        print(f"{cls.__name__:14s}: {best:6.3f}s, {count / best:10,.0f} channels/s")
+
+
+if __name__ == "__main__":
+    main()
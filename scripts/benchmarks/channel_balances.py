@@ -0,0 +1,92 @@
+import random
+import time
+
+import click
+import numpy as np
+
+from lib.channel_balances import ChannelBalances
+from lib.hoprd_api.channelstatus import ChannelStatus
+from lib.hoprd_api.response_objects import ChannelRecord
+
+
+def legacy_aggregation(channels: list) -> dict[str, dict]:
+    """
+    Per-node balances as aggregated before `ChannelBalances`, channel by channel.
+    """
+    results: dict[str, dict] = {}
+    for c in channels:
+        if not c.status.is_open:
+            continue
+
+        if c.source_peer_id not in results:
+            results[c.source_peer_id] = {"source_node_address": c.source_address, "channels_balance": 0}
+        if c.destination_peer_id not in results:
+            results[c.destination_peer_id] = {"source_node_address": c.destination_address, "channels_balance": 0}
+
+        results[c.source_peer_id]["channels_balance"] += int(c.balance) / 1e18
+
+    return results
+
+
+def topology(nodes: int, count: int) -> list[ChannelRecord]:
+    rng = random.Random(0)
+    peers = [(f"12D3KooW{idx:032x}", f"0x{idx:040x}") for idx in range(nodes)]
+    statuses = list(ChannelStatus)
+
+    channels = []
+    for idx in range(count):
+        (source_peer_id, source_address), (destination_peer_id, destination_address) = rng.sample(peers, 2)
+        channels.append(
+            ChannelRecord(
+                rng.randrange(10**24),
+                f"0x{idx:064x}",
+                destination_address,
+                destination_peer_id,
+                source_address,
+                source_peer_id,
+                rng.choice(statuses),
+            )
+        )
+    return channels
+
+
+def best(func, rounds: int) -> tuple[float, object]:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+@click.command()
+@click.option("--nodes", default=5_000, type=int, help="Number of nodes in the topology")
+@click.option("--channels", "count", default=100_000, type=int, help="Number of channels in the topology")
+@click.option("--rounds", default=5, type=int, help="Number of rounds, the best one is reported")
+def main(nodes: int, count: int, rounds: int):
+    channels = topology(nodes, count)
+
+    elapsed, legacy = best(lambda: legacy_aggregation(channels), rounds)
+    print(f"{'loop':30s}: {elapsed * 1e3:8.1f}ms")
+
+    elapsed, balances = best(lambda: ChannelBalances.fromChannels(channels), rounds)
+    print(f"{'ChannelBalances.fromChannels':30s}: {elapsed * 1e3:8.1f}ms")
+
+    # the grouping alone, for topologies already held as columns
+    index = {peer_id: idx for idx, peer_id in enumerate(balances.peer_ids)}
+    opened = [c for c in channels if c.status.is_open]
+    sources = np.fromiter((index[c.source_peer_id] for c in opened), np.int64, len(opened))
+    destinations = np.fromiter((index[c.destination_peer_id] for c in opened), np.int64, len(opened))
+    values = np.fromiter((c.balance for c in opened), object, len(opened))
+
+    columns = (balances.peer_ids, balances.addresses, sources, destinations, values)
+    elapsed, _ = best(lambda: ChannelBalances(*columns), rounds)
+    print(f"{'ChannelBalances (columns)':30s}: {elapsed * 1e3:8.1f}ms")
+
+    assert list(legacy) == balances.peer_ids
+    for peer_id, total in list(zip(balances.peer_ids, balances.outgoing))[:100]:
+        assert total == sum(c.balance for c in opened if c.source_peer_id == peer_id)
+
+
+if __name__ == "__main__":
+    main()
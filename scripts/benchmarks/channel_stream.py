@@ -0,0 +1,78 @@
+import time
+import tracemalloc
+
+import click
+from aiohttp import web
+
+from lib.helper import asynchronous
+from lib.hoprd_api import HoprdAPI
+
+
+def topology(count: int) -> bytes:
+    channel = (
+        '{{"balance":"{balance}","channelId":"0x{idx:064x}","destinationAddress":"0x{dst:040X}",'
+        '"destinationPeerId":"12D3KooW{dst:044x}","sourceAddress":"0x{src:040X}",'
+        '"sourcePeerId":"12D3KooW{src:044x}","status":"Open","epoch":1,"ticketIndex":"0"}}'
+    )
+    channels = ",".join(
+        channel.format(balance=idx * 10**15, idx=idx, src=idx % 1000, dst=(idx * 7) % 1000) for idx in range(count)
+    )
+    return f'{{"all":[{channels}],"incoming":[],"outgoing":[]}}'.encode()
+
+
+async def measure(fetch) -> tuple[float, float, int]:
+    start = time.perf_counter()
+    count = await fetch()
+    duration = time.perf_counter() - start
+
+    # measured separately, as tracing allocations slows parsing down
+    tracemalloc.start()
+    await fetch()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return duration, peak / 1024**2, count
+
+
+@click.command()
+@click.option("--channels", "count", default=200_000, type=int, help="Number of channels in the topology")
+@click.option("--port", default=8767, type=int, help="Port the stub node listens on")
+@asynchronous
+async def main(count: int, port: int):
+    body = topology(count)
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(body=body, content_type="application/json")
+
+    app = web.Application()
+    app.router.add_get("/api/v3/channels", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    try:
+        async with HoprdAPI(f"http://127.0.0.1:{port}", "token") as api:
+
+            async def loaded() -> int:
+                return len((await api.channels()).all)
+
+            async def streamed() -> int:
+                return len([channel async for channel in api.stream_channels()])
+
+            async def consumed() -> int:
+                return sum([1 async for _ in api.stream_channels()])
+
+            print(f"Full topology of {count} channels ({len(body) / 1024**2:.1f} MB)")
+            for name, fetch in [
+                ("channels", loaded),
+                ("stream_channels, kept", streamed),
+                ("stream_channels, consumed", consumed),
+            ]:
+                duration, peak, parsed = await measure(fetch)
+                print(f"{name:26s}: {parsed} channels in {duration:5.2f}s, peak memory {peak:7.1f} MB")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    main()
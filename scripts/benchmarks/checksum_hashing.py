@@ -0,0 +1,72 @@
+import importlib
+import random
+import time
+
+import click
+
+from lib.helper import keccak_256
+
+entries = importlib.import_module("checksum-baseline.subgraph.entries")
+hashing = importlib.import_module("checksum-baseline.hashing")
+
+
+def history(count: int, events_per_block: int) -> list:
+    """
+    Synthetic history of `count` events, with 1 to `events_per_block` events per block.
+    """
+    rng = random.Random(0)
+    blocks = []
+    number = 29_706_814
+
+    while count > 0:
+        number += rng.randint(1, 50)
+        block = entries.Block(number)
+        for log_index in range(min(rng.randint(1, events_per_block), count)):
+            tx_hash = f"0x{rng.getrandbits(256):064x}"
+            block.add_event(entries.Event(f"{tx_hash}-{log_index}", number, log_index, 0, "Transfer", tx_hash))
+        count -= len(block.events)
+        blocks.append(block)
+
+    return blocks
+
+
+def legacy_checksums(blocks: list) -> list[bytes]:
+    """
+    Checksums as computed before the hashing pipeline, block by block.
+    """
+    checksums = [bytearray(32)]
+    for block in blocks:
+        checksums.append(keccak_256(b"".join([checksums[-1], block.keccak_256()])))
+    return checksums[1:]
+
+
+def timed(func) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+@click.command()
+@click.option("--events", "count", default=1_000_000, type=int, help="Number of events in the history")
+@click.option("--events-per-block", default=5, type=int, help="Max number of events per block")
+@click.option("--workers", default=4, type=int, help="Number of processes of the parallel run")
+def main(count: int, events_per_block: int, workers: int):
+    blocks = history(count, events_per_block)
+    print(f"{count:,} events in {len(blocks):,} blocks")
+
+    elapsed, reference = timed(lambda: legacy_checksums(blocks))
+    print(f"{'Block.keccak_256':20s}: {elapsed:6.3f}s")
+
+    decode, (buffer, offsets) = timed(lambda: hashing.encode_tx_hashes(blocks))
+    for label, processes in [("pipeline", 1), (f"pipeline ({workers} proc.)", workers)]:
+        hashing.PARALLEL_THRESHOLD = 1 if processes > 1 else len(blocks) + 1
+        hashes, block_hashes = timed(lambda: hashing.block_hashes(buffer, offsets, processes))
+        chain, checksums = timed(lambda: hashing.chain_checksums(block_hashes, bytes(32)))
+
+        total = decode + hashes + chain
+        print(f"{label:20s}: {total:6.3f}s (decode {decode:.3f}s, hash {hashes:.3f}s, chain {chain:.3f}s)")
+        assert checksums == [bytes(checksum) for checksum in reference]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import time
+
+import click
+
+from lib.rpc.entries.log import Log
+from lib.rpc.entries.log_batch import LogBatch
+
+from .stub_rpc import StubRPC
+
+
+def timed(func) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+@click.command()
+@click.option("--logs", "count", default=200_000, type=int, help="Number of logs to decode")
+def main(count: int):
+    raw = StubRPC(log_every=1).logs(0, count - 1)
+
+    decode, logs = timed(lambda: [Log(item) for item in raw])
+    keys, _ = timed(lambda: {(log.block_number.idx, log.transaction_index.value, log.log_index.value) for log in logs})
+    export, _ = timed(lambda: [log.as_dict for log in logs])
+    print(f"{'Log':10s}: decode {decode:6.3f}s, keys {keys:6.3f}s, as_dict {export:6.3f}s")
+
+    decode, batch = timed(lambda: LogBatch(raw))
+    keys, _ = timed(lambda: {log.key for log in batch})
+    export, _ = timed(lambda: [log.as_dict for log in batch])
+    print(f"{'LogBatch':10s}: decode {decode:6.3f}s, keys {keys:6.3f}s, as_dict {export:6.3f}s")
+
+    vectorized, _ = timed(lambda: (batch.block_numbers.min(), batch.block_numbers.max()))
+    print(f"{'':10s}  block span (vectorized) {vectorized * 1e3:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
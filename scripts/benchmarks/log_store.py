@@ -0,0 +1,50 @@
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+
+from lib.rpc.entries.log_batch import LogBatch
+from lib.rpc.log_store import LogStore
+
+from .stub_rpc import StubRPC
+
+
+@click.command()
+@click.option("--logs", "count", default=1_000_000, type=int, help="Number of logs to store")
+def main(count: int):
+    raw = StubRPC(log_every=1).logs(0, count - 1)
+
+    with tempfile.TemporaryDirectory() as folder:
+        jsonl = Path(folder) / "logs.jsonl"
+        with open(jsonl, "w") as f:
+            for item in raw:
+                f.write(json.dumps(item) + "\n")
+
+        store = LogStore(Path(folder) / "store", buffer_size=250_000)
+        start = time.perf_counter()
+        store.append(LogBatch(raw), 0, count - 1)
+        store.flush()
+        write = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(jsonl) as f:
+            blocks = np.array([int(json.loads(line)["blockNumber"], 16) for line in f])
+        json_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        columns = store.column("block_number")
+        store_read = time.perf_counter() - start
+
+        assert np.array_equal(blocks, columns)
+
+        size = sum(path.stat().st_size for path in store.path.rglob("*.npy")) / 1024**2
+        print(f"{count} logs stored in {write:.2f}s ({size:.1f} MB, JSONL: {jsonl.stat().st_size / 1024**2:.1f} MB)")
+        print(f"{'JSONL':10s}: block numbers read in {json_read:8.4f}s")
+        print(f"{'LogStore':10s}: block numbers read in {store_read:8.4f}s ({json_read / store_read:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+import click
+
+from lib.helper import asynchronous
+from lib.rpc.entries.types.block import Block, get_ranges
+from lib.rpc.query_provider import ETHGetLogsRPCProvider
+from lib.rpc.transport import RPCTransport
+
+from .stub_rpc import StubRPC
+
+
+async def fetch(transport: RPCTransport, stub: StubRPC, blocks: int, block_range: int) -> tuple[float, int, int]:
+    requests = stub.requests
+    start = time.perf_counter()
+
+    logs = await asyncio.gather(
+        *[
+            ETHGetLogsRPCProvider(stub.url, transport).get(fromBlock=str(lower), toBlock=str(upper))
+            for lower, upper in get_ranges(Block(0), Block(blocks - 1), block_range)
+        ]
+    )
+    await transport.close()
+
+    return time.perf_counter() - start, stub.requests - requests, sum(len(item) for item in logs)
+
+
+@click.command()
+@click.option("--blocks", default=200_000, type=int, help="Number of blocks to fetch logs for")
+@click.option("--block-range", "block_range", default=1_000, type=int, help="Blocks per eth_getLogs call")
+@click.option("--latency", default=0.02, type=float, help="Simulated latency (in seconds) per HTTP request")
+@click.option("--port", default=8766, type=int, help="Port the stub RPC listens on")
+@asynchronous
+async def main(blocks: int, block_range: int, latency: float, port: int):
+    async with StubRPC(port, latency) as stub:
+        for batch_size in [1, 10, 50, 100]:
+            transport = RPCTransport(stub.url, batch_size=batch_size)
+            duration, requests, logs = await fetch(transport, stub, blocks, block_range)
+            print(f"batch size {batch_size:3d}: {requests:4d} HTTP requests, {logs} logs in {duration:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
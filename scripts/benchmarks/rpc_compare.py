@@ -0,0 +1,40 @@
+import tempfile
+import time
+from pathlib import Path
+
+import click
+
+from compare_rpcs.__main__ import compare
+from lib.helper import asynchronous
+from lib.rpc.entries.types.block import Block
+from lib.rpc.range_scheduler import AdaptiveRangeScheduler
+from lib.rpc.transport import RPCTransport
+
+from .stub_rpc import StubRPC
+
+
+@click.command()
+@click.option("--blocks", default=100_000, type=int, help="Number of blocks to compare")
+@click.option("--block-range", "block_range", default=1_000, type=int, help="Blocks per eth_getLogs call")
+@click.option("--port", default=8766, type=int, help="Port of the first stub RPC (the second one uses the next)")
+@asynchronous
+async def main(blocks: int, block_range: int, port: int):
+    async with StubRPC(port, latency=0.02) as fast, StubRPC(port + 1, latency=0.05) as slow:
+        RPCs = {"Erigon": fast.url, "Nethermind": slow.url}
+
+        for max_in_flight in [1, 2, 4, 8, 16]:
+            scheduler = AdaptiveRangeScheduler(block_range, max_range=block_range)
+
+            start = time.perf_counter()
+            with tempfile.TemporaryDirectory() as folder:
+                await compare(
+                    RPCs, Block(0), Block(blocks - 1), Path(folder) / "res", None, [], scheduler, max_in_flight
+                )
+            duration = time.perf_counter() - start
+            await RPCTransport.close_all()
+
+            print(f"\r{max_in_flight:2d} ranges in flight: {duration:6.2f}s{' ' * 100}")
+
+
+if __name__ == "__main__":
+    main()
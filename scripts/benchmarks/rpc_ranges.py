@@ -0,0 +1,58 @@
+import time
+
+import click
+
+from lib.helper import asynchronous
+from lib.rpc.entries.types.block import Block, get_ranges
+from lib.rpc.query_provider import ETHGetLogsRPCProvider, ProviderError
+from lib.rpc.range_scheduler import AdaptiveRangeScheduler
+from lib.rpc.transport import RPCTransport
+
+from .stub_rpc import StubRPC
+
+
+async def fixed(stub: StubRPC, blocks: int, block_range: int) -> int:
+    logs = 0
+    for start, end in get_ranges(Block(0), Block(blocks - 1), block_range):
+        logs += len(await ETHGetLogsRPCProvider(stub.url).get(fromBlock=str(start), toBlock=str(end)))
+    return logs
+
+
+async def adaptive(stub: StubRPC, blocks: int, block_range: int) -> int:
+    async def fetch(start: Block, end: Block):
+        return await ETHGetLogsRPCProvider(stub.url).get(fromBlock=str(start), toBlock=str(end))
+
+    logs = 0
+    async for _, _, result in AdaptiveRangeScheduler(block_range).scan(fetch, Block(0), Block(blocks - 1)):
+        if isinstance(result, ProviderError):
+            raise result
+        logs += len(result)
+    return logs
+
+
+@click.command()
+@click.option("--blocks", default=200_000, type=int, help="Number of blocks to fetch logs for")
+@click.option("--block-range", "block_range", default=2_000, type=int, help="Fixed (or initial) block range")
+@click.option("--latency", default=0.005, type=float, help="Simulated latency (in seconds) per HTTP request")
+@click.option("--port", default=8766, type=int, help="Port the stub RPC listens on")
+@asynchronous
+async def main(blocks: int, block_range: int, latency: float, port: int):
+    for density, log_every in [("sparse", 1_000), ("dense", 1)]:
+        async with StubRPC(port, latency, log_every, max_results=1_000) as stub:
+            for name, scan in [("fixed", fixed), ("adaptive", adaptive)]:
+                requests = stub.requests
+                start = time.perf_counter()
+                try:
+                    logs = await scan(stub, blocks, block_range)
+                except ProviderError as err:
+                    print(f"{density:6s} {name:8s}: failed after {stub.requests - requests} requests ({err})")
+                    continue
+                finally:
+                    await RPCTransport.close_all()
+
+                duration = time.perf_counter() - start
+                print(f"{density:6s} {name:8s}: {stub.requests - requests:5d} requests, {logs} logs in {duration:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Optional
+
+from aiohttp import web
+
+
+class StubRPC:
+    """
+    Minimal local JSON-RPC endpoint answering `eth_getLogs` with synthetic logs (one every `log_every` blocks),
+    and accepting batch payloads. Every HTTP request costs `latency` seconds, whatever its size. Like most
+    nodes, queries matching more than `max_results` logs are refused.
+    Only meant to benchmark the providers from `lib.rpc` without hitting a real node.
+    """
+
+    def __init__(
+        self, port: int = 8766, latency: float = 0, log_every: int = 10, max_results: Optional[int] = None
+    ):
+        self.port = port
+        self.latency = latency
+        self.log_every = log_every
+        self.max_results = max_results
+        self.requests = 0
+        self.calls = 0
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/"
+
+    def logs(self, from_block: int, to_block: int) -> list[dict]:
+        first = -(-from_block // self.log_every) * self.log_every
+        return [
+            {
+                "address": "0x" + "00" * 20,
+                "blockHash": f"0x{block:064x}",
+                "blockNumber": hex(block),
+                "data": "0x",
+                "logIndex": "0x0",
+                "removed": False,
+                "topics": [],
+                "transactionHash": f"0x{block:064x}",
+                "transactionIndex": "0x0",
+            }
+            for block in range(first, to_block + 1, self.log_every)
+        ]
+
+    def answer(self, call: dict) -> dict:
+        self.calls += 1
+        if call.get("method") != "eth_getLogs":
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+
+        params = call["params"][0]
+        from_block, to_block = int(str(params["fromBlock"]), 0), int(str(params["toBlock"]), 0)
+
+        if self.max_results is not None and (to_block - from_block + 1) // self.log_every > self.max_results:
+            message = f"query returned more than {self.max_results} results"
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32005, "message": message}}
+
+        logs = self.logs(from_block, to_block)
+        return {"jsonrpc": "2.0", "id": call.get("id"), "result": logs}
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = await request.json()
+        await asyncio.sleep(self.latency)
+
+        if isinstance(body, list):
+            return web.json_response([self.answer(call) for call in body])
+        return web.json_response(self.answer(body))
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self._runner.cleanup()
@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+from bisect import bisect_right
+from typing import Optional
+
+from aiohttp import web
+
+
+class StubSubgraph:
+    """
+    Minimal local GraphQL endpoint serving a fixed `items` collection, paged with `first` and either `skip`
+    or `last_id` (cursor pagination), and optionally restricted to an id shard with `shard_end`. Queries on
+    `_meta` return a fixed block number.
+    Only meant to benchmark the providers from `lib.subgraph` without hitting a real indexer.
+    """
+
+    block_number: int = 40_000_000
+
+    def __init__(self, count: int, port: int = 8765, latency: float = 0, max_in_flight: Optional[int] = None):
+        # ids are spread like addresses, so that id prefixes split the collection evenly
+        ids = sorted(f"0x{hashlib.sha1(str(idx).encode()).hexdigest()}" for idx in range(count))
+        self.items = [{"id": id, "value": str(idx)} for idx, id in enumerate(ids)]
+        self.ids = [item["id"] for item in self.items]
+        self.port = port
+        self.latency = latency
+        self.max_in_flight = max_in_flight
+        self.requests = 0
+        self.rate_limited = 0
+        self._in_flight = 0
+        self._runner = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.max_in_flight is not None and self._in_flight >= self.max_in_flight:
+            self.rate_limited += 1
+            return web.Response(status=429)
+
+        self._in_flight += 1
+        try:
+            self.requests += 1
+            body = await request.json()
+            variables = body.get("variables", {})
+            await asyncio.sleep(self.latency)
+        finally:
+            self._in_flight -= 1
+
+        if "items" not in body["query"]:
+            return web.json_response({"data": {"_meta": {"block": {"number": self.block_number}}}})
+
+        first, start, end = variables.get("first", 100), variables.get("skip", 0), len(self.items)
+        if "last_id" in variables:
+            start = bisect_right(self.ids, variables["last_id"])
+        if "shard_end" in variables:
+            end = bisect_right(self.ids, variables["shard_end"])
+
+        return web.json_response({"data": {"items": self.items[start : min(start + first, end)]}})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.router.add_post("/", self.handle)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "127.0.0.1", self.port).start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self._runner.cleanup()
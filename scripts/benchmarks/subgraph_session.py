@@ -0,0 +1,51 @@
+import time
+from typing import Optional
+
+import aiohttp
+import click
+
+from lib.helper import asynchronous
+from lib.subgraph import GraphQLProvider
+
+from .stub_subgraph import StubSubgraph
+
+
+class ItemsProvider(GraphQLProvider):
+    query_file = "queries/items.graphql"
+
+
+class PerRequestSessionItemsProvider(ItemsProvider):
+    """
+    Reproduces the previous behaviour, where a new session (and connection) was opened for every page.
+    """
+
+    async def _execute(self, query: str, variable_values: dict) -> tuple[dict, Optional[dict]]:
+        async with aiohttp.ClientSession() as session, session.post(
+            self.url, json={"query": query, "variables": variable_values}
+        ) as response:
+            return await response.json(), response.headers
+
+
+async def pages_per_second(provider: GraphQLProvider, stub: StubSubgraph) -> float:
+    requests = stub.requests
+    start = time.perf_counter()
+    async with provider:
+        await provider.get()
+    return (stub.requests - requests) / (time.perf_counter() - start)
+
+
+@click.command()
+@click.option("--items", default=200_000, type=int, help="Number of items served by the stub subgraph")
+@click.option("--port", default=8765, type=int, help="Port the stub subgraph listens on")
+@asynchronous
+async def main(items: int, port: int):
+    async with StubSubgraph(items, port) as stub:
+        before = await pages_per_second(PerRequestSessionItemsProvider(stub.url), stub)
+        after = await pages_per_second(ItemsProvider(stub.url), stub)
+
+    print(f"{'Session per request':25s}: {before:8.1f} pages/s")
+    print(f"{'Pooled session':25s}: {after:8.1f} pages/s ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
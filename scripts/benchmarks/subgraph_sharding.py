@@ -0,0 +1,43 @@
+import time
+
+import click
+
+from lib.helper import asynchronous
+from lib.subgraph import GraphQLProvider, Pagination, hex_boundaries
+
+from .stub_subgraph import StubSubgraph
+
+
+class ShardedItemsProvider(GraphQLProvider):
+    query_file = "queries/items.graphql"
+    pagination = Pagination.CURSOR
+    shard_key = "id"
+    hex_ids = True
+
+
+@click.command()
+@click.option("--items", default=100_000, type=int, help="Number of items served by the stub subgraph")
+@click.option("--port", default=8765, type=int, help="Port the stub subgraph listens on")
+@click.option("--latency", default=0.05, type=float, help="Simulated indexer latency per page (seconds)")
+@click.option("--max-in-flight", default=6, type=int, help="Concurrent requests before the stub answers HTTP 429")
+@asynchronous
+async def main(items: int, port: int, latency: float, max_in_flight: int):
+    async with StubSubgraph(items, port, latency, max_in_flight) as stub:
+        for concurrency in [1, 2, 4, 8, 16]:
+            requests, rate_limited = stub.requests, stub.rate_limited
+            start = time.perf_counter()
+
+            async with ShardedItemsProvider(stub.url) as provider:
+                data = await provider.get_sharded(hex_boundaries(), concurrency=concurrency)
+
+            elapsed = time.perf_counter() - start
+            assert [item["id"] for item in data] == stub.ids, "Sharded results differ from the collection"
+
+            print(
+                f"concurrency {concurrency:2d}: {(stub.requests - requests) / elapsed:8.1f} pages/s "
+                + f"({stub.rate_limited - rate_limited} requests rate-limited)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from lib.rpc import RPCBatcher
+
+
+def request(method: str, id=None) -> dict:
+    return {"jsonrpc": "2.0", "method": method, "params": [], "id": id}
+
+
+def run(batcher_factory, *payloads):
+    async def main():
+        batcher = batcher_factory()
+        return await asyncio.gather(*(batcher.submit(payload) for payload in payloads), return_exceptions=True)
+
+    return asyncio.run(main())
+
+
+def test_responses_matched_by_id():
+    batches = []
+
+    async def post(batch):
+        batches.append(batch)
+        # responses of a batch may come in any order
+        return [{"jsonrpc": "2.0", "id": r["id"], "result": r["method"]} for r in reversed(batch)], 200
+
+    results = run(lambda: RPCBatcher(post), request("a", id=7), request("b", id=7), request("c", id="x"))
+
+    assert len(batches) == 1
+    assert len({r["id"] for r in batches[0]}) == 3
+    assert [response["result"] for response, _ in results] == ["a", "b", "c"]
+    # the caller gets its own id back
+    assert [response["id"] for response, _ in results] == [7, 7, "x"]
+    assert all(status == 200 for _, status in results)
+
+
+def test_max_size_splits_batches():
+    batches = []
+
+    async def post(batch):
+        batches.append(batch)
+        return [{"id": r["id"], "result": r["method"]} for r in batch], 200
+
+    results = run(lambda: RPCBatcher(post, max_size=2), *(request(str(idx)) for idx in range(5)))
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert [response["result"] for response, _ in results] == [str(idx) for idx in range(5)]
+
+
+def test_missing_response():
+    async def post(batch):
+        return [{"id": batch[0]["id"], "result": "ok"}], 200
+
+    (first, _), (second, _) = run(lambda: RPCBatcher(post), request("a", id=1), request("b", id=2))
+
+    assert first == {"id": 1, "result": "ok"}
+    assert "error" in second and second["id"] == 2
+
+
+def test_batch_rejected():
+    async def post(batch):
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": -32005, "message": "batch too large"}}, 413
+
+    results = run(lambda: RPCBatcher(post), request("a", id=1), request("b", id=2))
+
+    assert [response["id"] for response, _ in results] == [1, 2]
+    assert all(response["error"]["code"] == -32005 and status == 413 for response, status in results)
+
+
+def test_post_failure():
+    async def post(batch):
+        raise ConnectionError("reset")
+
+    results = run(lambda: RPCBatcher(post), request("a", id=1), request("b", id=2))
+
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+def test_cancelled_caller():
+    async def post(batch):
+        return [{"id": r["id"], "result": r["method"]} for r in batch], 200
+
+    async def main():
+        batcher = RPCBatcher(post, max_delay=0.05)
+        waiting = asyncio.ensure_future(batcher.submit(request("a", id=1)))
+        other = asyncio.ensure_future(batcher.submit(request("b", id=2)))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        return await other
+
+    response, _ = asyncio.run(main())
+    assert response == {"id": 2, "result": "b"}
+
+
+@pytest.mark.parametrize("max_size", [1, 50])
+def test_flush_on_delay(max_size):
+    async def post(batch):
+        return [{"id": r["id"], "result": True} for r in batch], 200
+
+    async def main():
+        batcher = RPCBatcher(post, max_size=max_size, max_delay=0.01)
+        return await asyncio.wait_for(batcher.submit(request("a")), timeout=1)
+
+    response, _ = asyncio.run(main())
+    assert response["result"] is True
@@ -0,0 +1,127 @@
+import time
+
+import pytest
+
+from lib.subgraph import LastBlockProvider, ResponseCache
+
+URL = "https://subgraph.example/query"
+QUERY = "query { safes(first: $first) { id } }"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(tmp_path / "cache.db", ttl=60, max_size=1_000)
+
+
+def test_roundtrip(cache):
+    cache.put(URL, QUERY, {"first": 10}, {"safes": [{"id": "0x01"}]})
+
+    assert cache.get(URL, QUERY, {"first": 10}) == {"safes": [{"id": "0x01"}]}
+    assert cache.get(URL, QUERY, {"first": 20}) is None
+
+
+def test_key_ignores_whitespace():
+    assert ResponseCache.key(URL, QUERY, {}) == ResponseCache.key(URL, f"  {QUERY.replace(' ', chr(10))} ", {})
+    assert ResponseCache.key(URL, QUERY, {}) != ResponseCache.key(URL, QUERY, {}, block=1)
+
+
+def test_ttl_expiry(cache, monkeypatch):
+    cache.put(URL, QUERY, {}, {"safes": []})
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+
+    assert cache.get(URL, QUERY, {}) is None
+    assert cache.size == 0
+
+
+def test_pinned_entries_never_expire(cache, monkeypatch):
+    cache.put(URL, QUERY, {}, {"safes": []}, block=100)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 3600)
+    cache.purge()
+
+    assert cache.get(URL, QUERY, {}, block=100) == {"safes": []}
+
+
+def test_purge(cache, monkeypatch):
+    cache.put(URL, QUERY, {"first": 1}, {"safes": []})
+    cache.put(URL, QUERY, {"first": 2}, {"safes": []}, block=100)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    cache.purge()
+
+    assert cache.size == len('{"safes": []}')
+
+
+def test_lru_eviction(cache, monkeypatch):
+    now = time.time()
+    response = {"data": "x" * 290}  # about 300 bytes once serialized
+
+    for idx in range(3):
+        monkeypatch.setattr(time, "time", lambda at=now + idx: at)
+        cache.put(URL, QUERY, {"idx": idx}, response)
+
+    # the oldest entry is read, so that the second one becomes the least recently used
+    monkeypatch.setattr(time, "time", lambda: now + 3)
+    assert cache.get(URL, QUERY, {"idx": 0}) is not None
+
+    monkeypatch.setattr(time, "time", lambda: now + 4)
+    cache.put(URL, QUERY, {"idx": 3}, response)
+
+    assert cache.size <= cache.max_size
+    assert cache.get(URL, QUERY, {"idx": 1}) is None
+    assert all(cache.get(URL, QUERY, {"idx": idx}) is not None for idx in (0, 2, 3))
+
+
+def test_replace_keeps_size(cache):
+    for _ in range(5):
+        cache.put(URL, QUERY, {}, {"safes": []})
+
+    assert cache.size == len('{"safes": []}')
+
+
+def test_clear(cache):
+    cache.put(URL, QUERY, {}, {"safes": []})
+    cache.clear()
+
+    assert cache.get(URL, QUERY, {}) is None
+    assert cache.size == 0
+
+
+def test_size_is_running_total(cache, monkeypatch):
+    def total() -> int:
+        return cache._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    for idx in range(10):
+        cache.put(URL, QUERY, {"idx": idx % 4}, {"data": "x" * (idx * 20)})
+        assert cache.size == total()
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    cache.get(URL, QUERY, {"idx": 0})
+    assert cache.size == total()
+
+    cache.purge()
+    assert cache.size == total() == 0
+
+
+def test_size_of_existing_cache(tmp_path):
+    # a cache file written before the size was tracked
+    cache = ResponseCache(tmp_path / "cache.db")
+    cache.put(URL, QUERY, {}, {"safes": []})
+    cache._db.execute("DROP TABLE _meta")
+
+    assert ResponseCache(tmp_path / "cache.db").size == len('{"safes": []}')
+
+
+def test_provider_cache_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("SUBGRAPH_CACHE", str(tmp_path / "env.db"))
+    own = ResponseCache(tmp_path / "own.db")
+
+    assert LastBlockProvider(URL).cache.path == tmp_path / "env.db"
+    assert LastBlockProvider(URL, cache=own).cache is own
+    # None disables the cache, even when the environment sets one
+    assert LastBlockProvider(URL, cache=None).cache is None
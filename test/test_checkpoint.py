@@ -0,0 +1,153 @@
+import time
+
+import pytest
+
+from compare_rpcs.checkpoint import Checkpoint, LeaseLost
+
+SCAN = {"endpoints": ["https://a.example", "https://b.example"], "query": "logs", "from": 0, "to": 999}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "checkpoint.db"
+
+
+def checkpoint(path, worker: int = 0, **kwargs) -> Checkpoint:
+    return Checkpoint(path, SCAN, 0, 999, chunk_size=300, worker=worker, **kwargs)
+
+
+def compare_all(worker: Checkpoint) -> list[tuple[int, int]]:
+    spans = []
+    for start, end in worker.claims():
+        spans.append((start, end))
+        worker.advance(end)
+    return spans
+
+
+def test_chunks(path):
+    worker = checkpoint(path)
+
+    assert compare_all(worker) == [(0, 299), (300, 599), (600, 899), (900, 999)]
+    assert worker.remaining == 0
+
+
+def test_resume(path):
+    first = checkpoint(path)
+    assert first.claim() == (0, 299)
+    first.advance(149)
+
+    # same worker restarted: its chunk is resumed after the last completed block
+    assert checkpoint(path).claim() == (150, 299)
+    assert first.remaining == 1_000 - 150
+
+
+def test_advance_never_goes_back(path):
+    worker = checkpoint(path)
+    worker.claim()
+    worker.advance(200)
+    worker.advance(100)
+
+    assert worker.claim() == (201, 299)
+
+
+def test_completed_chunks_are_skipped(path):
+    worker = checkpoint(path)
+    worker.claim()
+    worker.advance(299)
+
+    assert worker.claim() == (300, 599)
+
+
+def test_workers_never_share_a_chunk(path):
+    first, second = checkpoint(path, worker=0), checkpoint(path, worker=1)
+
+    assert first.claim() == (0, 299)
+    assert second.claim() == (300, 599)
+    assert first.claim() == (0, 299)
+
+
+def test_expired_lease(path, monkeypatch):
+    first, second = checkpoint(path, worker=0, lease=60), checkpoint(path, worker=1, lease=60)
+    first.claim()
+    first.advance(99)
+
+    # the first worker goes silent: once its lease expires, its chunk is handed over
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 30)
+    assert second.claim() == (300, 599)
+
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    second.advance(599)
+    assert second.claim() == (100, 299)
+
+
+def test_progress_renews_lease(path, monkeypatch):
+    first, second = checkpoint(path, worker=0, lease=60), checkpoint(path, worker=1, lease=60)
+    first.claim()
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 50)
+    first.advance(99)
+
+    monkeypatch.setattr(time, "time", lambda: now + 100)
+    assert second.claim() == (300, 599)
+
+
+def test_heartbeat_renews_lease(path, monkeypatch):
+    first, second = checkpoint(path, worker=0, lease=60), checkpoint(path, worker=1, lease=60)
+    first.claim()
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 50)
+    first.heartbeat()
+
+    monkeypatch.setattr(time, "time", lambda: now + 100)
+    assert second.claim() == (300, 599)
+    assert first.claim() == (0, 299)
+
+
+def test_lost_lease(path, monkeypatch):
+    first, second = checkpoint(path, worker=0, lease=60), checkpoint(path, worker=1, lease=60)
+    first.claim()
+    first.advance(99)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert second.claim() == (100, 299)
+
+    # the worker that lost the chunk can neither renew it nor record progress on it
+    with pytest.raises(LeaseLost):
+        first.heartbeat()
+    first.chunk = 0
+    with pytest.raises(LeaseLost):
+        first.advance(299)
+
+    assert second.claim() == (100, 299)
+
+
+def test_separate_scans(path):
+    checkpoint(path).claim()
+    other = Checkpoint(path, {**SCAN, "query": "blocks"}, 0, 999, chunk_size=500)
+
+    assert compare_all(other) == [(0, 499), (500, 999)]
+
+
+def test_release(path):
+    first, second = checkpoint(path, worker=0), checkpoint(path, worker=1)
+    first.claim()
+    first.advance(99)
+    first.release()
+
+    # the worker moves on, while the chunk is resumed by another one
+    assert first.claim() == (300, 599)
+    assert second.claim() == (100, 299)
+
+
+def test_released_chunk_resumed_by_next_run(path):
+    worker = checkpoint(path)
+    worker.claim()
+    worker.advance(99)
+    worker.release()
+    assert compare_all(worker) == [(300, 599), (600, 899), (900, 999)]
+
+    assert compare_all(checkpoint(path)) == [(100, 299)]
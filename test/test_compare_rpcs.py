@@ -0,0 +1,205 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+
+from compare_rpcs.checkpoint import Checkpoint
+from lib.rpc.entries.log_batch import LogBatch
+from lib.rpc.entries.types.block import Block
+from lib.rpc.log_store import LogStore
+from lib.rpc.query_provider import ProviderError, ResultLimitError
+from lib.rpc.range_scheduler import AdaptiveRangeScheduler
+
+compare_rpcs = importlib.import_module("compare_rpcs.__main__")
+
+RPCS = {"reference": "https://reference.example", "other": "https://other.example"}
+
+
+def log(block: int) -> dict:
+    return {
+        "address": "0x" + "11" * 20,
+        "blockHash": "0x" + "22" * 32,
+        "blockNumber": hex(block),
+        "data": "0x",
+        "logIndex": "0x0",
+        "removed": False,
+        "topics": ["0x" + "33" * 32],
+        "transactionHash": "0x" + "44" * 32,
+        "transactionIndex": "0x0",
+    }
+
+
+@pytest.fixture
+def failing(monkeypatch):
+    """
+    Endpoints answering one log per 10 blocks. `other` fails for the blocks in the returned set.
+    """
+    blocks = set()
+
+    class Provider:
+        def __init__(self, url):
+            self.url = url
+
+        async def get(self, fromBlock, toBlock, **kwargs):
+            if self.url == RPCS["other"] and blocks & set(range(fromBlock, toBlock + 1)):
+                raise ProviderError("circuit open")
+            return LogBatch([log(block) for block in range(fromBlock, toBlock + 1) if block % 10 == 0])
+
+    monkeypatch.setattr(compare_rpcs, "ETHGetLogsBatchRPCProvider", Provider)
+    return blocks
+
+
+def run(tmp_path, checkpoint=None, stores=None, concurrency=1):
+    scheduler = AdaptiveRangeScheduler(initial_range=100, max_range=100)
+    asyncio.run(
+        compare_rpcs.compare(
+            RPCS,
+            Block(0),
+            Block(999),
+            tmp_path / "out",
+            None,
+            [],
+            scheduler,
+            concurrency,
+            checkpoint,
+            stores,
+            progress=False,
+        )
+    )
+    with open(tmp_path / "out.jsonl") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_failed_window_not_checkpointed(tmp_path, failing):
+    failing.add(250)
+    checkpoint = Checkpoint(tmp_path / "checkpoint.db", {"scan": 1}, 0, 999, chunk_size=500)
+
+    records = run(tmp_path, checkpoint, concurrency=4)
+
+    assert [(r["fromBlock"], r["endpoint"]) for r in records if r["type"] == "error"] == [(200, "other")]
+    assert not [r for r in records if r["type"] == "diff"]
+    # the first chunk stops before the failed window, the second one is complete
+    assert checkpoint.remaining == 300
+
+    # once the endpoint is back, the next run compares the rest of the first chunk
+    failing.clear()
+    resumed = Checkpoint(tmp_path / "checkpoint.db", {"scan": 1}, 0, 999, chunk_size=500)
+    run(tmp_path, resumed)
+    assert resumed.remaining == 0
+
+
+def test_failed_window_not_stored(tmp_path, failing):
+    failing.add(250)
+    checkpoint = Checkpoint(tmp_path / "checkpoint.db", {"scan": 1}, 0, 999, chunk_size=1_000)
+    stores = {name: LogStore(tmp_path / name) for name in RPCS}
+
+    run(tmp_path, checkpoint, stores)
+
+    # every store holds the same blocks, up to the failed window
+    for store in stores.values():
+        assert store.column("block_number").tolist() == list(range(0, 200, 10))
+    assert checkpoint.remaining == 800
+
+
+def test_failed_window_logged_without_checkpoint(tmp_path, failing):
+    failing.update({0, 500})
+    stores = {name: LogStore(tmp_path / name) for name in RPCS}
+
+    records = run(tmp_path, stores=stores)
+
+    # without a checkpoint to resume from, the error is recorded and the comparison goes on
+    assert [(r["fromBlock"], r["endpoint"]) for r in records if r["type"] == "error"] == [(0, "other"), (500, "other")]
+    assert stores["reference"].column("block_number").tolist() == list(range(0, 1_000, 10))
+    assert stores["other"].column("block_number").tolist() == [
+        block for block in range(0, 1_000, 10) if block // 100 not in (0, 5)
+    ]
+
+
+def test_failed_window_records_written_once(tmp_path, monkeypatch):
+    rpcs = {**RPCS, "third": "https://third.example"}
+    down = {"other"}
+
+    class Provider:
+        """
+        `third` returns a log in extra in every block range, `other` fails for block 250 while it is down.
+        """
+
+        def __init__(self, url):
+            self.url = url
+
+        async def get(self, fromBlock, toBlock, **kwargs):
+            if self.url == rpcs["other"] and "other" in down and fromBlock <= 250 <= toBlock:
+                raise ProviderError("circuit open")
+            blocks = [block for block in range(fromBlock, toBlock + 1) if block % 10 == 0]
+            if self.url == rpcs["third"]:
+                blocks.append(fromBlock + 1)
+            return LogBatch([log(block) for block in blocks])
+
+    monkeypatch.setattr(compare_rpcs, "ETHGetLogsBatchRPCProvider", Provider)
+
+    def compare():
+        scheduler = AdaptiveRangeScheduler(initial_range=100, max_range=100)
+        checkpoint = Checkpoint(tmp_path / "checkpoint.db", {"scan": 1}, 0, 999, chunk_size=500)
+        stores = {name: LogStore(tmp_path / name) for name in rpcs}
+        asyncio.run(
+            compare_rpcs.compare(
+                rpcs, Block(0), Block(999), tmp_path / "out", None, [], scheduler, 1, checkpoint, stores, False
+            )
+        )
+
+    compare()
+    down.clear()
+    compare()
+
+    with open(tmp_path / "out.jsonl") as f:
+        records = [json.loads(line) for line in f]
+
+    # the window that failed in the first run is compared again, but its differences are only written once
+    diffs = [(r["fromBlock"], r["endpoint"]) for r in records if r["type"] == "diff"]
+    assert sorted(diffs) == [(start, "third") for start in range(0, 1_000, 100)]
+
+def test_lost_lease_leaves_chunk(tmp_path, monkeypatch):
+    checkpoint = Checkpoint(tmp_path / "checkpoint.db", {"scan": 1}, 0, 999, chunk_size=500)
+    stores = {name: LogStore(tmp_path / name) for name in RPCS}
+
+    class Provider:
+        def __init__(self, url):
+            self.url = url
+
+        async def get(self, fromBlock, toBlock, **kwargs):
+            # another worker takes the first chunk over while it is compared
+            if fromBlock == 300:
+                checkpoint._db.execute("UPDATE chunks SET owner = 'other', done = 99 WHERE start = 0")
+            return LogBatch([log(block) for block in range(fromBlock, toBlock + 1) if block % 10 == 0])
+
+    monkeypatch.setattr(compare_rpcs, "ETHGetLogsBatchRPCProvider", Provider)
+    run(tmp_path, checkpoint, stores)
+
+    # the progress of the other worker is kept, and the buffered logs of the chunk are not stored
+    rows = checkpoint._db.execute("SELECT start, done, owner FROM chunks ORDER BY start").fetchall()
+    assert rows == [(0, 99, "other"), (500, 999, checkpoint.owner)]
+    for store in stores.values():
+        assert store.column("block_number").tolist() == list(range(500, 1_000, 10))
+
+
+def test_refused_smallest_window_is_a_failed_window(tmp_path, monkeypatch):
+    class Provider:
+        def __init__(self, url):
+            self.url = url
+
+        async def get(self, fromBlock, toBlock, **kwargs):
+            # block 250 alone is too much for the other endpoint
+            if self.url == RPCS["other"] and fromBlock <= 250 <= toBlock:
+                raise ResultLimitError("query returned more than 10000 results")
+            return LogBatch([log(block) for block in range(fromBlock, toBlock + 1) if block % 10 == 0])
+
+    monkeypatch.setattr(compare_rpcs, "ETHGetLogsBatchRPCProvider", Provider)
+    checkpoint = Checkpoint(tmp_path / "checkpoint.db", {"scan": 1}, 0, 999, chunk_size=500)
+
+    records = run(tmp_path, checkpoint)
+
+    assert [(r["fromBlock"], r["toBlock"], r["endpoint"]) for r in records if r["type"] == "error"] == [
+        (250, 250, "other")
+    ]
+    assert checkpoint.remaining == 250
@@ -0,0 +1,77 @@
+import asyncio
+import importlib
+import pickle
+
+import pytest
+
+from lib.subgraph import ProviderError
+
+events_io = importlib.import_module("checksum-baseline.events_io")
+
+
+class LastBlockProvider:
+    def __init__(self, url, session):
+        pass
+
+    async def get(self):
+        return [399]
+
+
+def events_provider(order: list[int], fail: bool = False):
+    class EventsProvider:
+        """
+        Returns the shards in the given order, each with one event per block of its range, then fails if asked to.
+        """
+
+        def __init__(self, url, session, block_pin=None):
+            pass
+
+        async def aiter_shards(self, boundaries, **kwargs):
+            bounds = list(zip([-1, *map(int, boundaries)], [*map(int, boundaries), 399]))
+            for idx in order:
+                yield idx, [{"block_number": block} for block in range(bounds[idx][0] + 1, bounds[idx][1] + 1)]
+            if fail:
+                raise ProviderError("connection reset")
+
+    return EventsProvider
+
+
+@pytest.fixture
+def io(tmp_path, monkeypatch):
+    monkeypatch.setattr(events_io, "BLOCKS_PER_SHARD", 100)
+    monkeypatch.setattr(events_io, "LastBlockProvider", LastBlockProvider)
+    return events_io.EventsIO(tmp_path)
+
+
+def fetch(io) -> list[int]:
+    async def main():
+        return [event["block_number"] async for event in io._from_subgraph("SUBGRAPH_URL", 0, None)]
+
+    return asyncio.run(main())
+
+
+def test_shards_in_block_order(io, monkeypatch):
+    monkeypatch.setattr(events_io, "EventsProvider", events_provider([2, 0, 3, 1]))
+
+    assert fetch(io) == list(range(400))
+    assert sorted(file.name for file in io.folder.iterdir()) == [f"part_{idx}.pkl" for idx in range(4)]
+
+
+def test_interrupted_fetch_keeps_contiguous_shards(io, monkeypatch):
+    monkeypatch.setattr(events_io, "EventsProvider", events_provider([2, 0, 3], fail=True))
+
+    with pytest.raises(ProviderError):
+        fetch(io)
+
+    # shards 2 and 3 follow the missing shard 1, so that they are neither returned nor stored
+    assert [file.name for file in io.folder.iterdir()] == ["part_0.pkl"]
+    assert [event["block_number"] for event in io.from_local_files()] == list(range(100))
+
+
+def test_local_files_stop_at_missing_shard(io):
+    for idx in (0, 1, 3, 4):
+        with open(io.folder.joinpath(f"part_{idx}.pkl"), "wb") as f:
+            pickle.dump([{"block_number": idx}], f)
+
+    assert [file.name for file in io.shard_files()] == ["part_0.pkl", "part_1.pkl"]
+    assert [event["block_number"] for event in io.from_local_files()] == [0, 1]
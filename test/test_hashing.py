@@ -0,0 +1,90 @@
+import importlib
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from lib.helper import keccak_256
+
+hashing = importlib.import_module("checksum-baseline.hashing")
+entries = importlib.import_module("checksum-baseline.subgraph.entries")
+
+
+def blocks(count: int, tx_hash=lambda rng: "0x" + rng.randbytes(32).hex()) -> list:
+    """
+    Blocks with 0 to 3 events each, so that some have none.
+    """
+    rng = random.Random(count)
+    items = []
+    for number in range(count):
+        block = entries.Block(number)
+        for idx in range(rng.randrange(4)):
+            block.add_event(entries.Event(f"{number}-{idx}", number, idx, idx, "Transfer", tx_hash(rng)))
+        items.append(block)
+    return items
+
+
+def baseline(items: list, previous: bytes) -> list[bytes]:
+    """
+    The checksums as chained block by block: the hash of the previous checksum followed by the hash of the block.
+    """
+    checksums = []
+    for block in items:
+        previous = keccak_256(b"".join([previous, block.keccak_256()]))
+        checksums.append(bytes(previous))
+    return checksums
+
+
+def checksums(items: list, previous: bytes, workers=None) -> list[bytes]:
+    hashing.compute_checksums(items, previous, workers)
+    return [bytes(block.checksum) for block in items]
+
+
+@pytest.mark.parametrize("previous", [bytes(32), bytes(range(32))])
+def test_matches_baseline(previous):
+    items = blocks(500)
+    assert any(not block.events for block in items)
+
+    assert checksums(items, previous) == baseline(items, previous)
+
+
+def test_matches_baseline_with_processes(monkeypatch):
+    pools = []
+
+    class Executor(ProcessPoolExecutor):
+        def __init__(self, workers):
+            pools.append(workers)
+            super().__init__(workers)
+
+    monkeypatch.setattr(hashing, "PARALLEL_THRESHOLD", 100)
+    monkeypatch.setattr(hashing, "ProcessPoolExecutor", Executor)
+    items = blocks(1_000)
+
+    assert checksums(items, bytes(32), workers=4) == baseline(items, bytes(32))
+    assert pools == [4]
+
+
+@pytest.mark.parametrize(
+    "tx_hash",
+    [
+        lambda rng: "0x" + rng.randbytes(32).hex() + " ",  # not 66 characters long
+        lambda rng: "0x" + rng.randbytes(rng.randrange(1, 40)).hex(),  # any length
+        lambda rng: "0X" + rng.randbytes(32).hex().upper(),
+    ],
+)
+def test_matches_baseline_with_unusual_hashes(tx_hash, monkeypatch):
+    decoded = []
+    decode_each = hashing._decode_each
+    monkeypatch.setattr(hashing, "_decode_each", lambda items: decoded.append(len(items)) or decode_each(items))
+    items = blocks(300, tx_hash)
+
+    assert checksums(items, bytes(32)) == baseline(items, bytes(32))
+    # the hashes are decoded one by one
+    assert decoded == [300]
+
+
+def test_invalid_hash():
+    items = blocks(10, lambda rng: "0xzz")
+
+    with pytest.raises(ValueError):
+        hashing.compute_checksums(items, bytes(32))
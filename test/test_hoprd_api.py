@@ -0,0 +1,66 @@
+import asyncio
+import json
+import socket
+
+import pytest
+from aiohttp import web
+
+from lib.hoprd_api import HoprdAPI, StreamError
+
+CHANNEL = {
+    "balance": "10",
+    "channelId": "0xab",
+    "destinationAddress": "0x02",
+    "destinationPeerId": "12D3KooW02",
+    "sourceAddress": "0x01",
+    "sourcePeerId": "12D3KooW01",
+    "status": "Open",
+    "epoch": 1,
+    "ticketIndex": "0",
+}
+
+
+@pytest.fixture
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def stream(port: int, response: web.Response) -> list:
+    async def handle(request: web.Request) -> web.Response:
+        return response
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/api/v3/channels", handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", port).start()
+
+        try:
+            async with HoprdAPI(f"http://127.0.0.1:{port}", "token") as api:
+                return [channel async for channel in api.stream_channels()]
+        finally:
+            await runner.cleanup()
+
+    return asyncio.run(main())
+
+
+def test_stream_channels(unused_port):
+    body = json.dumps({"all": [CHANNEL, {**CHANNEL, "channelId": "0xcd"}], "incoming": [], "outgoing": []})
+    channels = stream(unused_port, web.Response(text=body, content_type="application/json"))
+
+    assert [channel.id for channel in channels] == ["0xab", "0xcd"]
+
+
+def test_stream_channels_raises_on_error_status(unused_port):
+    with pytest.raises(StreamError, match="status 500"):
+        stream(unused_port, web.Response(status=500, text="error"))
+
+
+def test_stream_channels_raises_on_cut_response(unused_port):
+    body = json.dumps({"all": [CHANNEL, CHANNEL]})[:-60]
+
+    with pytest.raises(StreamError, match="failed"):
+        stream(unused_port, web.Response(text=body, content_type="application/json"))
@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+
+from lib.hoprd_api.json_stream import JSONArrayStream, iter_array_items
+
+TOPOLOGY = {
+    "incoming": [],
+    "outgoing": [{"id": "0x01", "balance": "10"}],
+    "all": [
+        {"channelId": "0xab", "balance": "1000000000000000000", "status": "Open", "ticketIndex": 12},
+        {"channelId": "0xcd", "balance": "0", "status": "Closed", "ticketIndex": 0, "tags": ["é", "🐰"]},
+        {"channelId": "0xef", "balance": "5", "status": "PendingToClose", "ticketIndex": -3.5e2, "ok": True},
+    ],
+    "count": 3,
+}
+
+
+def parse(chunks: list[str], keys: set[str]) -> list:
+    stream = JSONArrayStream(keys)
+    items = [item for chunk in chunks for item in stream.feed(chunk)]
+    return items + list(stream.feed("", final=True))
+
+
+def expected(document: dict, keys: set[str]) -> list:
+    return [(key, item) for key, value in document.items() if key in keys for item in value]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+def test_chunk_boundaries(size):
+    text = json.dumps(TOPOLOGY, ensure_ascii=False, indent=2)
+    chunks = [text[idx : idx + size] for idx in range(0, len(text), size)]
+
+    assert parse(chunks, {"all", "outgoing"}) == expected(TOPOLOGY, {"all", "outgoing"})
+
+
+def test_numbers_split_across_chunks():
+    assert parse(['{"all": [12', "34, 5", "6]}"], {"all"}) == [("all", 1234), ("all", 56)]
+    assert parse(['{"all": [1', "2", "]}"], {"all"}) == [("all", 12)]
+
+
+@pytest.mark.parametrize("number", ["1.5", "1e5", "2E+3", "-4.25e-2", "10"])
+def test_numbers_split_anywhere(number):
+    text = f'{{"all": [{number}, {number}]}}'
+
+    for idx in range(1, len(text)):
+        assert parse([text[:idx], text[idx:]], {"all"}) == [("all", json.loads(number))] * 2
+
+
+def test_other_arrays_are_skipped_item_by_item():
+    stream = JSONArrayStream({"all"})
+    items = ",".join(json.dumps({"channelId": f"0x{idx:x}", "balance": str(idx)}) for idx in range(1_000))
+
+    assert list(stream.feed('{"outgoing": [' + items)) == []
+    # only the unfinished item is kept, not the part of the array already skipped
+    assert len(stream._buffer) - stream._pos < 100
+
+    assert list(stream.feed('], "all": [1]}', final=True)) == [("all", 1)]
+
+
+def test_items_as_soon_as_complete():
+    stream = JSONArrayStream({"all"})
+
+    assert list(stream.feed('{"all": [{"a": 1}, {"b"')) == [("all", {"a": 1})]
+    assert list(stream.feed(": 2}")) == [("all", {"b": 2})]
+    assert list(stream.feed("]}", final=True)) == []
+
+
+def test_other_values_are_dropped():
+    document = {"count": 2, "nested": {"all": [1, 2]}, "list": [[1], {"all": []}], "all": [3]}
+
+    assert parse([json.dumps(document)], {"all"}) == [("all", 3)]
+
+
+def test_empty_object():
+    assert parse(["{", " }"], {"all"}) == []
+
+
+@pytest.mark.parametrize("text", ['{"all": [1, 2', '{"all": [1]', "[1, 2]", '{"all": [1]} {}'])
+def test_invalid(text):
+    with pytest.raises(ValueError):
+        parse([text], {"all"})
+
+
+def test_utf8_split_across_chunks():
+    data = json.dumps(TOPOLOGY, ensure_ascii=False).encode()
+
+    async def chunks():
+        for idx in range(0, len(data), 5):
+            yield data[idx : idx + 5]
+
+    async def collect():
+        return [item async for item in iter_array_items(chunks(), {"all"})]
+
+    assert asyncio.run(collect()) == expected(TOPOLOGY, {"all"})
@@ -0,0 +1,65 @@
+import pytest
+
+from lib.subgraph import Pagination
+
+
+def normalized(body: str) -> str:
+    return " ".join(body.split())
+
+
+def test_skip_keeps_query():
+    body = "safes(first: $first, skip: $skip) { id }"
+    assert Pagination.SKIP.rewrite(body) == body
+
+
+def test_cursor_replaces_skip():
+    body = "safes(first: $first, skip: $skip) { id }"
+    assert normalized(Pagination.CURSOR.rewrite(body)) == normalized(
+        "safes(first: $first, where: {id_gt: $last_id}, orderBy: id, orderDirection: asc) { id }"
+    )
+
+
+def test_cursor_extends_where():
+    body = """tickets(
+        first: $first,
+        skip: $skip,
+        where: {channel_: {source_in: $source_in}}
+    ) {
+        id
+    }"""
+    rewritten = normalized(Pagination.CURSOR.rewrite(body))
+
+    assert "skip" not in rewritten
+    assert "where: {id_gt: $last_id, channel_: {source_in: $source_in}}" in rewritten
+    assert rewritten.endswith("orderBy: id, orderDirection: asc) { id }")
+
+
+def test_cursor_drops_ordering():
+    body = "safes(first: $first, skip: $skip, orderBy: balance, orderDirection: desc) { id }"
+    rewritten = Pagination.CURSOR.rewrite(body)
+
+    assert "balance" not in rewritten
+    assert "desc" not in rewritten
+    assert rewritten.count("orderBy") == 1
+
+
+def test_cursor_without_arguments():
+    body = "safes { id }"
+    assert normalized(Pagination.CURSOR.rewrite(body)) == normalized(
+        "safes(where: {id_gt: $last_id}, first: $first, orderBy: id, orderDirection: asc) { id }"
+    )
+
+
+def test_cursor_ignores_nested_arguments():
+    body = "safes(first: $first, skip: $skip) { id owner(skip: 1) { id } }"
+    rewritten = Pagination.CURSOR.rewrite(body)
+
+    assert rewritten.endswith("{ id owner(skip: 1) { id } }")
+
+
+def test_next_cursor():
+    assert Pagination.SKIP.next_cursor(100, [{}] * 10) == 110
+    assert Pagination.CURSOR.next_cursor("", [{"id": "0x01"}, {"id": "0x02"}]) == "0x02"
+
+    with pytest.raises(ValueError):
+        Pagination.CURSOR.next_cursor("", [{"balance": 1}])
@@ -0,0 +1,85 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from lib.rpc import CircuitBreaker, RetryPolicy
+from lib.rpc.query_provider import ETHGetLogsRPCProvider, ProviderError, ResultLimitError
+
+
+class FakeTransport:
+    """
+    Answers each request with the next of the given answers: a (response, status) pair, an exception to raise,
+    or a delay (in seconds) to wait before answering with no logs.
+    """
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.requests = 0
+        self.breaker = CircuitBreaker("fake", failure_threshold=100)
+
+    async def request(self, payload: dict) -> tuple[dict, int]:
+        self.requests += 1
+        answer = self.answers.pop(0)
+        if isinstance(answer, BaseException):
+            raise answer
+        if isinstance(answer, float):
+            await asyncio.sleep(answer)
+            answer = ({"jsonrpc": "2.0", "id": 1, "result": []}, 200)
+        return answer
+
+
+def get(transport: FakeTransport, timeout: float = 30, backoff: float = 0):
+    policy = RetryPolicy(max_attempts=3, backoff=backoff, jitter=0)
+    provider = ETHGetLogsRPCProvider("http://fake", transport, policy)
+    return asyncio.run(provider.get(timeout, fromBlock=0, toBlock=10))
+
+
+def error(message: str) -> tuple[dict, int]:
+    return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32005, "message": message}}, 200
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        "query returned more than 10000 results",
+        "Log response size exceeded. You can make eth_getLogs requests with up to a 2K block range",
+        "exceed maximum block range: 5000",
+        "block range is too wide",
+    ],
+)
+def test_result_limit_messages(message):
+    with pytest.raises(ResultLimitError):
+        get(FakeTransport(error(message)))
+
+
+@pytest.mark.parametrize("message", ["rate limit exceeded", "Too many requests, slow down", "daily limit exceeded"])
+def test_rate_limiting_is_not_a_result_limit(message):
+    with pytest.raises(ProviderError) as err:
+        get(FakeTransport(error(message)))
+    assert not isinstance(err.value, ResultLimitError)
+
+
+def test_attempt_timeout_is_a_result_limit():
+    transport = FakeTransport(1.0, 1.0)
+
+    with pytest.raises(ResultLimitError, match="timed out"):
+        get(transport, timeout=0.05)
+    # retrying the same range would time out again
+    assert transport.requests == 1
+
+
+def test_timeout_applies_to_each_attempt():
+    transport = FakeTransport(aiohttp.ClientConnectionError(), aiohttp.ClientConnectionError(), 0.03)
+
+    # the retries take longer than the timeout altogether, but each attempt is within it
+    assert get(transport, timeout=0.05, backoff=0.05) == []
+    assert transport.requests == 3
+
+
+def test_failing_endpoint_is_not_a_result_limit():
+    transport = FakeTransport(*[aiohttp.ClientConnectionError()] * 3)
+
+    with pytest.raises(ProviderError, match="Giving up") as err:
+        get(transport)
+    assert not isinstance(err.value, ResultLimitError)
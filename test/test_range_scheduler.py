@@ -0,0 +1,162 @@
+import asyncio
+
+from lib.rpc import AdaptiveRangeScheduler
+from lib.rpc.entries.types.block import Block
+from lib.rpc.query_provider import ResultLimitError
+
+
+class Node:
+    """
+    Fake node answering with one result every `spacing` blocks, and refusing windows over `limit` blocks.
+    """
+
+    def __init__(self, limit: int = None, spacing: int = 1_000_000):
+        self.limit = limit
+        self.spacing = spacing
+        self.queries: list[tuple[int, bool]] = []  # size of each window queried, and whether it was refused
+
+    @property
+    def refused(self) -> list[int]:
+        return [span for span, refused in self.queries if refused]
+
+    async def fetch(self, start: Block, end: Block) -> list[int]:
+        span = end.idx - start.idx + 1
+        refused = self.limit is not None and span > self.limit
+        self.queries.append((span, refused))
+
+        if refused:
+            raise ResultLimitError(f"query returned more than 10000 results ({span} blocks)")
+
+        return [block for block in range(start.idx, end.idx + 1) if block % self.spacing == 0]
+
+
+def scan(scheduler: AdaptiveRangeScheduler, node: Node, start: int, end: int, count=len) -> list[tuple[int, int, list]]:
+    async def main():
+        return [
+            (first.idx, last.idx, result)
+            async for first, last, result in scheduler.scan(node.fetch, Block(start), Block(end), count)
+        ]
+
+    return asyncio.run(main())
+
+
+def spans(windows) -> list[int]:
+    return [end - start + 1 for start, end, _ in windows]
+
+
+def assert_covers(windows, start: int, end: int):
+    assert windows[0][0] == start
+    assert windows[-1][1] == end
+    assert all(previous[1] + 1 == current[0] for previous, current in zip(windows, windows[1:]))
+
+
+def test_splits_refused_windows():
+    scheduler = AdaptiveRangeScheduler(initial_range=1_000, max_range=1_000)
+    node = Node(limit=300)
+
+    windows = scan(scheduler, node, 0, 4_999)
+
+    assert_covers(windows, 0, 4_999)
+    assert max(spans(windows)) <= 300
+    assert node.refused[:2] == [1_000, 500]
+    assert scheduler.ceiling <= 500
+
+
+def test_grows_on_sparse_results():
+    scheduler = AdaptiveRangeScheduler(initial_range=100, max_range=1_000)
+    windows = scan(scheduler, Node(), 0, 9_999)
+
+    assert_covers(windows, 0, 9_999)
+    assert spans(windows)[:6] == [100, 200, 400, 800, 1_000, 1_000]
+
+
+def test_shrinks_on_dense_results():
+    scheduler = AdaptiveRangeScheduler(initial_range=1_000, target_results=100)
+    windows = scan(scheduler, Node(spacing=2), 0, 4_999)
+
+    assert_covers(windows, 0, 4_999)
+    # stops shrinking once a window returns between half the target and the target
+    assert spans(windows)[:6] == [1_000, 500, 250, 125, 125, 125]
+
+
+def test_never_regrows_to_refused_window():
+    scheduler = AdaptiveRangeScheduler(initial_range=800)
+    node = Node(limit=500)
+
+    windows = scan(scheduler, node, 0, 9_999)
+
+    assert_covers(windows, 0, 9_999)
+    assert max(spans(windows)) <= 500
+
+    # each window is smaller than every window refused before it, so that a refused size is never tried again
+    smallest_refused = None
+    for span, refused in node.queries:
+        if smallest_refused is not None:
+            assert span < smallest_refused
+        if refused:
+            smallest_refused = span if smallest_refused is None else min(smallest_refused, span)
+
+
+def test_ceiling_expires():
+    scheduler = AdaptiveRangeScheduler(initial_range=1_000, max_range=1_000, ceiling_expiry=5)
+    node = Node(limit=500)
+
+    # a single refusal, e.g. while the node was busy
+    assert spans(scan(scheduler, node, 0, 999)) == [500, 500]
+    assert scheduler.ceiling == 1_000
+    node.limit = None
+
+    windows = scan(scheduler, node, 1_000, 9_999)
+
+    # the refused window is tried again after 5 successful windows
+    assert_covers(windows, 1_000, 9_999)
+    assert spans(windows)[:5] == [999, 999, 999, 1_000, 1_000]
+    assert scheduler.ceiling is None
+
+
+def test_min_range_refused():
+    scheduler = AdaptiveRangeScheduler(initial_range=4, min_range=2)
+    node = Node(limit=1)
+
+    windows = scan(scheduler, node, 0, 9)
+
+    # windows refused at the smallest range are reported, and the scan goes on
+    assert_covers(windows, 0, 9)
+    assert spans(windows) == [2] * 5
+    assert all(isinstance(result, ResultLimitError) for _, _, result in windows)
+
+
+def test_concurrent_windows_in_block_order():
+    scheduler = AdaptiveRangeScheduler(initial_range=100, max_range=100)
+    node = Node(limit=50)
+    in_flight, most_in_flight = 0, 0
+
+    async def fetch(start: Block, end: Block) -> list[int]:
+        nonlocal in_flight, most_in_flight
+        in_flight += 1
+        most_in_flight = max(most_in_flight, in_flight)
+        try:
+            # later windows answer first
+            await asyncio.sleep(0.001 * (10 - start.idx // 100 % 10))
+            return await node.fetch(start, end)
+        finally:
+            in_flight -= 1
+
+    async def main():
+        return [
+            (first.idx, last.idx, result)
+            async for first, last, result in scheduler.scan(fetch, Block(0), Block(1_999), concurrency=4)
+        ]
+
+    windows = asyncio.run(main())
+
+    assert_covers(windows, 0, 1_999)
+    assert max(spans(windows)) <= 50
+    assert 1 < most_in_flight <= 4
+
+
+def test_unknown_count_keeps_window():
+    scheduler = AdaptiveRangeScheduler(initial_range=100)
+    windows = scan(scheduler, Node(), 0, 999, count=lambda result: None)
+
+    assert spans(windows) == [100] * 10
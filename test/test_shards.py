@@ -0,0 +1,157 @@
+import asyncio
+import socket
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+
+from lib.subgraph import GraphQLProvider, Pagination, ProviderError, hex_boundaries, range_boundaries
+from scripts.benchmarks.stub_subgraph import StubSubgraph
+
+
+@pytest.fixture
+def unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.parametrize("digits", [1, 2, 3])
+def test_hex_boundaries(digits):
+    boundaries = hex_boundaries(digits)
+
+    assert len(boundaries) == 16**digits - 1
+    assert boundaries == sorted(boundaries)
+    assert all(len(boundary) % 2 == 0 and bytes.fromhex(boundary[2:]) for boundary in boundaries)
+
+
+def test_hex_boundaries_split_by_prefix():
+    boundaries = hex_boundaries()
+
+    assert boundaries[0] == "0x10"
+    assert boundaries[-1] == "0xf0"
+    # ids are in (boundaries[i - 1], boundaries[i]]: an id starting with 0x1 is in the second shard
+    assert boundaries[0] < "0x1fff" <= boundaries[1]
+    assert "0x0fff" <= boundaries[0]
+
+
+def test_range_boundaries():
+    assert range_boundaries(0, 1_000, 300) == [299, 599, 899]
+
+
+class ItemsProvider(GraphQLProvider):
+    query_file = str(Path(__file__).parents[1] / "scripts" / "benchmarks" / "queries" / "items.graphql")
+    pagination = Pagination.CURSOR
+    shard_key = "id"
+    hex_ids = True
+
+
+def test_sharded_by_hex_prefix(unused_port):
+    async def main():
+        async with StubSubgraph(1_000, unused_port) as stub:
+            async with ItemsProvider(stub.url, cache=None) as provider:
+                return stub.ids, await provider.get_sharded(hex_boundaries(), concurrency=4)
+
+    ids, items = asyncio.run(main())
+    assert [item["id"] for item in items] == ids
+
+
+def test_id_sharding_requires_hex_ids():
+    class UnknownIdsProvider(ItemsProvider):
+        hex_ids = False
+
+    async def main():
+        async with UnknownIdsProvider("http://127.0.0.1:1/", cache=None) as provider:
+            return await provider.get_sharded(hex_boundaries())
+
+    with pytest.raises(ProviderError, match="cannot be sharded"):
+        asyncio.run(main())
+
+
+class FlakyStubSubgraph(StubSubgraph):
+    """
+    Answers the given requests (by number) with a gateway error page instead of the query result.
+    """
+
+    def __init__(self, count: int, port: int, failing: set[int], **kwargs):
+        super().__init__(count, port, **kwargs)
+        self.failing = failing
+        self.received = 0
+
+    async def handle(self, request):
+        self.received += 1
+        if self.received in self.failing:
+            return web.Response(status=502, text="<html>Bad Gateway</html>", content_type="text/html")
+        return await super().handle(request)
+
+
+class RetryingItemsProvider(ItemsProvider):
+    rate_limit_backoff = 0
+
+
+def test_sharded_retries_server_errors(unused_port):
+    async def main():
+        async with FlakyStubSubgraph(20_000, unused_port, failing={3, 7, 8}) as stub:
+            async with RetryingItemsProvider(stub.url, cache=None) as provider:
+                return stub.ids, await provider.get_sharded(hex_boundaries(), concurrency=4)
+
+    ids, items = asyncio.run(main())
+    assert [item["id"] for item in items] == ids
+
+
+def test_sharded_raises_on_persistent_server_errors(unused_port):
+    class FewRetriesProvider(RetryingItemsProvider):
+        rate_limit_retries = 2
+
+    async def main():
+        async with FlakyStubSubgraph(20_000, unused_port, failing={5, 6, 7}) as stub:
+            async with FewRetriesProvider(stub.url, cache=None) as provider:
+                return await provider.get_sharded(hex_boundaries(), concurrency=1)
+
+    with pytest.raises(ProviderError, match="status 502"):
+        asyncio.run(main())
+
+
+def test_invalid_json_raises(unused_port):
+    class NotJSONStubSubgraph(StubSubgraph):
+        async def handle(self, request):
+            return web.Response(text="<html>maintenance</html>", content_type="text/html")
+
+    async def main():
+        async with NotJSONStubSubgraph(10, unused_port) as stub:
+            async with ItemsProvider(stub.url, cache=None) as provider:
+                return await provider.get()
+
+    with pytest.raises(ProviderError, match="Invalid JSON"):
+        asyncio.run(main())
+
+
+def test_timeout_applies_to_each_attempt(unused_port):
+    class SlowFirstStubSubgraph(FlakyStubSubgraph):
+        async def handle(self, request):
+            self.received += 1
+            if self.received == 1:
+                await asyncio.sleep(1)
+            return await StubSubgraph.handle(self, request)
+
+    class ShortTimeoutProvider(RetryingItemsProvider):
+        request_timeout = 0.2
+        rate_limit_retries = 1
+
+    async def main(stub_class):
+        async with stub_class(10, unused_port, failing=set()) as stub:
+            async with ShortTimeoutProvider(stub.url, cache=None) as provider:
+                return stub.ids, await provider.get()
+
+    # the slow attempt is retried, and the retry gets the data
+    ids, items = asyncio.run(main(SlowFirstStubSubgraph))
+    assert [item["id"] for item in items] == ids
+
+    # when every attempt times out, the provider gives up with a ProviderError
+    class SlowStubSubgraph(FlakyStubSubgraph):
+        async def handle(self, request):
+            await asyncio.sleep(1)
+            return await StubSubgraph.handle(self, request)
+
+    with pytest.raises(ProviderError, match="TimeoutError"):
+        asyncio.run(main(SlowStubSubgraph))
@@ -5,10 +5,10 @@ from dotenv import load_dotenv
 
 from lib import exporter
 from lib.helper import asynchronous
+from lib.subgraph import BlockPin, GraphQLProvider
 from lib.taskmanager import TaskManager
 
 from .subgraph import helper
-from .subgraph.entries import Ticket
 
 
 @click.command()
@@ -33,16 +33,16 @@ async def main(safe: str, output: Path):
         print("No .env file found")
         return
 
-    with TaskManager("Getting all nodes linked to safe"):
-        relayers = await helper.safe_to_nodes(safe)
-    print(f"\tFound {len(relayers)} nodes linked to the safe `{safe}` ")
+    block_pin = BlockPin()
 
-    with TaskManager("Getting all tickets issued"):
-        tickets = await helper.nodes_to_tickets(relayers)
-    print(f"\tFound {len(tickets)} tickets issued by the relayers")
+    async with GraphQLProvider.create_session() as session:
+        with TaskManager("Getting all nodes linked to safe"):
+            relayers = await helper.safe_to_nodes(safe, block_pin, session)
+        print(f"\tFound {len(relayers)} nodes linked to the safe `{safe}` ")
 
-    with TaskManager("Aggregating ticket amounts"):
-        stats = Ticket.aggregate(tickets)
+        with TaskManager("Getting and aggregating all tickets issued"):
+            stats = await helper.nodes_to_tickets_stats(relayers, block_pin, session)
+        print(f"\tFound {stats.resume.ticket_count} tickets issued by the relayers")
 
     print(
         f"\tTotal amount redeemed: {stats.resume.redeemed_value:7.2f} wxHOPR ({stats.resume.ticket_count} tickets)")
@@ -1,4 +1,4 @@
 from .node import Node
-from .ticket import Ticket
+from .ticket import Ticket, TicketStatistics
 
-__all__ = ["Node", "Ticket"]
+__all__ = ["Node", "Ticket", "TicketStatistics"]
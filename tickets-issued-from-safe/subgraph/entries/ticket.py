@@ -1,3 +1,5 @@
+from typing import Iterable, Optional
+
 from lib.subgraph import Entry
 
 
@@ -59,8 +61,12 @@ class Ticket(Entry):
         return cls(ticket['id'], ticket['amount'], ticket['channel']['source']['id'])
 
     @classmethod
-    def aggregate(cls, tickets: list) -> TicketStatistics:
-        stats = TicketStatistics()
+    def aggregate(cls, tickets: Iterable["Ticket"], stats: Optional[TicketStatistics] = None) -> TicketStatistics:
+        """
+        Aggregates tickets per source. Pass `stats` to keep aggregating into existing statistics.
+        """
+        if stats is None:
+            stats = TicketStatistics()
 
         for ticket in tickets:
             stats.increase_count(ticket.source)
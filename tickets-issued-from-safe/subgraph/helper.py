@@ -1,14 +1,19 @@
-from lib.subgraph import ProviderError
+from typing import Optional
 
-from .entries import Node, Ticket
-from .providers import SafesProvider, TicketsProvider
+import aiohttp
+
+from lib.subgraph import BlockPin, ProviderError
 
+from .entries import Node, Ticket, TicketStatistics
+from .providers import SafesProvider, TicketsProvider
 
-async def safe_to_nodes(safe_address: str) -> list[Node]:
-    safe_provider = SafesProvider("SUBGRAPH_SAFES_URL")
 
+async def safe_to_nodes(
+    safe_address: str, block_pin: Optional[BlockPin] = None, session: Optional[aiohttp.ClientSession] = None
+) -> list[Node]:
     try:
-        entries = [Node.fromSubgraphResult(n) for n in (await safe_provider.get(safe=safe_address))]
+        async with SafesProvider("SUBGRAPH_SAFES_URL", session, block_pin=block_pin) as safe_provider:
+            entries = [Node.fromSubgraphResult(n) for n in (await safe_provider.get(safe=safe_address))]
     except ProviderError as err:
         print(f"get safes: {err}")
         return []
@@ -16,15 +21,22 @@ async def safe_to_nodes(safe_address: str) -> list[Node]:
         return entries
 
 
-async def nodes_to_tickets(relayers: list[Node]) -> list[Ticket]:
-    ticket_provider = TicketsProvider("SUBGRAPH_TICKETS_URL")
-
+async def nodes_to_tickets_stats(
+    relayers: list[Node], block_pin: Optional[BlockPin] = None, session: Optional[aiohttp.ClientSession] = None
+) -> TicketStatistics:
+    """
+    Aggregates the tickets issued by the relayers, page by page as they are received. Ticket ids are not known
+    to be hex strings, so the collection is not sharded by id prefix.
+    """
     node_addresses = [r.id for r in relayers]
+    stats = TicketStatistics()
 
     try:
-        entries: list[Ticket] = [Ticket.fromSubgraphResult(t) for t in await ticket_provider.get(source_in=node_addresses)]
+        async with TicketsProvider("SUBGRAPH_TICKETS_URL", session, block_pin=block_pin) as ticket_provider:
+            async for page in ticket_provider.aiter_pages(source_in=node_addresses):
+                Ticket.aggregate((Ticket.fromSubgraphResult(t) for t in page), stats)
     except ProviderError as err:
         print(f"get tickets: {err}")
-        return []
+        return TicketStatistics()
     else:
-        return entries
+        return stats
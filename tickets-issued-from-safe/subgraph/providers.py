@@ -1,8 +1,9 @@
-from lib.subgraph import GraphQLProvider
+from lib.subgraph import GraphQLProvider, Pagination
 
 
 class TicketsProvider(GraphQLProvider):
     query_file = "queries/tickets.graphql"
+    pagination = Pagination.CURSOR
     params = ['$source_in: [String!] = [""]']
 
 
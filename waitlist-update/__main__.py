@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 
 from lib import exporter
 from lib.helper import asynchronous
+from lib.subgraph import BlockPin, hex_boundaries
 from lib.taskmanager import TaskManager
 
 from .candidate import Candidate
@@ -34,19 +35,23 @@ async def main(registry: Path, output: Path):
         print("No .env file found")
         return
 
-    # Loading nft holders from subgraph
-    nft_holders = list[str]()
-    with TaskManager("Getting NFT holders from subgraph"):
-        for entry in await NFTProvider("SUBGRAPH_NFT_URL").get():
-            nft_holders.append(NFTHolder.fromSubgraphResult(entry))
-    print(f"\tLoaded {len(nft_holders)} entries")
-
-    # Loading deployed safes from subgraph
-    deployed_safes = list[Safe]()
-    with TaskManager("Getting deployed safes from subgraph"):
-        for entry in await SafesProvider("SUBGRAPH_SAFES_URL").get():    
-            deployed_safes.append(Safe.fromSubgraphResult(entry))
-    print(f"\tLoaded {len(deployed_safes)} entries")
+    block_pin = BlockPin()
+
+    async with NFTProvider.create_session() as session:
+        # Loading nft holders from subgraph
+        nft_holders = list[str]()
+        with TaskManager("Getting NFT holders from subgraph"):
+            async for entry in NFTProvider("SUBGRAPH_NFT_URL", session, block_pin=block_pin).aiter_items():
+                nft_holders.append(NFTHolder.fromSubgraphResult(entry))
+        print(f"\tLoaded {len(nft_holders)} entries")
+
+        # Loading deployed safes from subgraph
+        deployed_safes = list[Safe]()
+        with TaskManager("Getting deployed safes from subgraph"):
+            safes_provider = SafesProvider("SUBGRAPH_SAFES_URL", session, block_pin=block_pin)
+            for entry in await safes_provider.get_sharded(hex_boundaries()):
+                deployed_safes.append(Safe.fromSubgraphResult(entry))
+        print(f"\tLoaded {len(deployed_safes)} entries")
 
     deployed_safes_addresses = [s.address for s in deployed_safes]
     running_nodes = sum([s.nodes for s in deployed_safes], [])
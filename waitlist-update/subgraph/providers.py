@@ -1,8 +1,12 @@
-from lib.subgraph import GraphQLProvider
+from lib.subgraph import GraphQLProvider, Pagination
 
 
 class SafesProvider(GraphQLProvider):
     query_file: str = "queries/safes_balance.graphql"
+    pagination: Pagination = Pagination.CURSOR
+    shard_key: str = "id"
+    hex_ids: bool = True
 
 class NFTProvider(GraphQLProvider):
     query_file: str = "queries/nft_boosts.graphql"
+    pagination: Pagination = Pagination.CURSOR